@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+from research_synstation import cdp, paths
+
+
+def liquidation_cascade(
+    num_troves,
+    initial_price,  # collateral price in GM
+    volatility,  # daily volatility
+    block_time,  # seconds
+    period,  # days
+    interest_rate=0.05,  # GM borrow rate, per year
+    dex_liquidity=2_000_000_000,  # GM side of the collateral / GM constant product pool
+    mcr=1.1,
+    brute_force=False,  # rescan every trove each block instead of the heap
+    seed=None,
+):
+    """
+    collateral price follows GBM, and liquidated collateral is sold on a
+    constant product pool, pushing the price down and liquidating more troves
+    until the cascade stops
+    """
+    rng = np.random.default_rng(seed)
+    book = cdp.TroveBook(num_troves, mcr)
+    coll = rng.lognormal(0, 1, num_troves)
+    cr = mcr + rng.exponential(1.0, num_troves)
+    book.open(np.arange(num_troves), coll, coll * initial_price / cr, initial_price)
+
+    # collateral / GM pool at the market price
+    x = dex_liquidity / initial_price
+    y = dex_liquidity
+
+    price_seed = np.random.SeedSequence(seed).spawn(1)[0]
+    price_path = paths.PricePath(
+        initial_price, volatility, block_time, period, seed=price_seed
+    )
+    growth = np.exp(interest_rate * block_time / paths.SECONDS_PER_YEAR)
+
+    liquidated = 0
+    liquidated_debt = 0.0
+    max_cascade = 0
+    for P in price_path:
+        for p in P:
+            book.accrue(growth)
+            # the pool tracks the external price, then absorbs liquidations
+            x, y = np.sqrt(x * y / p), np.sqrt(x * y * p)
+            rounds = 0
+            while True:
+                price = y / x
+                if brute_force:
+                    ids = np.flatnonzero(book.active)
+                    ids = ids[book.icr(ids, price) < mcr]
+                    coll, debt = book.close(ids)
+                else:
+                    ids, coll, debt = book.liquidate(price)
+                if len(ids) == 0:
+                    break
+                rounds += 1
+                liquidated += len(ids)
+                liquidated_debt += debt.sum()
+                # sell the collateral for GM
+                x, y = x + coll.sum(), x * y / (x + coll.sum())
+            max_cascade = max(max_cascade, rounds)
+
+    return liquidated, liquidated_debt, max_cascade, y / x
+
+
+def cascade_table(**params):
+    """
+    liquidation_cascade with the heap and with the rescan of every trove,
+    and the headers and rows of the liquidations and the time taken
+    """
+    data = []
+    for brute_force in [False, True]:
+        start = time.perf_counter()
+        liquidated, liquidated_debt, max_cascade, final_price = liquidation_cascade(
+            brute_force=brute_force, **params
+        )
+        data.append(
+            [
+                "rescan" if brute_force else "heap",
+                liquidated,
+                liquidated_debt,
+                max_cascade,
+                final_price,
+                time.perf_counter() - start,
+            ]
+        )
+
+    headers = [
+        "Index",
+        "Liquidated",
+        "Liquidated Debt",
+        "Max Cascade Rounds",
+        "Final Price",
+        "Time (s)",
+    ]
+    return headers, data
+
+
+if __name__ == "__main__":
+    headers, data = cascade_table(
+        num_troves=100_000,
+        initial_price=4000,
+        volatility=0.05,
+        block_time=60,
+        period=7,
+        seed=1337,
+    )
+    print(tabulate(data, headers=headers, tablefmt="pretty"))
@@ -1,7 +1,8 @@
-from research_synstation import amm
 import numpy as np
 import tabulate
 
+from research_synstation import amm, checkpoint, paths
+
 
 def spectral_market_simulation(
     bid,  # initial bid for proposing new market
@@ -14,53 +15,90 @@ def spectral_market_simulation(
     block_time,  # seconds
     period,  # days
     sigma_level=2,  # confidence level for price range
+    chunk_size=1 << 16,  # blocks generated at once
+    seed=None,  # seed for price path and noise trader arrivals
+    price_source=None,  # chunks of block prices replacing GBM, e.g. paths.PriceReplay
+    checkpoint_path=None,  # resume from and periodically save to this file
+    checkpoint_every=16,  # chunks between checkpoints
 ):
     """
     price follows GBM
     arbitrageur comes every block and try to make profit
     noise trader arrival is Poisson process,
     with size of trade is Uniform(0,100)
-    """
-    # initialize market
-    markets = [amm.BinaryMarket(bid=bid, fee_bps=fee_bps) for fee_bps in fee_rates]
-    initial_values = [market.get_value(0.5) for market in markets]
-
-    # generate price of underlying asset
-    W = np.random.normal(
-        0, volatility * np.sqrt(block_time / 86400), int(period * 86400 / block_time)
-    ).cumsum()
-    P = initial_price * np.exp(W)
-
-    # fundamental value of UP token
-    P_ext = np.clip(
-        0.5
-        * (
-            1 + np.log(P / initial_price) / (volatility * np.sqrt(period) * sigma_level)
-        ),
-        0,
-        1,
-    )
 
-    # generate poisson arrival of noise trader
-    arrival_rate = daily_transaction / 86400 * block_time
-    num_trades = np.random.poisson(arrival_rate * len(P))
-    arrival_times = np.sort(np.random.randint(0, len(P), num_trades))
+    price path and arrivals are generated chunk_size blocks at a time,
+    so memory usage does not grow with period
 
-    # generate size of trade
-    trade_size = np.random.uniform(min_size, max_size, num_trades)
+    with price_source, historical prices are replayed instead of GBM;
+    initial_price is then the strike and volatility only sets the price range
 
-    # simulate markets
-    noise_arrival = 0
-    for i in range(len(P)):
-        # arbitrageur comes every block
-        for market in markets:
-            market.arbitrage(P_ext[i])
+    with checkpoint_path, the state is saved every checkpoint_every chunks
+    and a rerun with the same arguments resumes bit-identically from it;
+    the checkpoint is removed when the run finishes
+    """
+    state = checkpoint.load(checkpoint_path)
+    if state is None:
+        # initialize market
+        markets = [amm.BinaryMarket(bid=bid, fee_bps=fee_bps) for fee_bps in fee_rates]
+        initial_values = [market.get_value(0.5) for market in markets]
+
+        # price of underlying asset and noise trader arrivals are streamed in chunks
+        price_seed, noise_seed = np.random.SeedSequence(seed).spawn(2)
+        price_path = paths.PricePath(
+            initial_price, volatility, block_time, period, chunk_size, price_seed
+        )
+        noise = paths.NoiseArrivals(
+            daily_transaction / 86400 * block_time, min_size, max_size, noise_seed
+        )
+        block = 0
+        P_ext = None
+    else:
+        markets = state["markets"]
+        initial_values = state["initial_values"]
+        price_path = state["price_path"]
+        noise = state["noise"]
+        block = state["block"]
+        P_ext = state["P_ext"]
+
+    if price_source is not None:
+        price_path = checkpoint.skip_blocks(price_source, block)
 
+    # simulate markets
+    for chunks, P in enumerate(price_path, 1):
+        # fundamental value of UP token
+        P_ext = paths.to_outcome_price(
+            P, initial_price, volatility, period, sigma_level
+        )
         # noise trader arrival follows poisson process
-        if i in arrival_times:
+        arrivals, trade_size = noise.next_chunk(len(P))
+
+        noise_arrival = 0
+        for i in range(len(P)):
+            # arbitrageur comes every block
             for market in markets:
-                market.noise_trade(trade_size[noise_arrival])
-            noise_arrival += 1
+                market.arbitrage(P_ext[i])
+
+            for _ in range(arrivals[i]):
+                for market in markets:
+                    market.noise_trade(trade_size[noise_arrival])
+                noise_arrival += 1
+
+        block += len(P)
+        if checkpoint_path is not None and chunks % checkpoint_every == 0:
+            checkpoint.save(
+                checkpoint_path,
+                {
+                    "markets": markets,
+                    "initial_values": initial_values,
+                    "price_path": price_path if price_source is None else None,
+                    "noise": noise,
+                    "block": block,
+                    "P_ext": P_ext,
+                },
+            )
+
+    checkpoint.clear(checkpoint_path)
 
     final_values = [market.get_value(P_ext[-1]) for market in markets]
     earned_noise_fees = [market.total_noise_fee() for market in markets]
@@ -73,53 +111,28 @@ def spectral_market_simulation(
     return pnl, earned_noise_fees, earned_arb_fees
 
 
-if __name__ == "__main__":
-    # testing fee rates: 1, 5, 10, 20, 30, 50, 100 (bps)
-    fee_rates = [1, 5, 10, 20, 30, 50, 100]
+def fee_sweep(fee_rates, runs, **params):
+    """
+    repeat spectral_market_simulation runs times
+    and return the headers and rows of PnL and fees (mean & std) by fee rate
+    """
     pnls_arr = []
     earned_noise_fees_arr = []
     earned_arb_fees_arr = []
 
-    # set parameters
-    _bid = 10000
-    _daily_transaction = 200
-    _min_size = 1
-    _max_size = 100
-    _initial_price = 4000
-    _volatility = 0.01
-    _block_time = 2
-    _period = 90
-    _sigma_level = 3
-
-    # print
-    max_price = int(
-        _initial_price * np.exp(_volatility * np.sqrt(_period) * _sigma_level)
-    )
-    min_price = int(
-        _initial_price / np.exp(_volatility * np.sqrt(_period) * _sigma_level)
-    )
-    print(f"Price Range: {min_price} - {max_price}")
+    # one seed per run, reproducible from params["seed"]
+    seeds = np.random.SeedSequence(params.pop("seed", None)).generate_state(runs)
 
-    # repeat 50 times
-    for i in range(50):
-        print(f"\rRunning simulation {i+1}/50 ...", end="")
+    for i in range(runs):
+        print(f"\rRunning simulation {i + 1}/{runs} ...", end="")
         pnls, earned_fees, earned_fees_from_arb = spectral_market_simulation(
-            bid=_bid,
-            fee_rates=fee_rates,
-            daily_transaction=_daily_transaction,
-            min_size=_min_size,
-            max_size=_max_size,
-            initial_price=_initial_price,
-            volatility=_volatility,
-            block_time=_block_time,
-            period=_period,
-            sigma_level=_sigma_level,
+            fee_rates=fee_rates, seed=int(seeds[i]), **params
         )
         pnls_arr.append(pnls)
         earned_noise_fees_arr.append(earned_fees)
         earned_arb_fees_arr.append(earned_fees_from_arb)
+    print("\n")
 
-    # show results (mean & std) using tabulate
     headers = [
         "Fee Rate (bps)",
         "PnL Mean",
@@ -142,5 +155,52 @@ if __name__ == "__main__":
                 np.std([fee[i] for fee in earned_arb_fees_arr]),
             ]
         )
-    print("\n")
+    return headers, data
+
+
+def price_range(initial_price, volatility, period, sigma_level):
+    """
+    range of the underlying price mapped onto (0, 1) by paths.to_outcome_price
+    """
+    width = np.exp(volatility * np.sqrt(period) * sigma_level)
+    return int(initial_price / width), int(initial_price * width)
+
+
+if __name__ == "__main__":
+    # testing fee rates: 1, 5, 10, 20, 30, 50, 100 (bps)
+    fee_rates = [1, 5, 10, 20, 30, 50, 100]
+
+    # set parameters
+    _bid = 10000
+    _daily_transaction = 200
+    _min_size = 1
+    _max_size = 100
+    _initial_price = 4000
+    _volatility = 0.01
+    _block_time = 2
+    _period = 90
+    _sigma_level = 3
+
+    # print
+    min_price, max_price = price_range(
+        _initial_price, _volatility, _period, _sigma_level
+    )
+    print(f"Price Range: {min_price} - {max_price}")
+
+    # repeat 50 times
+    headers, data = fee_sweep(
+        fee_rates,
+        50,
+        bid=_bid,
+        daily_transaction=_daily_transaction,
+        min_size=_min_size,
+        max_size=_max_size,
+        initial_price=_initial_price,
+        volatility=_volatility,
+        block_time=_block_time,
+        period=_period,
+        sigma_level=_sigma_level,
+    )
+
+    # show results (mean & std) using tabulate
     print(tabulate.tabulate(data, headers=headers, tablefmt="pretty"))
@@ -1,5 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
 
 def get_y_0_y_1(x_0, p_0):
@@ -96,11 +95,15 @@ def test_non_uniform_dist(n=2, B=1_000):
     print(f"min: {get_guaranteed_treasury_payment(B, p_array)}")
 
 
-def plot_treasury_payment(max_N=10, B=1000):
+def plot_treasury_payment(
+    max_N=10, B=1000, path="plots/treasury_payment.png", show=True
+):
     """
     Plot the treasury payment for different number of outcomes.
     We assume the probability distribution of outcomes is uniform.
     """
+    import matplotlib.pyplot as plt  # slow to import, only needed for plotting
+
     assert max_N > 1
     assert B > 0
 
@@ -133,8 +136,10 @@ def plot_treasury_payment(max_N=10, B=1000):
     plt.xlabel("Number of Outcomes (N)")
     plt.ylabel("Treasury Payment")
     plt.legend()
-    plt.savefig("plots/treasury_payment.png")
-    plt.show()
+    plt.savefig(path)
+    if show:
+        plt.show()
+    plt.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+from research_synstation import gauge
+
+
+def gauge_simulation(
+    num_pools,
+    num_lps,  # LPs per pool
+    actions_per_epoch,  # deposits, withdrawals and claims per pool and epoch
+    epoch,  # seconds between mints
+    period,  # days
+    M=1_000_000_000 * 0.5,  # maximum emission
+    H=180 * 86400,  # halving period, seconds
+    seed=None,
+):
+    """
+    SYN emissions streamed every epoch to PMAMM gauges with random weights,
+    while random LPs deposit, withdraw and claim in bulk
+    """
+    rng = np.random.default_rng(seed)
+    gauges = [gauge.Gauge(num_lps) for _ in range(num_pools)]
+    minter = gauge.Minter(gauges, rng.dirichlet(np.ones(num_pools)), M, H)
+    claimed = 0.0
+
+    for t in range(epoch, period * 86400 + 1, epoch):
+        minter.mint(t)
+        for g in gauges:
+            ids = rng.integers(0, num_lps, actions_per_epoch)
+            g.deposit(ids, rng.uniform(1, 1000, actions_per_epoch))
+
+            ids = np.unique(rng.integers(0, num_lps, actions_per_epoch))
+            g.withdraw(ids, g.balance[ids] * rng.uniform(0, 1, len(ids)))
+
+            ids = np.unique(rng.integers(0, num_lps, actions_per_epoch))
+            claimed += g.claim(ids).sum()
+
+    unclaimed = sum(g.earned(np.arange(num_lps)).sum() for g in gauges)
+    return minter.total_minted, claimed, unclaimed
+
+
+def gauge_table(lps, **params):
+    """
+    gauge_simulation for every number of LPs per pool, and the headers and rows
+    of the emissions accounted for and the time taken
+    """
+    data = []
+    for num_lps in lps:
+        start = time.perf_counter()
+        minted, claimed, unclaimed = gauge_simulation(num_lps=num_lps, **params)
+        elapsed = time.perf_counter() - start
+        data.append(
+            [num_lps, minted, claimed, unclaimed, minted - claimed - unclaimed, elapsed]
+        )
+
+    headers = ["LPs per pool", "Minted", "Claimed", "Unclaimed", "Error", "Time (s)"]
+    return headers, data
+
+
+if __name__ == "__main__":
+    headers, data = gauge_table(
+        [1_000, 100_000, 1_000_000],
+        num_pools=10,
+        actions_per_epoch=1000,
+        epoch=60 * 60,
+        period=30,
+        seed=1337,
+    )
+    print(tabulate(data, headers=headers, tablefmt="pretty"))
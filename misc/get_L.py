@@ -1,46 +1,162 @@
+import math
 import random
 
+from tabulate import tabulate
 
-def get_L(x, y, for_swap):
+
+def newton_legacy(x, y, L_init):
+    """
+    Newton's method for L**2 = (x + L) * y, stopping at a fixed point
+
+    return L and the number of iterations
+    when x is much smaller than y, the iteration oscillates between L and L + 1
+    and runs until the limit, returning L + 1 half of the time
+    """
     L_prev = 0
-    L_new = (1 << 128) - 1
+    L_new = L_init
     for i in range(256):
         L_prev = L_new
         L_new = (L_prev**2 + x * y) // (2 * L_prev - y)
         if L_prev == L_new:
             break
+    return L_new, i + 1
+
+
+def newton(x, y, L_init):
+    """
+    Newton's method for L**2 = (x + L) * y, starting from L_init >= L
+
+    iterates decrease strictly while they are above the root
+    and never go below floor(L), so the first non-decreasing step ends at floor(L)
+
+    return floor(L) and the number of iterations
+    """
+    L_prev = 0
+    L_new = L_init
+    for i in range(256):
+        L_prev = L_new
+        L_new = (L_prev**2 + x * y) // (2 * L_prev - y)
+        if L_new >= L_prev:
+            break
+    return L_prev, i + 1
+
+
+def get_L_legacy(x, y, for_swap):
+    L, _ = newton_legacy(x, y, (1 << 128) - 1)
+    if for_swap:
+        return L
+    else:
+        return L + 1
+
+
+def initial_guess(x, y):
+    """
+    L = (y + sqrt(y**2 + 4 * x * y)) / 2
+
+    sqrt(D) <= 2**ceil(bit_length(D) / 2) < 2 * sqrt(D),
+    so the guess is an upper bound of L within a factor of 2
+    and Newton's method converges quadratically from the first step
+    """
+    D = y * y + ((x * y) << 2)
+    return ((y + (1 << ((D.bit_length() + 1) >> 1))) >> 1) + 1
+
+
+def get_L(x, y, for_swap):
+    L, _ = newton(x, y, initial_guess(x, y))
+    if for_swap:
+        return L
+    else:
+        return L + 1
+
+
+def get_L_isqrt(x, y, for_swap):
+    """
+    floor((y + isqrt(D)) / 2) == floor((y + sqrt(D)) / 2) for integer y,
+    so no iteration is needed at all
+    """
+    L = (math.isqrt(y * y + ((x * y) << 2)) + y) >> 1
     if for_swap:
-        return L_new
+        return L
     else:
-        return L_new + 1
+        return L + 1
 
 
 def test_get_L(max_bit):
     x = random.randint(1, (1 << max_bit - 1))
     y = random.randint(1, (1 << max_bit - 1))
     L = get_L(x, y, True)
-    return (L**2 <= (x + L) * y) and ((L + 1) ** 2 > (x + (L + 1)) * y), x, y
+    return (
+        (
+            (L**2 <= (x + L) * y)
+            and ((L + 1) ** 2 > (x + (L + 1)) * y)
+            and L == get_L_isqrt(x, y, True)
+        ),
+        x,
+        y,
+    )
 
 
-correct = True
+def test_get_L_exhaustive(max_value):
+    """
+    every x, y in [1, max_value]
+    """
+    correct = True
+    for x in range(1, max_value + 1):
+        for y in range(1, max_value + 1):
+            L = get_L(x, y, True)
+            correct &= (L**2 <= (x + L) * y) and ((L + 1) ** 2 > (x + (L + 1)) * y)
+            correct &= L == get_L_isqrt(x, y, True)
+    return correct
 
-print("-" * 20)
-print("max_bit = 64")
-for _ in range(32):
-    result, x, y = test_get_L(64)
-    print(result & correct)
-    correct &= result
 
-print("-" * 20)
-print("max_bit = 96")
-for _ in range(32):
-    result, x, y = test_get_L(96)
-    print(result & correct)
-    correct &= result
+def compare_iterations(max_bit, n=1000):
+    """
+    mean and max number of Newton iterations of legacy and new initial guess
+    """
+    legacy = []
+    new = []
+    for _ in range(n):
+        x = random.randint(1, (1 << max_bit - 1))
+        y = random.randint(1, (1 << max_bit - 1))
+        legacy.append(newton_legacy(x, y, (1 << 128) - 1)[1])
+        new.append(newton(x, y, initial_guess(x, y))[1])
+    return [
+        max_bit,
+        sum(legacy) / n,
+        max(legacy),
+        sum(new) / n,
+        max(new),
+    ]
 
-print("-" * 20)
-print("max_bit = 128")
-for _ in range(32):
-    result, x, y = test_get_L(128)
+
+if __name__ == "__main__":
+    correct = True
+
+    print("-" * 20)
+    print("exhaustive, x, y <= 256")
+    result = test_get_L_exhaustive(256)
     print(result & correct)
     correct &= result
+
+    for max_bit in [64, 96, 128]:
+        print("-" * 20)
+        print(f"max_bit = {max_bit}")
+        for _ in range(32):
+            result, x, y = test_get_L(max_bit)
+            print(result & correct)
+            correct &= result
+
+    print("-" * 20)
+    print(
+        tabulate(
+            [compare_iterations(max_bit) for max_bit in [32, 64, 96, 128]],
+            headers=[
+                "max_bit",
+                "Legacy Mean",
+                "Legacy Max",
+                "Bit Length Guess Mean",
+                "Bit Length Guess Max",
+            ],
+            tablefmt="pretty",
+        )
+    )
@@ -1,9 +1,11 @@
 import math
-from tabulate import tabulate
 import random
 
+from tabulate import tabulate
+
 DECIMAL = 6
 
+
 class PMAMM:
     """
     Invariant Curve:
@@ -57,6 +59,43 @@ class PMAMM:
 
         return True
 
+    def add_liquidity(self, max_dx: int, max_dy: int):
+        """
+        deposit at most max_dx, max_dy in proportion to the reserves, as PMAMM.vy:
+        LP tokens are rounded down and the amounts deposited are rounded up
+
+        return: LP tokens minted, amounts deposited
+        """
+        shares = min(
+            max_dx * self.total_supply // self.x, max_dy * self.total_supply // self.y
+        )
+        assert shares > 0, "Liquidity: zero shares"
+
+        dx = -(-shares * self.x // self.total_supply)
+        dy = -(-shares * self.y // self.total_supply)
+        self.x += dx
+        self.y += dy
+        self.total_supply += shares
+
+        return shares, dx, dy
+
+    def remove_liquidity(self, shares: int):
+        """
+        burn LP tokens for the reserves in proportion, rounded down
+
+        return: amounts withdrawn
+        """
+        dx = shares * self.x // self.total_supply
+        dy = shares * self.y // self.total_supply
+        assert dx < self.x and dy < self.y, "Reserves: underflow"
+
+        self.x -= dx
+        self.y -= dy
+        self.total_supply -= shares
+
+        return dx, dy
+
+
 def generate_amms(cash, probabilities):
     """
     probability should be a integer between 1 and 10**6 - 1 (the unit is ppm)
@@ -76,6 +115,7 @@ def generate_amms(cash, probabilities):
 
     return amms
 
+
 def generate_amms_random(n, cash):
     """
     This function generates n AMMs with total cost (almost) equal to cash.
@@ -102,6 +142,7 @@ def generate_amms_random(n, cash):
 
     return amms
 
+
 def print_amms(amms):
     # Prepare headers and collect results for each pool
     headers = [
@@ -136,6 +177,7 @@ def print_amms(amms):
     )
     print(tabulate(table_data, headers=headers, tablefmt="pretty"))
 
+
 if __name__ == "__main__":
     # Test generate_amms
     cash = 1000 * 10**DECIMAL
@@ -145,6 +187,6 @@ if __name__ == "__main__":
     print_amms(amms)
 
     # Test generate_amms_random
-    amms = generate_amms_random(random.randint(2,16), cash)
+    amms = generate_amms_random(random.randint(2, 16), cash)
     print("Randomly Generated AMMs:")
     print_amms(amms)
@@ -0,0 +1,149 @@
+import numpy as np
+import tabulate
+
+from research_synstation import amm, paths
+
+
+def outcome_market_simulation(
+    bid,  # initial bid for proposing new market
+    fee_rates,  # fee in basis points
+    initial_probabilities,  # initial probability of each outcome
+    concentration,  # Dirichlet concentration, larger is less volatile
+    daily_transaction,  # number of transaction per day
+    min_size,  # minimum size of trade
+    max_size,  # maximum size of trade
+    block_time,  # seconds
+    period,  # days
+    chunk_size=1 << 12,  # blocks generated at once
+    seed=None,  # seed for probability path and noise traders
+):
+    """
+    external probabilities follow a Dirichlet martingale
+    arbitrageur comes every block and try to make profit
+    noise trader arrival is Poisson process, with uniform outcome and direction
+    """
+    n = len(initial_probabilities)
+
+    # initialize market
+    markets = [
+        amm.OutcomeMarket(bid, initial_probabilities, fee_bps) for fee_bps in fee_rates
+    ]
+    initial_values = [market.get_value(initial_probabilities) for market in markets]
+
+    # external probabilities and noise trader arrivals are streamed in chunks
+    num_blocks = int(period * paths.SECONDS_PER_DAY / block_time)
+    prob_seed, noise_seed, choice_seed = np.random.SeedSequence(seed).spawn(3)
+    prob_path = paths.DirichletProbabilityPath(
+        initial_probabilities, concentration, num_blocks, chunk_size, prob_seed
+    )
+    noise = paths.NoiseArrivals(
+        daily_transaction / paths.SECONDS_PER_DAY * block_time,
+        min_size,
+        max_size,
+        noise_seed,
+    )
+    rng = np.random.default_rng(choice_seed)
+
+    # simulate markets
+    for P_ext in prob_path:
+        arrivals, trade_size = noise.next_chunk(len(P_ext))
+        outcomes = rng.integers(0, n, len(trade_size))
+        is_buy = rng.random(len(trade_size)) < 0.5
+
+        noise_arrival = 0
+        for i in range(len(P_ext)):
+            # arbitrageur comes every block
+            for market in markets:
+                market.arbitrage(P_ext[i])
+
+            for _ in range(arrivals[i]):
+                for market in markets:
+                    market.noise_trade(
+                        trade_size[noise_arrival],
+                        outcomes[noise_arrival],
+                        is_buy[noise_arrival],
+                    )
+                noise_arrival += 1
+
+    final_values = [market.get_value(P_ext[-1]) for market in markets]
+    earned_noise_fees = [market.total_noise_fee(P_ext[-1]) for market in markets]
+    earned_arb_fees = [market.total_arb_fee(P_ext[-1]) for market in markets]
+    pnl = [
+        final_value - initial_value
+        for final_value, initial_value in zip(final_values, initial_values)
+    ]
+
+    return pnl, earned_noise_fees, earned_arb_fees
+
+
+def outcome_table(fee_rates, outcomes, runs, **params):
+    """
+    repeat outcome_market_simulation runs times for every number of outcomes,
+    starting from uniform probabilities, and return the headers and rows of
+    PnL and fees by number of outcomes and fee rate
+    """
+    headers = [
+        "Outcomes",
+        "Fee Rate (bps)",
+        "PnL Mean",
+        "PnL Std",
+        "Noise Fee Mean",
+        "Arb Fee Mean",
+    ]
+    data = []
+    for n in outcomes:
+        pnls_arr = []
+        earned_noise_fees_arr = []
+        earned_arb_fees_arr = []
+        for i in range(runs):
+            print(f"\rRunning simulation n = {n}, {i + 1}/{runs} ...", end="")
+            pnls, earned_fees, earned_fees_from_arb = outcome_market_simulation(
+                fee_rates=fee_rates,
+                initial_probabilities=np.full(n, 1 / n),
+                seed=i,
+                **params,
+            )
+            pnls_arr.append(pnls)
+            earned_noise_fees_arr.append(earned_fees)
+            earned_arb_fees_arr.append(earned_fees_from_arb)
+
+        for j, fee_rate in enumerate(fee_rates):
+            data.append(
+                [
+                    n,
+                    fee_rate,
+                    np.mean([pnl[j] for pnl in pnls_arr]),
+                    np.std([pnl[j] for pnl in pnls_arr]),
+                    np.mean([fee[j] for fee in earned_noise_fees_arr]),
+                    np.mean([fee[j] for fee in earned_arb_fees_arr]),
+                ]
+            )
+    print("\n")
+    return headers, data
+
+
+if __name__ == "__main__":
+    fee_rates = [1, 5, 10, 30, 100]
+
+    # set parameters
+    _bid = 10000
+    _concentration = 200_000
+    _daily_transaction = 200
+    _min_size = 1
+    _max_size = 100
+    _block_time = 60
+    _period = 7
+
+    headers, data = outcome_table(
+        fee_rates,
+        [5, 10, 30],
+        10,
+        bid=_bid,
+        concentration=_concentration,
+        daily_transaction=_daily_transaction,
+        min_size=_min_size,
+        max_size=_max_size,
+        block_time=_block_time,
+        period=_period,
+    )
+    print(tabulate.tabulate(data, headers=headers, tablefmt="pretty"))
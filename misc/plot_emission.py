@@ -1,5 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
 
 # Function to calculate Y(t)
@@ -10,11 +9,13 @@ def supply_over_time(M, H, time_range):
 
 
 # Function to plot the result
-def plot_supply(M, H, time_range):
+def plot_supply(M, H, time_range, path="plots/SYN_emission.png", show=True):
+    import matplotlib.pyplot as plt  # slow to import, only needed for plotting
+
     t, Y_t = supply_over_time(M, H, time_range)
 
     plt.figure(figsize=(8, 6))
-    plt.plot(t, Y_t, label=f"M = {M/10**6:.2f} million, H = {H} days")
+    plt.plot(t, Y_t, label=f"M = {M / 10**6:.2f} million, H = {H} days")
     plt.axhline(
         y=M, color="r", linestyle="--", label="Maximum Emission (M)"
     )  # maximum supply
@@ -38,10 +39,12 @@ def plot_supply(M, H, time_range):
     plt.legend()
 
     # save the plot
-    plt.savefig("plots/SYN_emission.png")
+    plt.savefig(path)
 
     # show the plot
-    plt.show()
+    if show:
+        plt.show()
+    plt.close()
 
 
 if __name__ == "__main__":
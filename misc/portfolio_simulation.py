@@ -0,0 +1,162 @@
+import numpy as np
+import tabulate
+
+from research_synstation import paths, portfolio
+
+
+def portfolio_simulation(
+    bids,  # initial bid of each market
+    fee_rates,  # fee of each market in basis points
+    underlyings,  # index of the underlying asset of each market
+    strikes,  # strike (center of the price range) of each market
+    sigma_levels,  # confidence level for price range of each market
+    expiries,  # days until expiry of each market
+    initial_prices,  # initial price of each underlying asset
+    volatilities,  # daily volatility of each underlying asset
+    correlation,  # correlation matrix of the underlying assets
+    daily_transaction,  # number of transaction per day per market
+    min_size,  # minimum size of trade
+    max_size,  # maximum size of trade
+    block_time,  # seconds
+    chunk_size=1 << 12,  # blocks generated at once
+    seed=None,
+):
+    """
+    every market is a BinaryMarket on one of a few correlated GBM underlyings
+    arbitrageur comes every block and try to make profit until the market expires
+    noise trader arrival is Poisson process for each market
+
+    returns pnl, noise fee and arb fee of each market
+    """
+    underlyings = np.asarray(underlyings)
+    strikes = np.asarray(strikes, dtype=float)
+    sigma_levels = np.asarray(sigma_levels, dtype=float)
+    expiries = np.asarray(expiries, dtype=float)
+    volatilities = np.asarray(volatilities, dtype=float)
+
+    # initialize markets
+    markets = portfolio.BinaryMarketPortfolio(bids, fee_rates)
+    initial_values = markets.get_value(np.full(len(markets), 0.5))
+    expiry_blocks = (expiries * 86400 / block_time).astype(int)
+
+    # underlying prices are shared by every market
+    price_seed, noise_seed = np.random.SeedSequence(seed).spawn(2)
+    price_path = paths.CorrelatedPricePath(
+        initial_prices,
+        volatilities,
+        correlation,
+        block_time,
+        expiries.max(),
+        chunk_size,
+        price_seed,
+    )
+    rng = np.random.default_rng(noise_seed)
+    arrival_rate = daily_transaction / 86400 * block_time
+
+    # simulate markets
+    settlement_P_ext = np.full(len(markets), 0.5)
+    block = 0
+    for P in price_path:
+        for i in range(len(P)):
+            active = block < expiry_blocks
+
+            # fundamental value of UP token of each market
+            P_ext = paths.to_outcome_price(
+                P[i, underlyings],
+                strikes,
+                volatilities[underlyings],
+                expiries,
+                sigma_levels,
+            )
+            settlement_P_ext = np.where(active, P_ext, settlement_P_ext)
+
+            # arbitrageur comes every block
+            markets.arbitrage(P_ext, active)
+
+            # noise trader arrival follows poisson process
+            arrivals = rng.poisson(arrival_rate, len(markets)) * active
+            while arrivals.any():
+                mask = arrivals > 0
+                trade_size = rng.uniform(min_size, max_size, len(markets))
+                choice = rng.integers(0, 4, len(markets))
+                markets.noise_trade(trade_size, choice, mask)
+                arrivals -= mask
+
+            block += 1
+
+    final_values = markets.get_value(settlement_P_ext)
+    pnl = final_values - initial_values
+
+    return pnl, markets.total_noise_fee(), markets.total_arb_fee()
+
+
+def portfolio_table(
+    num_markets,
+    fee_rates,  # fee rates drawn for the markets, in basis points
+    initial_prices,
+    volatilities,
+    correlation,
+    block_time,
+    expiries=(7, 31),  # range of the random days until expiry
+    seed=None,
+):
+    """
+    portfolio_simulation of num_markets markets on random underlyings, with
+    strikes near the initial prices, and the headers and rows of the
+    protocol-level results by fee rate
+    """
+    rng = np.random.RandomState(seed)
+
+    # markets on random underlying, strike near the initial price and random expiry
+    underlyings = rng.randint(0, len(initial_prices), num_markets)
+    strikes = np.array(initial_prices)[underlyings] * np.exp(
+        rng.normal(0, 0.02, num_markets)
+    )
+    market_fee_rates = rng.choice(fee_rates, num_markets)
+
+    pnl, noise_fee, arb_fee = portfolio_simulation(
+        bids=np.full(num_markets, 10_000),
+        fee_rates=market_fee_rates,
+        underlyings=underlyings,
+        strikes=strikes,
+        sigma_levels=rng.choice([2, 3], num_markets),
+        expiries=rng.randint(*expiries, num_markets),
+        initial_prices=initial_prices,
+        volatilities=volatilities,
+        correlation=correlation,
+        daily_transaction=200,
+        min_size=1,
+        max_size=100,
+        block_time=block_time,
+        seed=seed,
+    )
+
+    # aggregate protocol-level results by fee rate
+    headers = ["Fee Rate (bps)", "Markets", "Total PnL", "Noise Fee", "Arb Fee"]
+    data = []
+    for fee_rate in fee_rates:
+        mask = market_fee_rates == fee_rate
+        data.append(
+            [
+                fee_rate,
+                mask.sum(),
+                pnl[mask].sum(),
+                noise_fee[mask].sum(),
+                arb_fee[mask].sum(),
+            ]
+        )
+    data.append(["Total", num_markets, pnl.sum(), noise_fee.sum(), arb_fee.sum()])
+    return headers, data
+
+
+if __name__ == "__main__":
+    headers, data = portfolio_table(
+        num_markets=2000,
+        fee_rates=[1, 5, 10, 30, 100],
+        initial_prices=[4000, 100_000, 200],
+        volatilities=[0.03, 0.02, 0.05],
+        correlation=[[1.0, 0.8, 0.6], [0.8, 1.0, 0.5], [0.6, 0.5, 1.0]],
+        block_time=60,
+        seed=1337,
+    )
+    print(tabulate.tabulate(data, headers=headers, tablefmt="pretty"))
@@ -1,5 +1,4 @@
 import numpy as np
-import random
 from tabulate import tabulate
 
 
@@ -21,14 +20,17 @@ class PegStabilityModule:
         self.burnFeeRateHalfLife = _burnFeeRateHalfLife  # in seconds
         self.lastRedemptionTimestamp = 0
 
-    def deposit(self, _amount):
+    def deposit(self, _amount, _timestamp):
+        self.GM.updateInterestRate(_timestamp)
         self.reserve += _amount
         self.supply += _amount * (1 - self.mintFeeRate)
-        self.GM.mint(_amount * (1 - self.mintFeeRate))
+        self.GM.mint(_amount * (1 - self.mintFeeRate), _timestamp)
 
         return _amount * (1 - self.mintFeeRate)  # return the amount of GM minted
 
     def redeem(self, _amount, _timestamp):
+        self.GM.updateInterestRate(_timestamp)
+
         # update the variable burn fee rate and last redemption timestamp
         self.variableBurnFeeRate = self.variableBurnFeeRate / 2 ** int(
             (_timestamp - self.lastRedemptionTimestamp) / self.burnFeeRateHalfLife
@@ -49,7 +51,7 @@ class PegStabilityModule:
         # update the reserve and supply
         self.reserve -= _amount - feeApplied
         self.supply -= _amount
-        self.GM.burn(_amount)
+        self.GM.burn(_amount, _timestamp)
 
         return _amount - feeApplied  # return the amount of USDC the caller receives
 
@@ -65,9 +67,16 @@ class PegStabilityModule:
 
 
 class GoodMoney:
+    """
+    the interest rate only moves with the debt fraction PSM.supply / totalSupply,
+    which is constant between mint / burn / PSM events, so the rate is accrued
+    in closed form on those events only and can be read at any timestamp
+    """
+
     def __init__(self, _totalSupply, _initialInterestRate, _targetDebtFraction, _kappa):
         self.totalSupply = _totalSupply
         self.interestRate = _initialInterestRate
+        self.interestIndex = 0  # integral of the interest rate over seconds
         self.lastInterestRateUpdateTimestamp = 0
         self.PSM = None
         self.targetDebtFraction = _targetDebtFraction
@@ -76,23 +85,47 @@ class GoodMoney:
     def setPSM(self, _PSM):
         self.PSM = _PSM
 
-    def mint(self, amount):
+    def mint(self, amount, _timestamp):
+        self.updateInterestRate(_timestamp)
         self.totalSupply += amount
 
-    def burn(self, amount):
+    def burn(self, amount, _timestamp):
+        self.updateInterestRate(_timestamp)
         self.totalSupply -= amount
 
-    def updateInterestRate(self, _timestamp):
-        """
+    def _growthRate(self):
+        return self.kappa * (
+            self.targetDebtFraction - self.PSM.supply / self.totalSupply
+        )
+
+    def getInterestRate(self, _timestamp):
+        r"""
         IR_{t + \delta t} = IR_t * exp(
             self.kappa * (self.targetDebtFraction - self.PSM.supply / self.totalSupply) * \delta t
         )
+        without updating the state
         """
-        self.interestRate = self.interestRate * np.exp(
-            self.kappa
-            * (self.targetDebtFraction - self.PSM.supply / self.totalSupply)
-            * (_timestamp - self.lastInterestRateUpdateTimestamp)
+        return self.interestRate * np.exp(
+            self._growthRate() * (_timestamp - self.lastInterestRateUpdateTimestamp)
         )
+
+    def getInterestIndex(self, _timestamp):
+        r"""
+        integral of the interest rate from 0 to _timestamp, for accruing debt:
+        index_t + IR_t * (exp(a * \delta t) - 1) / a
+        """
+        a = self._growthRate()
+        dt = _timestamp - self.lastInterestRateUpdateTimestamp
+        growth = dt if a == 0 else np.expm1(a * dt) / a
+        return self.interestIndex + self.interestRate * growth
+
+    def updateInterestRate(self, _timestamp):
+        """
+        accrue the rate and the index up to _timestamp,
+        must be called before the debt fraction changes
+        """
+        self.interestIndex = self.getInterestIndex(_timestamp)
+        self.interestRate = self.getInterestRate(_timestamp)
         self.lastInterestRateUpdateTimestamp = _timestamp
 
 
@@ -112,26 +145,31 @@ class ConcentratedLiquidityMarketMaker:
 
     def _get_L(self):
         """
-        get invariant L through Newton's method
+        get invariant L, the positive root of
+        (1 - sqrt(P_l / P_u)) * L**2 - (x * sqrt(P_l) + y / sqrt(P_u)) * L - x * y = 0
         """
-        L_prev = 1 << 128 - 1
-        L_new = self.precision
-
-        for _ in range(128):
-            f = L_prev**2 - (self.x + L_prev / np.sqrt(self.P_u)) * (
-                self.y + L_prev * np.sqrt(self.P_l)
-            )
-            f_prime = (
-                2 * L_prev
-                - (self.x + L_prev / np.sqrt(self.P_u)) * np.sqrt(self.P_l)
-                - (self.y + L_prev * np.sqrt(self.P_l)) / np.sqrt(self.P_u)
-            )
-            L_new = L_prev - f / f_prime
-
-            if abs(L_new - L_prev) < self.precision:
-                break
+        a = 1 - np.sqrt(self.P_l / self.P_u)
+        b = self.x * np.sqrt(self.P_l) + self.y / np.sqrt(self.P_u)
+        c = self.x * self.y
 
-        return L_new
+        return (b + np.sqrt(b**2 + 4 * a * c)) / (2 * a)
+
+    def get_price(self):
+        """
+        price of base asset in quote asset
+        """
+        L = self._get_L()
+        return (self.y + L * np.sqrt(self.P_l)) / (self.x + L / np.sqrt(self.P_u))
+
+    def base_amount_to_price(self, _price):
+        """
+        amount of base asset bought (positive) or sold (negative)
+        to move the price to _price in [P_l, P_u]
+        """
+        L = self._get_L()
+        new_x = L / np.sqrt(_price) - L / np.sqrt(self.P_u)
+
+        return self.x - new_x
 
     def swap(self, _amount, _quote_to_base):
         """
@@ -203,36 +241,147 @@ class ConcentratedLiquidityMarketMaker:
 # then arbitrageurs' actions are simulated
 # they buy or sell GM on DEX pool and PSM to earn immediate profit
 
-# parameters
-# GM
-iteration = 1000
-blockTime = 60  # 1 minute
-interval = 60 * 24 * 7 * 4  # 4 weeks
-kappa = 0.001  # degree of interest rate update
-target_debt_fraction = 0.5  # we want the half of GM to be minted by PSM
-initial_supply = 500_000
-initial_interest_rate = 0.05
-# PSM
-mint_fee_rate = 0.01  # 1%
-const_burn_fee_rate = 0.005  # 0.5%
-variable_burn_fee_rate = 0.005  # 0.5%
-burn_fee_rate_half_life = 60 * 60 * 12  # 12 hours
-# USDC
-usdc_yield_rate = 0.05  # 5% TODO: ranomize this value
-
-# initialize GM and PSM
-GM = GoodMoney(
-    initial_supply * (1 - target_debt_fraction),
-    initial_interest_rate,
-    target_debt_fraction,
-    kappa,
-)
-PSM = PegStabilityModule(
-    GM,
-    mint_fee_rate,
-    const_burn_fee_rate,
-    variable_burn_fee_rate,
-    burn_fee_rate_half_life,
-)
-GM.setPSM(PSM)
-PSM.deposit(initial_supply * target_debt_fraction)
+SECONDS_PER_YEAR = 60 * 60 * 24 * 365
+
+DEFAULT_PARAMS = {
+    # GM
+    "kappa": 0.001,  # degree of interest rate update, per second of timestamp
+    "target_debt_fraction": 0.5,  # we want the half of GM to be minted by PSM
+    "initial_supply": 500_000,
+    "initial_interest_rate": 0.05,
+    # PSM
+    "mint_fee_rate": 0.01,  # 1%
+    "const_burn_fee_rate": 5000,  # 0.5% in ppm
+    "variable_burn_fee_rate": 5000,  # 0.5% in ppm
+    "burn_fee_rate_half_life": 60 * 60 * 12,  # 12 hours
+    # DEX: GM (base) / USDC (quote) in [0.98, 1]
+    "dex_liquidity": 100_000,  # of each asset
+    # leverage traders: GM minted per year per unit of supply per unit of rate gap
+    "leverage_sensitivity": 50,
+}
+
+
+def psm_simulation(params, usdc_yield, demand, block_time):
+    """
+    usdc_yield: USDC yield rate of each block
+    demand: GM bought (positive) or sold (negative) on the DEX by other traders
+
+    returns summary metrics of the run:
+    peg deviation of the DEX price, PSM reserve drawdown, interest rate volatility
+    """
+    params = dict(DEFAULT_PARAMS, **params)
+
+    # initialize GM and PSM
+    GM = GoodMoney(
+        params["initial_supply"] * (1 - params["target_debt_fraction"]),
+        params["initial_interest_rate"],
+        params["target_debt_fraction"],
+        params["kappa"],
+    )
+    PSM = PegStabilityModule(
+        GM,
+        params["mint_fee_rate"],
+        params["const_burn_fee_rate"],
+        params["variable_burn_fee_rate"],
+        params["burn_fee_rate_half_life"],
+    )
+    GM.setPSM(PSM)
+    PSM.deposit(params["initial_supply"] * params["target_debt_fraction"], 0)
+    DEX = ConcentratedLiquidityMarketMaker(
+        params["dex_liquidity"], params["dex_liquidity"], 1, 0.98
+    )
+
+    num_blocks = len(usdc_yield)
+    price = np.empty(num_blocks)
+    reserve = np.empty(num_blocks)
+    interest_rate = np.empty(num_blocks)
+
+    for i in range(num_blocks):
+        timestamp = (i + 1) * block_time
+        interestRate = GM.getInterestRate(timestamp)
+
+        # leverage traders borrow GM and sell it while it is cheaper than USDC yield,
+        # and buy it back to repay otherwise
+        flow = (
+            params["leverage_sensitivity"]
+            * (usdc_yield[i] - DEX.get_price() * interestRate)
+            * (GM.totalSupply - PSM.supply)
+            * block_time
+            / SECONDS_PER_YEAR
+        )
+        if flow > 0:
+            DEX.swap(flow, False)
+            GM.mint(flow, timestamp)
+        elif flow < 0:
+            amount = min(-flow, DEX.x - DEX.precision, GM.totalSupply - PSM.supply)
+            DEX.swap(amount, True)
+            GM.burn(amount, timestamp)
+
+        # other traders
+        if demand[i] > 0:
+            DEX.swap(demand[i], True)
+        elif demand[i] < 0:
+            DEX.swap(-demand[i], False)
+
+        # arbitrageur buys GM below the redemption price and redeems it at PSM
+        variable_burn_fee_rate = PSM.variableBurnFeeRate / 2 ** int(
+            (timestamp - PSM.lastRedemptionTimestamp) / PSM.burnFeeRateHalfLife
+        )
+        redemption_price = 1 - (PSM.constBurnFeeRate + variable_burn_fee_rate) / 10**6
+        amount = min(
+            DEX.base_amount_to_price(max(redemption_price, DEX.P_l)),
+            PSM.reserve,
+            PSM.supply,
+        )
+        for _ in range(8):
+            if amount <= 0:
+                break
+            average_price = DEX.quote(amount, True) / amount
+            if PSM.quoteRedemption(amount, timestamp, average_price) > 0:
+                DEX.swap(amount, True)
+                PSM.redeem(amount, timestamp)
+                break
+            amount /= 2
+
+        price[i] = DEX.get_price()
+        reserve[i] = PSM.reserve
+        interest_rate[i] = GM.getInterestRate(timestamp)
+
+    blocks_per_day = 60 * 60 * 24 / block_time
+    peak = np.maximum.accumulate(reserve)
+
+    return {
+        "peg_deviation_mean": np.mean(np.abs(1 - price)),
+        "peg_deviation_max": np.max(np.abs(1 - price)),
+        "reserve_drawdown": np.max((peak - reserve) / peak),
+        # daily volatility of log interest rate
+        "ir_volatility": np.std(np.diff(np.log(interest_rate)))
+        * np.sqrt(blocks_per_day),
+        "final_interest_rate": interest_rate[-1],
+        "final_debt_fraction": PSM.supply / GM.totalSupply,
+    }
+
+
+if __name__ == "__main__":
+    from psm_sweep import generate_scenarios, sweep
+
+    iteration = 1000  # scenarios
+    blockTime = 60 * 60  # 1 hour, the CIR yield is sampled exactly at any step
+    interval = 24 * 7 * 4  # 4 weeks
+
+    # USDC yield rate follows CIR around 5%, demand of 60 one minute blocks
+    scenarios = generate_scenarios(
+        iteration,
+        interval,
+        blockTime,
+        demand_volatility=200 * np.sqrt(60),
+        seed=1337,
+    )
+    results = [metrics for _, _, metrics in sweep([{}], scenarios, blockTime)]
+    print(
+        tabulate(
+            [(m, np.mean([r[m] for r in results])) for m in results[0]],
+            headers=["Metric", "Mean"],
+            tablefmt="pretty",
+        )
+    )
@@ -0,0 +1,151 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from multiprocessing import shared_memory
+
+import numpy as np
+from psm_ir_simulation import psm_simulation
+from tabulate import tabulate
+
+from research_synstation import paths
+
+# exogenous paths of the worker process, attached once by _attach
+_paths = None
+_shm = None
+
+
+def generate_scenarios(
+    num_scenarios,
+    num_blocks,
+    block_time,  # seconds
+    initial_yield=0.05,  # USDC yield rate
+    yield_mean=0.05,  # long-run mean of the yield rate
+    yield_speed=2.0,  # mean reversion speed, per year
+    yield_volatility=0.05,  # per sqrt(year)
+    demand_volatility=200,  # GM traded by other traders per block
+    seed=None,
+):
+    """
+    exogenous paths shared by every configuration, shape (2, scenarios, blocks):
+    USDC yield rate (CIR, sampled exactly, so blocks can be hours long)
+    and GM demand on the DEX
+    """
+    yield_seed, demand_seed = np.random.SeedSequence(seed).spawn(2)
+    usdc_yield = np.concatenate(
+        list(
+            paths.CIRPath(
+                initial_yield,
+                yield_mean,
+                yield_speed,
+                yield_volatility,
+                block_time,
+                num_blocks,
+                num_scenarios,
+                seed=yield_seed,
+            )
+        )
+    ).T
+
+    rng = np.random.default_rng(demand_seed)
+    demand = rng.normal(0, demand_volatility, (num_scenarios, num_blocks))
+    return np.stack([usdc_yield, demand])
+
+
+def _attach(name, shape, dtype):
+    global _paths, _shm
+    _shm = shared_memory.SharedMemory(name=name)
+    # the parent unlinks the segment; each worker only closes its own handle
+    atexit.register(_shm.close)
+    _paths = np.ndarray(shape, dtype=dtype, buffer=_shm.buf)
+
+
+def _run(index, params, scenario, block_time):
+    usdc_yield, demand = _paths[0, scenario], _paths[1, scenario]
+    return index, scenario, psm_simulation(params, usdc_yield, demand, block_time)
+
+
+def sweep(configs, scenarios, block_time, max_workers=None):
+    """
+    run every configuration on every scenario in a process pool
+
+    scenarios are copied once into shared memory and read in place by the workers;
+    yields (config index, scenario index, metrics) as the runs complete
+    """
+    shm = shared_memory.SharedMemory(create=True, size=scenarios.nbytes)
+    try:
+        shared = np.ndarray(scenarios.shape, dtype=scenarios.dtype, buffer=shm.buf)
+        shared[:] = scenarios
+
+        with ProcessPoolExecutor(
+            max_workers,
+            initializer=_attach,
+            initargs=(shm.name, scenarios.shape, scenarios.dtype),
+        ) as executor:
+            futures = [
+                executor.submit(_run, i, params, s, block_time)
+                for i, params in enumerate(configs)
+                for s in range(scenarios.shape[1])
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def sweep_table(
+    grid,  # parameter -> values, every combination is one configuration
+    num_scenarios,
+    num_blocks,
+    block_time,  # seconds
+    demand_volatility=200,  # GM per block
+    seed=None,
+    max_workers=None,
+):
+    """
+    sweep every configuration of grid over generated scenarios, and return the
+    headers and rows of the metrics of each configuration, mean over scenarios
+    """
+    configs = [dict(zip(grid, values)) for values in product(*grid.values())]
+    scenarios = generate_scenarios(
+        num_scenarios,
+        num_blocks,
+        block_time,
+        demand_volatility=demand_volatility,
+        seed=seed,
+    )
+
+    # metrics are aggregated over scenarios as the runs stream back
+    metrics = ["peg_deviation_mean", "reserve_drawdown", "ir_volatility"]
+    results = [{m: [] for m in metrics} for _ in configs]
+    runs = sweep(configs, scenarios, block_time, max_workers)
+    for done, (i, _, result) in enumerate(runs, 1):
+        for m in metrics:
+            results[i][m].append(result[m])
+        print(f"\rRunning simulation {done}/{len(configs) * num_scenarios} ...", end="")
+
+    headers = list(grid) + [f"{m} mean" for m in metrics]
+    data = [
+        list(config.values()) + [np.mean(result[m]) for m in metrics]
+        for config, result in zip(configs, results)
+    ]
+    print("\n")
+    return headers, data
+
+
+if __name__ == "__main__":
+    headers, data = sweep_table(
+        grid={
+            "kappa": [1e-5, 1e-4, 1e-3],
+            "target_debt_fraction": [0.3, 0.5],
+            "const_burn_fee_rate": [1000, 5000],
+            "burn_fee_rate_half_life": [60 * 60, 60 * 60 * 12],
+        },
+        num_scenarios=8,
+        num_blocks=24 * 7 * 4,  # 4 weeks of hourly blocks
+        block_time=60 * 60,
+        # demand of one minute blocks aggregated to hourly steps
+        demand_volatility=200 * np.sqrt(60),
+        seed=1337,
+    )
+    print(tabulate(data, headers=headers, tablefmt="pretty"))
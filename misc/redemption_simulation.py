@@ -0,0 +1,108 @@
+import time
+
+import numpy as np
+from psm_ir_simulation import (
+    ConcentratedLiquidityMarketMaker,
+    GoodMoney,
+    PegStabilityModule,
+)
+from tabulate import tabulate
+
+from research_synstation import redemption
+
+
+def depeg_simulation(
+    num_positions,
+    num_blocks,
+    block_time,  # seconds
+    depeg_start,  # block where GM holders start selling
+    depeg_blocks,  # duration of the selling
+    sell_volume,  # GM sold on the DEX per block during the depeg
+    fee_rate=0.005,  # redemption fee
+    collateral_price=4000,  # collateral in USD, constant
+    seed=None,
+):
+    """
+    GM is borrowed by positions with user-set rates; during the depeg,
+    arbitrageurs buy GM below 1 - fee_rate on the DEX and redeem it
+    against the lowest-rate positions every block, and a share of the borrowers
+    hit raise their rates above the average to move out of the way
+    """
+    rng = np.random.default_rng(seed)
+
+    GM = GoodMoney(1_000_000, 0.05, 0.5, 1e-6)
+    PSM = PegStabilityModule(GM, 0.01, 5000, 5000, 60 * 60 * 12)
+    GM.setPSM(PSM)
+    PSM.deposit(1_000_000, 0)
+    DEX = ConcentratedLiquidityMarketMaker(1_000_000, 1_000_000, 1, 0.98)
+
+    index = redemption.RedemptionIndex(num_positions, fee_rate=fee_rate, GM=GM)
+    debt = rng.lognormal(np.log(1000), 1, num_positions)
+    index.open(
+        np.arange(num_positions),
+        debt * rng.uniform(1.5, 3, num_positions) / collateral_price,
+        debt,
+        np.clip(rng.normal(0.06, 0.02, num_positions), 0.005, 0.2),
+        0,
+    )
+
+    redeemed = 0.0
+    positions_hit = 0
+    average_rate = np.empty(num_blocks)
+    for i in range(num_blocks):
+        timestamp = (i + 1) * block_time
+        if depeg_start <= i < depeg_start + depeg_blocks:
+            DEX.swap(sell_volume, False)
+
+        amount = DEX.base_amount_to_price(max(1 - fee_rate, DEX.P_l))
+        if amount > 0:
+            DEX.swap(amount, True)
+            amount, _, hit = index.redeem(amount, collateral_price, timestamp)
+            redeemed += amount
+            positions_hit += len(hit)
+
+            # half of the borrowers hit and still open move above the average rate
+            hit = hit[index.active[hit] & (rng.random(len(hit)) < 0.5)]
+            if len(hit):
+                index.set_rate(hit, index.average_rate(timestamp) + 0.01, timestamp)
+
+        average_rate[i] = index.average_rate(timestamp)
+
+    return {
+        "redeemed": redeemed,
+        "positions_hit": positions_hit,
+        "positions_left": len(index),
+        "initial_average_rate": average_rate[0],
+        "final_average_rate": average_rate[-1],
+        "final_price": DEX.get_price(),
+        "GM_supply": GM.totalSupply,
+    }
+
+
+def depeg_table(positions, **params):
+    """
+    depeg_simulation for every number of positions, and the headers and rows
+    of its metrics and the time taken
+    """
+    data = []
+    for num_positions in positions:
+        start = time.perf_counter()
+        metrics = depeg_simulation(num_positions=num_positions, **params)
+        elapsed = time.perf_counter() - start
+        data.append([num_positions] + list(metrics.values()) + [elapsed])
+
+    headers = ["Positions"] + list(metrics) + ["Time (s)"]
+    return headers, data
+
+
+if __name__ == "__main__":
+    headers, data = depeg_table(
+        [1_000, 100_000],
+        num_blocks=24 * 60 * 7,  # 1 week of one minute blocks
+        block_time=60,
+        depeg_start=24 * 60,
+        depeg_blocks=24 * 60,
+        sell_volume=500,
+        seed=1337,
+    )
+    print(tabulate(data, headers=headers, tablefmt="pretty"))
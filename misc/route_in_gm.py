@@ -1,7 +1,10 @@
 import math
-from tabulate import tabulate
 import random
 
+from tabulate import tabulate
+
+from research_synstation import pool_sum as pool_sum_
+
 
 def div_up(a, b):
     return (a + b - 1) // b
@@ -41,7 +44,7 @@ class AMM:
         Invariant Curve: (X + L) * Y = L**2
         """
         assert L > 0
-        assert 0 < p and p < 1
+        assert 0 < p < 1
         assert fee_bps >= 0
 
         self.x = max(1, math.isqrt(int(L**2 / p)) - L)
@@ -102,7 +105,19 @@ def quote_exact_output_single(amm, amount_out, is_buy):
         return dx
 
 
-def find_flashloan_limit(amms, i, cash):
+def make_pool_sum(amms):
+    """
+    pool_sum.PoolSum of the pools: float sums of the quotes over all other pools,
+    each integer quote rounds down by less than one unit from its float quote
+    """
+    return pool_sum_.PoolSum(
+        [amm.x for amm in amms],
+        [amm.get_L(amm.x, amm.y, True) for amm in amms],
+        [amm.y for amm in amms],
+    )
+
+
+def find_flashloan_limit(amms, i, cash, pool_sum=None):
     """
     find debt limit D which will be used for buying O_i with amount_in GM
 
@@ -110,12 +125,31 @@ def find_flashloan_limit(amms, i, cash):
     rhs = D
 
     find maximal D such that lhs >= rhs
+
+    with pool_sum (make_pool_sum(amms)), the limit is first bracketed with the
+    float sums, which are within one unit per pool of lhs, and the exact search
+    only runs inside the bracket
     """
     left = 0
     right = cash + sum(
         [amms[j].y for j in range(len(amms)) if j != i]
     )  # trivial upper bound
 
+    if pool_sum is not None:
+        margin = len(amms) + 1e-12 * right
+
+        def bracket(offset):
+            lo, hi = left, right
+            while lo + 1 < hi:
+                mid = (lo + hi) // 2
+                if cash + pool_sum.sell(mid, exclude=i) + offset >= mid:
+                    lo = mid
+                else:
+                    hi = mid
+            return lo
+
+        left, right = bracket(-margin), bracket(margin) + 1
+
     count = 0
     while left + 1 < right:
         count += 1
@@ -139,30 +173,38 @@ def find_flashloan_limit(amms, i, cash):
     return left
 
 
-def quote_buy_exact_input_multiple(amms, i, amount_in, amount_flashloan):
-    """ """
+def quote_buy_exact_input_multiple(amms, i, amount_in, amount_flashloan, pool_sum=None):
+    """
+    with pool_sum, the O_j sold are quoted by the float sums, within one unit per pool
+    """
     cash = amount_in
     amount_out = amount_flashloan
-    cash += sum(
-        [
-            quote_exact_input_single(amms[j], amount_flashloan, False)
-            for j in range(len(amms))
-            if j != i
-        ]
-    )  # cash after selling O_j for j != i
+    if pool_sum is None:
+        cash += sum(
+            [
+                quote_exact_input_single(amms[j], amount_flashloan, False)
+                for j in range(len(amms))
+                if j != i
+            ]
+        )  # cash after selling O_j for j != i
+    else:
+        cash += int(pool_sum.sell(amount_flashloan, exclude=i))
     cash -= amount_flashloan  # cash after repaying flashloan debt
     amount_out += quote_exact_input_single(amms[i], cash, True)  # amount of O_i bought
 
     return amount_out
 
 
-def find_optimal_flashloan(amms, i, amount_in):
+def find_optimal_flashloan(amms, i, amount_in, pool_sum=None):
     """
     find optimal amount of flashloan for buying O_i with amount_in GM
     we use ternary search
+
+    with pool_sum, the probes are quoted by the float sums
+    and only the optimal flashloan is quoted exactly
     """
     left = 0
-    right = find_flashloan_limit(amms, i, amount_in)
+    right = find_flashloan_limit(amms, i, amount_in, pool_sum)
 
     count = 0
     while left + 3 <= right:
@@ -170,8 +212,8 @@ def find_optimal_flashloan(amms, i, amount_in):
         mid1 = left + (right - left) // 3
         mid2 = right - (right - left) // 3
 
-        f1 = quote_buy_exact_input_multiple(amms, i, amount_in, mid1)
-        f2 = quote_buy_exact_input_multiple(amms, i, amount_in, mid2)
+        f1 = quote_buy_exact_input_multiple(amms, i, amount_in, mid1, pool_sum)
+        f2 = quote_buy_exact_input_multiple(amms, i, amount_in, mid2, pool_sum)
 
         if f1 >= f2:
             right = mid2
@@ -185,6 +227,56 @@ def find_optimal_flashloan(amms, i, amount_in):
     return mid, output
 
 
+def quote_exact_output_multiple(amms, i, amount_out, is_buy, pool_sum=None):
+    """
+    is_buy: least GM paid to receive exactly amount_out O_i,
+        minting b complete sets, selling O_j for j != i and buying the rest of O_i
+    else: least O_i sold to receive at least amount_out GM,
+        buying b O_j for j != i, burning b complete sets and selling O_i for the rest
+
+    b is solved on the float pools (pool_sum, default make_pool_sum(amms))
+    where the marginal rates of both paths are equal,
+    then its integer neighbors are quoted exactly
+
+    return: amount in, b
+    """
+    if pool_sum is None:
+        pool_sum = make_pool_sum(amms)
+    others = [j for j in range(len(amms)) if j != i]
+    amm = amms[i]
+
+    if is_buy:
+        # pool i can not give more than its x
+        lo, hi = max(0, amount_out - amm.x + 1), amount_out
+
+        def amount_in(b):
+            cash = b - sum(
+                [quote_exact_input_single(amms[j], b, False) for j in others]
+            )
+            return cash + quote_exact_output_single(amm, amount_out - b, True)
+
+    else:
+        # the other pools can not give more than their x
+        lo, hi = 0, min([amms[j].x for j in others]) - 1
+
+        def amount_in(b):
+            cash = b - sum(
+                [quote_exact_output_single(amms[j], b, True) for j in others]
+            )
+            if cash >= amount_out:
+                return b
+            if amm.y - (amount_out - cash) <= 0:
+                return math.inf
+            return b + quote_exact_output_single(amm, amount_out - cash, False)
+
+    _, b = pool_sum_.exact_output(pool_sum, i, amount_out, is_buy, 0)
+    candidates = range(max(lo, math.floor(b) - 1), min(hi, math.ceil(b) + 1) + 1)
+    amount, b = min((amount_in(b), b) for b in candidates)
+    assert amount < math.inf, "amount_out Out of range"
+
+    return amount, b
+
+
 def generate_amms(n):
     L_list = [10**6 * random.randint(1_000, 1_000_0) for _ in range(n)]
     p_list = [0, 10**6]
@@ -227,7 +319,7 @@ def test_quote_exact_input_buy_multiple():
         # Swap result using pool's function
         swap_pool = quote_exact_input_single(amm, cash, True) / 10**6
         # Swap result using an optimal flashloan
-        flashloan_param, flashloan_swap = find_optimal_flashloan(amms, i, cash)
+        _, flashloan_swap = find_optimal_flashloan(amms, i, cash)
 
         # Append the row: note that cash is in GM (scaled by 10**6)
         table_data.append(
@@ -295,7 +387,7 @@ def test_swap_exact_input_buy_multiple():
     amms = generate_amms(n)
     # cash is in "GM" units scaled by 10**6 (as per original code)
     cash_log = random.randint(0, 2)
-    cash = 10**6 * random.randint(10**cash_log, 10**(cash_log + 1))
+    cash = 10**6 * random.randint(10**cash_log, 10 ** (cash_log + 1))
     cash_before_flashloan_and_sell = cash
 
     # Print the status before the trade
@@ -324,12 +416,58 @@ def test_swap_exact_input_buy_multiple():
 
     # Print the status after the trade
     print_amms(amms, False)
-    print(f"\ncash before flashloan: {cash_before_flashloan_and_sell/10**6}")
-    print(f"cash after flashloan: {cash/10**6}")
-    print(f"quote: {quote/10**6}")
-    print(f"bought: {bought/10**6}")
+    print(f"\ncash before flashloan: {cash_before_flashloan_and_sell / 10**6}")
+    print(f"cash after flashloan: {cash / 10**6}")
+    print(f"quote: {quote / 10**6}")
+    print(f"bought: {bought / 10**6}")
+
+
+def test_quote_exact_output_multiple():
+    n = 9
+    amms = generate_amms(n)
+    pool_sum = make_pool_sum(amms)
+    # amounts are in units scaled by 10**6
+    amount_o = 10**6 * random.randint(10**2, 10**4)  # O_i to receive
+    amount_gm = 10**6 * random.randint(10, 10**3)  # GM to receive
+
+    headers = [
+        "Pool",
+        "Price",
+        "GM in (Pool)",
+        "GM in (Routed)",
+        "O_i in (Pool)",
+        "O_i in (Routed)",
+    ]
+    table_data = []
+
+    for i, amm in enumerate(amms):
+        L_val = amm.get_L(amm.x, amm.y, True)
+        price = amm.y / (amm.x + L_val)
+
+        gm_pool = (
+            quote_exact_output_single(amm, amount_o, True) / 10**6
+            if amount_o < amm.x
+            else "NaN"
+        )
+        gm_routed, _ = quote_exact_output_multiple(amms, i, amount_o, True, pool_sum)
+        if amount_gm < amm.y:
+            o_pool = quote_exact_output_single(amm, amount_gm, False) / 10**6
+            o_routed, _ = quote_exact_output_multiple(
+                amms, i, amount_gm, False, pool_sum
+            )
+            o_routed /= 10**6
+        else:
+            o_pool, o_routed = "NaN", "NaN"
+
+        table_data.append(
+            [i, round(price, 6), gm_pool, gm_routed / 10**6, o_pool, o_routed]
+        )
+
+    print(f"\nExact Output: {amount_o / 10**6} O_i or {amount_gm / 10**6} GM")
+    print(tabulate(table_data, headers=headers, tablefmt="pretty"))
 
 
 if __name__ == "__main__":
     # test_quote_exact_input_buy_multiple()
     test_swap_exact_input_buy_multiple()
+    test_quote_exact_output_multiple()
@@ -1,6 +1,11 @@
+import time
+
 import numpy as np
 from tabulate import tabulate
 
+from research_synstation import arbitrage
+from research_synstation import pool_sum as pool_sum_
+
 
 class AMM:
     def __init__(self, X, p, fee_bps):
@@ -63,13 +68,43 @@ class AMM:
         return dy  # dy should be always positive
 
 
-def buy_quote(amms, i, dx, dx_i):
+def make_pool_sum(amms):
+    """
+    pool_sum.PoolSum of the pools, for quotes summed over all other pools
+    """
+    return pool_sum_.PoolSum(
+        [amm.X for amm in amms],
+        [amm.L for amm in amms],
+        [amm.Y for amm in amms],
+        amms[0].fee_bps,
+    )
+
+
+def update_pool_sum(amms, pool_sum, ids=None):
+    """
+    update pool_sum after a trade on the pools ids, default all
+    """
+    if pool_sum is None:
+        return
+    if ids is None:
+        ids = range(len(amms))
+    ids = list(ids)
+    pool_sum.update(
+        ids,
+        [amms[j].X for j in ids],
+        [amms[j].L for j in ids],
+        [amms[j].Y for j in ids],
+    )
+
+
+def buy_quote(amms, i, dx, dx_i, pool_sum=None):
     """
     return the amount of GM required to buy dx amount of O_i
 
     i: index of outcome token to be bought
     dx: amount of total outcome token to be bought
     dx_i: amount of O_i to be bought at O_i <-> GM pool
+    pool_sum: make_pool_sum(amms), sums over the other pools without visiting them
     """
     n = len(amms)
 
@@ -78,20 +113,26 @@ def buy_quote(amms, i, dx, dx_i):
 
     # GM -> O_j for j in range(n)
     # O_j -> GM for j != i
-    quote_j = np.sum([amms[j].get_quote(dx - dx_i, False) for j in range(n) if j != i])
+    if pool_sum is None:
+        quote_j = np.sum(
+            [amms[j].get_quote(dx - dx_i, False) for j in range(n) if j != i]
+        )
+    else:
+        quote_j = pool_sum.sell(dx - dx_i, exclude=i)
 
     dy = quote_i + dx - dx_i - quote_j
 
     return dy
 
 
-def buy_multiple(amms, i, dx, dx_i):
+def buy_multiple(amms, i, dx, dx_i, pool_sum=None):
     """
     buy dx amount of O_i and return the GM spent
 
     i: index of outcome token to be bought
     dx: amount of total outcome token to be bought
     dx_i: amount of O_i to be bought at O_i <-> GM pool
+    pool_sum: updated with the pools traded
     """
     n = len(amms)
 
@@ -101,19 +142,21 @@ def buy_multiple(amms, i, dx, dx_i):
     # GM -> O_j for j in range(n)
     # O_j -> GM for j != i
     dy_j = np.sum([amms[j].sell_X(dx - dx_i) for j in range(n) if j != i])
+    update_pool_sum(amms, pool_sum)
 
     dy = dy_i + dx - dx_i - dy_j
 
     return dy
 
 
-def sell_quote(amms, i, dx, dx_i):
+def sell_quote(amms, i, dx, dx_i, pool_sum=None):
     """
     return the amount of GM received by selling dx amount of O_i
 
     i: index of outcome token to be sold
     dx: amount of total outcome token to be sold
     dx_i: amount of O_i to be sold at O_i <-> GM pool
+    pool_sum: make_pool_sum(amms); dx - dx_i below X of the other pools
     """
     n = len(amms)
 
@@ -122,20 +165,26 @@ def sell_quote(amms, i, dx, dx_i):
 
     # GM -> O_j for j != i
     # O_j -> GM for j in range(n)
-    quote_j = np.sum([amms[j].get_quote(dx - dx_i, True) for j in range(n) if j != i])
+    if pool_sum is None:
+        quote_j = np.sum(
+            [amms[j].get_quote(dx - dx_i, True) for j in range(n) if j != i]
+        )
+    else:
+        quote_j = pool_sum.buy(dx - dx_i, exclude=i)
 
     dy = quote_i + dx - dx_i - quote_j
 
     return dy
 
 
-def sell_multiple(amms, i, dx, dx_i):
+def sell_multiple(amms, i, dx, dx_i, pool_sum=None):
     """
     return the amount of GM received by selling dx amount of O_i
 
     i: index of outcome token to be sold
     dx: amount of total outcome token to be sold
     dx_i: amount of O_i to be sold at O_i <-> GM pool
+    pool_sum: updated with the pools traded
     """
     n = len(amms)
 
@@ -145,16 +194,19 @@ def sell_multiple(amms, i, dx, dx_i):
     # GM -> O_j for j != i
     # O_j -> GM for j in range(n)
     dy_j = np.sum([amms[j].buy_X(dx - dx_i) for j in range(n) if j != i])
+    update_pool_sum(amms, pool_sum)
 
     dy = dy_i + dx - dx_i - dy_j
 
     return dy
 
 
-def find_optimal_split(amms, i, dx, is_buy):
+def find_optimal_split(amms, i, dx, is_buy, pool_sum=None):
     """
     Find the optimal split of weights for a given trade via ternary search
 
+    pool_sum: make_pool_sum(amms), so that a probe does not visit every pool
+
     return the optimal amount of O_i to be traded at O_i <-> GM pool
     """
     precision = 1e-6
@@ -163,10 +215,11 @@ def find_optimal_split(amms, i, dx, is_buy):
         left = precision
         right = min(dx, amms[i].X * (1 - precision))
     else:
-        left = max(
-            precision,
-            dx - min([amms[j].X for j in range(len(amms)) if j != i]) + precision,
-        )
+        if pool_sum is None:
+            min_X = min([amms[j].X for j in range(len(amms)) if j != i])
+        else:
+            min_X = pool_sum.min_X(exclude=i)
+        left = max(precision, dx - min_X + precision)
         right = dx
 
     if is_buy:
@@ -174,8 +227,8 @@ def find_optimal_split(amms, i, dx, is_buy):
             mid1 = left + (right - left) / 3
             mid2 = right - (right - left) / 3
 
-            f1 = buy_quote(amms, i, dx, mid1)
-            f2 = buy_quote(amms, i, dx, mid2)
+            f1 = buy_quote(amms, i, dx, mid1, pool_sum)
+            f2 = buy_quote(amms, i, dx, mid2, pool_sum)
 
             if f1 > f2:
                 left = mid1
@@ -186,8 +239,8 @@ def find_optimal_split(amms, i, dx, is_buy):
             mid1 = left + (right - left) / 3
             mid2 = right - (right - left) / 3
 
-            f1 = sell_quote(amms, i, dx, mid1)
-            f2 = sell_quote(amms, i, dx, mid2)
+            f1 = sell_quote(amms, i, dx, mid1, pool_sum)
+            f2 = sell_quote(amms, i, dx, mid2, pool_sum)
 
             if f1 < f2:
                 left = mid1
@@ -197,6 +250,28 @@ def find_optimal_split(amms, i, dx, is_buy):
     return (left + right) / 2
 
 
+def quote_exact_output_multiple(amms, i, amount_out, is_buy, pool_sum=None):
+    """
+    route an exact output through the O_i <-> GM pool and complete sets
+
+    is_buy: GM required to receive exactly amount_out O_i
+    else: O_i to be sold to receive exactly amount_out GM
+
+    solved directly for the amount through complete sets, where the marginal
+    rates of both paths are equal (pool_sum.exact_output)
+
+    return the amount in and the amount of O_i traded at O_i <-> GM pool,
+    to be executed with buy_multiple / sell_multiple
+    """
+    if pool_sum is None:
+        pool_sum = make_pool_sum(amms)
+    amount_in, b = pool_sum_.exact_output(
+        pool_sum, i, amount_out, is_buy, amms[i].precision
+    )
+    dx = amount_out if is_buy else amount_in
+    return amount_in, dx - b
+
+
 def generate_input(n=0, fee_bps=0, total_dx=0):
     """
     Generate random input for testing: AMMs and trade size
@@ -316,6 +391,96 @@ def test_sell():
     )
 
 
+def test_complete_set_arbitrage():
+    print("-" * 100)
+    print("Test Complete-Set Arbitrage\n")
+
+    # markets whose prices do not sum to 1
+    data = []
+    for p_sum in [0.9, 0.95, 1.0, 1.05, 1.1]:
+        amms, _, _ = generate_input(8, 0, 0)
+        for amm in amms:
+            amm.X = amm.L / np.sqrt(amm.get_prob() * p_sum) - amm.L
+            amm.Y = amm.L**2 / (amm.X + amm.L)
+        X = np.array([amm.X for amm in amms])
+        L = np.array([amm.L for amm in amms])
+
+        q, profit = arbitrage.solve_complete_set_arbitrage(X, L, amms[0].fee_bps)
+        prob_before = sum([amm.get_prob() for amm in amms])
+
+        # execute on the pools
+        if q > 0:
+            realized = sum([amm.sell_X(q) for amm in amms]) - q
+        else:
+            realized = -q - sum([amm.buy_X(-q) for amm in amms])
+
+        data.append(
+            [
+                amms[0].fee_bps,
+                prob_before,
+                q,
+                profit,
+                realized,
+                sum([amm.get_prob() for amm in amms]),
+            ]
+        )
+
+    print(
+        tabulate(
+            data,
+            headers=[
+                "Fee (bps)",
+                "P Total (before)",
+                "q (mint > 0, burn < 0)",
+                "Profit",
+                "Realized",
+                "P Total (after)",
+            ],
+            floatfmt=".4f",
+        )
+        + "\n"
+    )
+
+
+def test_pool_sum():
+    print("-" * 100)
+    print("Test Routing with Sums over All Other Pools\n")
+
+    data = []
+    for n in [10, 100, 1000]:
+        amms, i, total_dx = generate_input(n, 30, 0)
+        pool_sum = make_pool_sum(amms)
+        for is_buy in [True, False]:
+            start = time.perf_counter()
+            split = find_optimal_split(amms, i, total_dx, is_buy)
+            elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            split_sum = find_optimal_split(amms, i, total_dx, is_buy, pool_sum)
+            elapsed_sum = time.perf_counter() - start
+
+            data.append(
+                [
+                    n,
+                    "Buy" if is_buy else "Sell",
+                    abs(split_sum - split) / split,
+                    elapsed * 1e3,
+                    elapsed_sum * 1e3,
+                ]
+            )
+
+    print(
+        tabulate(
+            data,
+            headers=["n", "Side", "Split Rel. Diff", "Pools (ms)", "Pool Sum (ms)"],
+            floatfmt=".3g",
+        )
+        + "\n"
+    )
+
+
 if __name__ == "__main__":
     test_buy()
     test_sell()
+    test_complete_set_arbitrage()
+    test_pool_sum()
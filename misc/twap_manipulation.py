@@ -0,0 +1,64 @@
+import numpy as np
+from tabulate import tabulate
+
+from research_synstation import amm
+
+
+def manipulation_cost(
+    bid,  # initial bid of the market
+    p,  # fair probabilities
+    fee_bps,
+    target,  # outcome whose price is pushed up
+    push,  # O_target bought by the attacker every block
+    blocks,  # blocks of the attack
+    block_time,  # seconds
+):
+    """
+    the attacker buys push O_target at the start of every block and arbitrageurs
+    bring the pools back to the fair probabilities by the end of it;
+    returns the deviation of the TWAP over the attack and its cost,
+    GM spent minus the fair value of the O_target bought
+    """
+    market = amm.OutcomeMarket(bid, p, fee_bps)
+    twap_oracle = market.attach_oracle()
+
+    cost = 0.0
+    for block in range(blocks):
+        market.observe(block * block_time)
+        cost += market.buy(target, push, noise=False) - push * p[target]
+
+        # arbitrageurs trade one second before the next block
+        market.observe((block + 1) * block_time - 1)
+        market.arbitrage(np.asarray(p))
+
+    window = blocks * block_time
+    twap = twap_oracle.twap([target], window, window)[0]
+    return twap / p[target] - 1, cost
+
+
+def manipulation_table(fees, pushes, **params):
+    """
+    manipulation_cost for every fee and amount pushed per block, and the
+    headers and rows of the TWAP deviation and its cost
+    """
+    data = []
+    for fee_bps in fees:
+        for push in pushes:
+            deviation, cost = manipulation_cost(fee_bps=fee_bps, push=push, **params)
+            data.append([fee_bps, push, deviation * 100, cost])
+
+    headers = ["Fee (bps)", "O_2 bought per block", "TWAP deviation (%)", "Cost (GM)"]
+    return headers, data
+
+
+if __name__ == "__main__":
+    headers, data = manipulation_table(
+        [10, 30, 100],
+        [100, 1_000, 10_000],
+        bid=100_000,
+        p=[0.5, 0.3, 0.2],
+        target=2,
+        blocks=300,  # 10 minutes
+        block_time=2,
+    )
+    print(tabulate(data, headers=headers, tablefmt="pretty"))
@@ -1,5 +1,7 @@
 import numpy as np
 
+from research_synstation import arbitrage, oracle
+
 
 class AMM:
     def __init__(self, X, p, fee_bps):
@@ -137,3 +139,237 @@ class BinaryMarket:
 
     def total_arb_fee(self):
         return self.YesMarket.arb_fee + self.NoMarket.arb_fee
+
+
+class OutcomeMarket:
+    """
+    Prediction market with n outcomes, one O_i <-> GM pool per outcome
+
+    pool state is stored in arrays of length n, every pool is a route_in_outcome.AMM:
+    fee is charged on X when selling X and on top of Y when buying X.
+    trades of O_i are routed through the optimal split between the O_i pool
+    and minting / burning complete sets against the other pools
+    """
+
+    precision = 1e-6
+
+    def __init__(self, bid, p, fee_bps):
+        """
+        (X + L) * Y = L**2
+        bid pays for X complete sets and the Y of every pool
+        """
+        p = np.asarray(p, dtype=float)
+        X = bid / (1 + np.sum(p / (1 - np.sqrt(p))))
+
+        self.X = np.full(len(p), X)
+        self.L = self.X * np.sqrt(p) / (1 - np.sqrt(p))
+        self.Y = self.L * np.sqrt(p)
+        self.fee_bps = fee_bps
+        self.noise_fee_X = np.zeros(len(p))
+        self.noise_fee_Y = np.zeros(len(p))
+        self.arb_fee_X = np.zeros(len(p))
+        self.arb_fee_Y = np.zeros(len(p))
+        self.oracle = None
+        self.timestamp = 0
+
+    def __len__(self):
+        return len(self.X)
+
+    def attach_oracle(self, cardinality=1024):
+        """
+        record the pool prices in an oracle.TWAPOracle from self.timestamp on
+        """
+        self.oracle = oracle.TWAPOracle(
+            len(self), self.get_prob(), cardinality, self.timestamp
+        )
+        return self.oracle
+
+    def observe(self, t):
+        """
+        move the clock of the market to t, trades are recorded at that time
+        """
+        self.timestamp = t
+        self._record()
+
+    def _record(self):
+        if self.oracle is not None:
+            self.oracle.update(np.arange(len(self)), self.get_prob(), self.timestamp)
+
+    def get_prob(self):
+        return self.Y / (self.X + self.L)
+
+    def get_value(self, P_ext):
+        return np.sum(self.Y + self.X * P_ext)
+
+    def _quote(self, dx, is_buy):
+        """
+        GM paid (buy) or received (sell) for dx of every outcome token, shape (..., n)
+        """
+        if is_buy:
+            dx = np.clip(dx, 0, self.X - self.precision)
+            new_Y = self.L**2 / (self.X - dx + self.L)
+            return (new_Y - self.Y) * 10**4 / (10**4 - self.fee_bps)
+        else:
+            new_X = self.X + dx * (1 - self.fee_bps / 10**4)
+            return self.Y - self.L**2 / (new_X + self.L)
+
+    def _split_amounts(self, i, dx, dx_i):
+        """
+        O_j amount of every pool, shape (k, n): dx_i on pool i, dx - dx_i elsewhere
+        """
+        dx = np.atleast_1d(np.asarray(dx, dtype=float))
+        dx_i = np.broadcast_to(np.asarray(dx_i, dtype=float), dx.shape)
+        amounts = np.repeat((dx - dx_i)[:, None], len(self), axis=1)
+        amounts[:, i] = dx_i
+        return dx, dx_i, amounts
+
+    def quote(self, i, dx, dx_i, is_buy):
+        """
+        vectorized route_in_outcome.buy_quote / sell_quote over the trades dx
+        """
+        dx, dx_i, amounts = self._split_amounts(i, dx, dx_i)
+        direct = self._quote(amounts, is_buy)[:, i]
+        others = self._quote(amounts, not is_buy)
+        others[:, i] = 0
+
+        return direct + dx - dx_i - others.sum(axis=1)
+
+    def find_optimal_split(self, i, dx, is_buy):
+        """
+        vectorized route_in_outcome.find_optimal_split over the trades dx
+
+        return the amount of O_i to be traded at the O_i pool of every trade
+        """
+        dx = np.atleast_1d(np.asarray(dx, dtype=float))
+
+        if is_buy:
+            left = np.full(dx.shape, self.precision)
+            right = np.minimum(dx, self.X[i] * (1 - self.precision))
+        else:
+            min_X = np.min(np.delete(self.X, i))
+            left = np.maximum(self.precision, dx - min_X + self.precision)
+            right = dx.copy()
+
+        # the buy cost is convex and the sell proceeds are concave in dx_i
+        sign = 1 if is_buy else -1
+        while np.any(right > left * (1 + self.precision)):
+            mid1 = left + (right - left) / 3
+            mid2 = right - (right - left) / 3
+
+            f1 = sign * self.quote(i, dx, mid1, is_buy)
+            f2 = sign * self.quote(i, dx, mid2, is_buy)
+
+            left = np.where(f1 > f2, mid1, left)
+            right = np.where(f1 > f2, right, mid2)
+
+        return (left + right) / 2
+
+    def _trade(self, i, dx, is_buy, noise):
+        """
+        trade dx amount of O_i through the optimal split and return the GM amount
+        """
+        dx_i = self.find_optimal_split(i, dx, is_buy)[0]
+        _, _, amounts = self._split_amounts(i, dx, dx_i)
+        amounts = amounts[0]
+
+        # O_i pool trades in the direction of the trade, other pools in the opposite
+        buy = np.zeros(len(self), dtype=bool)
+        buy[i] = True
+        if not is_buy:
+            buy = ~buy
+
+        buy_amounts = np.where(buy, np.clip(amounts, 0, self.X - self.precision), 0)
+        sell_amounts = np.where(buy, 0, amounts)
+        dy = np.where(
+            buy,
+            self._quote(buy_amounts, True),
+            self._quote(sell_amounts, False),
+        )
+
+        fee_X = sell_amounts * self.fee_bps / 10**4
+        new_X = self.X - buy_amounts + sell_amounts - fee_X
+        new_Y = self.L**2 / (new_X + self.L)
+        fee_Y = np.where(buy, dy - (new_Y - self.Y), 0)
+
+        if noise:
+            self.noise_fee_X += fee_X
+            self.noise_fee_Y += fee_Y
+        else:
+            self.arb_fee_X += fee_X
+            self.arb_fee_Y += fee_Y
+        self.X = new_X
+        self.Y = new_Y
+        self._record()
+
+        others = np.sum(np.delete(dy, i))
+        return dy[i] + dx - dx_i - others
+
+    def buy(self, i, dx, noise=True):
+        """
+        buy dx amount of O_i and return the GM spent
+        """
+        return self._trade(i, dx, True, noise)
+
+    def sell(self, i, dx, noise=True):
+        """
+        sell dx amount of O_i and return the GM received
+        """
+        return self._trade(i, dx, False, noise)
+
+    def noise_trade(self, dy, i, is_buy):
+        """
+        Noise trader buys or sells about dy worth of GM of O_i
+        """
+        dx = dy / self.get_prob()[i]
+        if is_buy:
+            self.buy(i, dx)
+        else:
+            self.sell(i, dx)
+
+    def arbitrage(self, P_ext):
+        """
+        Arbitrageur moves every pool to the edge of the no-arbitrage band around P_ext,
+        then mints & sells or buys & burns complete sets while it is profitable
+        """
+        c = 1 - self.fee_bps / 10**4
+        P = self.get_prob()
+
+        # marginal cost of buying X is P / c, marginal revenue of selling X is P * c
+        buy = P_ext * c > P
+        sell = P_ext < P * c
+        new_P = np.where(buy, P_ext * c, P_ext / c)
+        new_X = np.maximum(self.L / np.sqrt(new_P) - self.L, self.precision)
+        new_X = np.where(buy | sell, new_X, self.X)
+        new_Y = self.L**2 / (new_X + self.L)
+
+        # selling X charges the fee on the input, buying X on top of the output
+        self.arb_fee_X += np.where(sell, (new_X - self.X) / c - (new_X - self.X), 0)
+        self.arb_fee_Y += np.where(buy, (new_Y - self.Y) / c - (new_Y - self.Y), 0)
+        self.X = new_X
+        self.Y = new_Y
+        self._record()
+
+        self.complete_set_arbitrage()
+
+    def complete_set_arbitrage(self):
+        """
+        mint & sell or buy & burn complete sets on all pools at once
+        return the profit of the arbitrageur
+        """
+        q, profit = arbitrage.solve_complete_set_arbitrage(self.X, self.L, self.fee_bps)
+        if q == 0:
+            return 0.0
+
+        self.X, self.Y, fee_X, fee_Y = arbitrage.apply_complete_set_arbitrage(
+            self.X, self.L, self.fee_bps, q
+        )
+        self.arb_fee_X += fee_X
+        self.arb_fee_Y += fee_Y
+        self._record()
+        return float(profit)
+
+    def total_noise_fee(self, P_ext):
+        return np.sum(self.noise_fee_Y + self.noise_fee_X * P_ext)
+
+    def total_arb_fee(self, P_ext):
+        return np.sum(self.arb_fee_Y + self.arb_fee_X * P_ext)
@@ -0,0 +1,140 @@
+"""
+Complete-set arbitrage on n-outcome markets of (X + L) * Y = L**2 pools
+(the float pools of misc/route_in_outcome.py)
+
+Arrays have shape (..., n): the last axis runs over the outcomes of a market,
+the leading axes over markets. Padded outcomes of smaller markets are excluded with mask.
+
+mint & sell q: mint q complete sets for q GM and sell q O_j on every pool
+    marginal profit: sum_j (1 - f) * L_j**2 / (X_j + L_j + (1 - f) * q)**2 - 1
+buy & burn q: buy q O_j on every pool and burn q complete sets for q GM
+    marginal profit: 1 - sum_j L_j**2 / ((1 - f) * (X_j + L_j - q)**2)
+
+both are monotone in q, so the optimal q is the root of the marginal profit,
+solved with Newton's method safeguarded by bisection on all markets at once
+"""
+
+import numpy as np
+
+PRECISION = 1e-6  # same as route_in_outcome.AMM
+
+
+def _solve_increasing(g, lo, hi, tolerance, max_iterations):
+    """
+    root of g on [lo, hi] for g increasing, g(lo) < 0
+    g returns (value, derivative); elements with g(hi) <= 0 return hi
+    """
+    q = lo.copy()
+    for _ in range(max_iterations):
+        value, derivative = g(q)
+        lo = np.where(value < 0, q, lo)
+        hi = np.where(value > 0, q, hi)
+
+        step = q - value / np.where(derivative > 0, derivative, np.inf)
+        inside = (step > lo) & (step < hi)
+        new_q = np.where(inside, step, (lo + hi) / 2)
+
+        if np.all(np.abs(new_q - q) <= tolerance * np.maximum(1, np.abs(q))):
+            return new_q
+        q = new_q
+    return q
+
+
+def solve_complete_set_arbitrage(
+    X, L, fee_bps, mask=None, tolerance=1e-12, max_iterations=64
+):
+    """
+    return q and the profit of the optimal complete-set arbitrage of each market
+
+    q > 0: mint & sell q complete sets
+    q < 0: buy & burn -q complete sets
+    q = 0: no profitable arbitrage
+    """
+    X = np.asarray(X, dtype=float)
+    L = np.asarray(L, dtype=float)
+    c = 1 - np.broadcast_to(np.asarray(fee_bps, dtype=float), X.shape) / 10**4
+    if mask is None:
+        mask = np.ones(X.shape, dtype=bool)
+    B = np.where(mask, X + L, 1.0)
+    L2 = np.where(mask, L**2, 0.0)
+
+    # price of each pool is L**2 / (X + L)**2
+    zeros = np.zeros(X.shape[:-1])
+    mint = np.sum(c * L2 / B**2, axis=-1) > 1
+    burn = np.sum(L2 / (c * B**2), axis=-1) < 1
+
+    # mint & sell: negated marginal profit is increasing in q
+    def g_mint(q):
+        d = B + c * q[..., None]
+        return (
+            1 - np.sum(c * L2 / d**2, axis=-1),
+            np.sum(2 * c**2 * L2 / d**3, axis=-1),
+        )
+
+    # marginal profit < sum_j L_j**2 / ((1 - f) * q**2) - 1 < 0 above this bound
+    hi = np.where(mint, np.sqrt(np.sum(L2 / c, axis=-1)), 0)
+    q_mint = _solve_increasing(g_mint, zeros, hi, tolerance, max_iterations)
+
+    # buy & burn: can not buy more than the smallest pool holds
+    def g_burn(q):
+        d = B - q[..., None]
+        return (
+            np.sum(L2 / (c * d**2), axis=-1) - 1,
+            np.sum(2 * L2 / (c * d**3), axis=-1),
+        )
+
+    hi = np.where(burn, np.min(np.where(mask, X, np.inf), axis=-1) - PRECISION, 0)
+    hi = np.maximum(hi, 0)
+    q_burn = _solve_increasing(g_burn, zeros, hi, tolerance, max_iterations)
+
+    q = np.where(mint, q_mint, np.where(burn, -q_burn, 0))
+    profit = np.where(
+        mint,
+        np.sum(np.where(mask, L2 / B - L2 / (B + c * q_mint[..., None]), 0), axis=-1)
+        - q_mint,
+        np.where(
+            burn,
+            q_burn
+            - np.sum(
+                np.where(mask, (L2 / (B - q_burn[..., None]) - L2 / B) / c, 0),
+                axis=-1,
+            ),
+            0,
+        ),
+    )
+
+    return q, profit
+
+
+def apply_complete_set_arbitrage(X, L, fee_bps, q, mask=None):
+    """
+    execute the arbitrage q of solve_complete_set_arbitrage on every pool
+
+    return the new X, Y and the fee charged on each pool in X (sell) and Y (buy),
+    with the same accounting as route_in_outcome.AMM.sell_X / buy_X
+    """
+    X = np.asarray(X, dtype=float)
+    L = np.asarray(L, dtype=float)
+    fee_bps = np.broadcast_to(np.asarray(fee_bps, dtype=float), X.shape)
+    if mask is None:
+        mask = np.ones(X.shape, dtype=bool)
+    q = np.broadcast_to(np.asarray(q, dtype=float)[..., None], X.shape)
+
+    sell = np.maximum(q, 0)
+    buy = np.maximum(-q, 0)
+
+    # sell_X: fee is charged on the input
+    fee_X = sell * fee_bps / 10**4
+    new_X = X + sell - fee_X - buy
+    new_Y = L**2 / (new_X + L)
+
+    # buy_X: fee is charged on top of the input
+    Y = L**2 / (X + L)
+    fee_Y = np.maximum(new_Y - Y, 0) * fee_bps / (10**4 - fee_bps)
+
+    return (
+        np.where(mask, new_X, X),
+        np.where(mask, new_Y, Y),
+        np.where(mask, fee_X, 0),
+        np.where(mask, fee_Y, 0),
+    )
@@ -0,0 +1,176 @@
+"""
+CDP trove book indexed by collateral ratio
+
+A trove's collateral ratio is coll * price / debt. Debt accrues through one index
+shared by every trove, so debt = normalized debt * index and the ratio is
+nominal ratio (coll / normalized debt) * price / index. The ordering of troves by
+nominal ratio does not move with the price or the interest, so a min-heap keyed
+by it only needs re-keying when a trove itself changes.
+
+Changed or closed troves are re-keyed lazily: a new entry is pushed with a bumped
+version and stale entries are dropped when they reach the top. A liquidation
+sweep pops only the troves below the minimum collateral ratio,
+O(k log n) for k liquidations instead of a scan of every trove per price tick.
+"""
+
+import heapq
+
+import numpy as np
+
+
+class TroveBook:
+    def __init__(self, num_troves, mcr=1.1):
+        self.mcr = mcr  # minimum collateral ratio
+        self.coll = np.zeros(num_troves)
+        self.normalized_debt = np.zeros(num_troves)  # debt / index
+        self.active = np.zeros(num_troves, dtype=bool)
+        self.version = np.zeros(num_troves, dtype=np.int64)
+        self.index = 1.0  # debt per unit of normalized debt
+        self.heap = []  # (nominal ratio, trove id, version)
+        self.total_coll = 0.0
+        self.total_normalized_debt = 0.0
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    # views
+
+    def debt(self, ids):
+        return self.normalized_debt[ids] * self.index
+
+    def total_debt(self):
+        return self.total_normalized_debt * self.index
+
+    def nominal_ratio(self, ids):
+        return self.coll[ids] / self.normalized_debt[ids]
+
+    def icr(self, ids, price):
+        return self.nominal_ratio(ids) * price / self.index
+
+    def lowest(self):
+        """
+        id of the trove with the lowest collateral ratio, None if no troves
+        """
+        self._drop_stale()
+        return self.heap[0][1] if self.heap else None
+
+    # index
+
+    def _drop_stale(self):
+        heap = self.heap
+        while heap and heap[0][2] != self.version[heap[0][1]]:
+            heapq.heappop(heap)
+
+    def _push(self, ids):
+        self.version[ids] += 1
+        entries = zip(
+            self.nominal_ratio(ids).tolist(), ids.tolist(), self.version[ids].tolist()
+        )
+        if len(ids) > len(self.heap) // 8:
+            # rebuilding is cheaper than pushing one by one, and drops stale entries
+            self.heap = [
+                entry for entry in self.heap if entry[2] == self.version[entry[1]]
+            ]
+            self.heap.extend(entries)
+            heapq.heapify(self.heap)
+        else:
+            for entry in entries:
+                heapq.heappush(self.heap, entry)
+
+    def _remove(self, ids):
+        self.version[ids] += 1
+        if len(self.heap) > 2 * len(self) + 1024:
+            self.heap = [
+                entry for entry in self.heap if entry[2] == self.version[entry[1]]
+            ]
+            heapq.heapify(self.heap)
+
+    # trove operations, on arrays of unique trove ids
+
+    def accrue(self, factor):
+        """
+        grow every debt by factor, e.g. exp of the integral of the interest rate
+        """
+        self.index *= factor
+
+    def open(self, ids, coll, debt, price):
+        ids = np.asarray(ids)
+        assert len(np.unique(ids)) == len(ids), "duplicate trove"
+        assert not np.any(self.active[ids]), "Trove is active"
+        coll = np.broadcast_to(np.asarray(coll, dtype=float), ids.shape)
+        debt = np.broadcast_to(np.asarray(debt, dtype=float), ids.shape)
+        assert np.all(debt > 0), "debt Out of range"
+        assert np.all(coll * price >= self.mcr * debt), "ICR below MCR"
+
+        self.coll[ids] = coll
+        self.normalized_debt[ids] = debt / self.index
+        self.active[ids] = True
+        self.total_coll += coll.sum()
+        self.total_normalized_debt += self.normalized_debt[ids].sum()
+        self._push(ids)
+
+    def adjust(self, ids, coll_change, debt_change, price):
+        """
+        add (positive) or withdraw (negative) collateral and debt
+        """
+        ids = np.asarray(ids)
+        assert len(np.unique(ids)) == len(ids), "duplicate trove"
+        assert np.all(self.active[ids]), "Trove is not active"
+        coll = self.coll[ids] + coll_change
+        debt = self.debt(ids) + debt_change
+        assert np.all(coll >= 0) and np.all(debt > 0), "amount Out of range"
+        assert np.all(coll * price >= self.mcr * debt), "ICR below MCR"
+
+        self.total_coll += (coll - self.coll[ids]).sum()
+        self.total_normalized_debt += (
+            debt / self.index - self.normalized_debt[ids]
+        ).sum()
+        self.coll[ids] = coll
+        self.normalized_debt[ids] = debt / self.index
+        self._push(ids)
+
+    def close(self, ids):
+        """
+        return the collateral released and the debt to repay
+        """
+        ids = np.asarray(ids)
+        assert len(np.unique(ids)) == len(ids), "duplicate trove"
+        assert np.all(self.active[ids]), "Trove is not active"
+        coll, debt = self.coll[ids].copy(), self.debt(ids)
+
+        self.total_coll -= coll.sum()
+        self.total_normalized_debt -= self.normalized_debt[ids].sum()
+        self.coll[ids] = 0
+        self.normalized_debt[ids] = 0
+        self.active[ids] = False
+        self._remove(ids)
+        return coll, debt
+
+    def liquidate(self, price, max_troves=None):
+        """
+        close every trove with ICR below MCR at price, lowest ratio first
+
+        returns the ids, collateral and debt of the liquidated troves
+        """
+        threshold = self.mcr * self.index / price  # on the nominal ratio
+        heap = self.heap
+        ids = []
+        while heap and (max_troves is None or len(ids) < max_troves):
+            nominal_ratio, i, version = heap[0]
+            if version != self.version[i]:
+                heapq.heappop(heap)
+            elif nominal_ratio < threshold:
+                heapq.heappop(heap)
+                self.version[i] += 1
+                ids.append(i)
+            else:
+                break
+
+        ids = np.array(ids, dtype=np.int64)
+        coll, debt = self.coll[ids].copy(), self.debt(ids)
+        self.total_coll -= coll.sum()
+        self.total_normalized_debt -= self.normalized_debt[ids].sum()
+        self.coll[ids] = 0
+        self.normalized_debt[ids] = 0
+        self.active[ids] = False
+        return ids, coll, debt
@@ -0,0 +1,73 @@
+"""
+Checkpoints of long-running simulations
+
+A checkpoint is one pickle of a dict holding everything a simulation needs to
+continue: pool objects, generators (numpy Generators pickle their bit state),
+np.random's global state, the block index and partial aggregates.
+Resuming from it continues bit-identically to an uninterrupted run.
+
+The file is written to a temporary file next to the target and renamed over it,
+so a run preempted while saving leaves the previous checkpoint intact.
+"""
+
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+
+def save(path, state):
+    """
+    atomically write state to path, with np.random's global state included
+    """
+    path = os.fspath(path)
+    state = dict(state, np_random=np.random.get_state())
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load(path):
+    """
+    return the state saved at path and restore np.random's global state,
+    or None if there is no checkpoint
+    """
+    if path is None or not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+    np.random.set_state(state.pop("np_random"))
+    return state
+
+
+def skip_blocks(chunks, n):
+    """
+    drop the first n blocks of a stream of block chunks,
+    used to resume replayed inputs that can not be pickled mid-stream
+    """
+    for chunk in chunks:
+        if n >= len(chunk):
+            n -= len(chunk)
+            continue
+        yield chunk[n:]
+        n = 0
+
+
+def clear(path):
+    """
+    remove the checkpoint of a finished run
+    """
+    if path is not None and os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,449 @@
+"""
+research-synstation command line
+
+    research-synstation fee-sweep   PnL and fees of outcome market LPs by fee rate
+    research-synstation quote       GM cost / proceeds of an outcome trade, as JSON
+    research-synstation psm         PSM & GM interest rate simulation metrics
+    research-synstation treasury    treasury payment for a new market
+    research-synstation emission    SYN emission schedule plot
+    research-synstation report      all figures, sweeps and simulation tables,
+                                    rendered in parallel
+
+Only the standard library is imported at startup: numpy, tabulate, matplotlib
+and the misc/ scripts are imported inside the subcommand that needs them, so a
+quote does not pay for matplotlib. tests/test_cli.py holds the startup budget.
+
+misc/ is not part of the package, so fee-sweep, psm, treasury, emission and
+report run from a source checkout only (poetry install in the repo); quote runs
+from any install.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+from pathlib import Path
+
+MISC = Path(__file__).resolve().parents[1] / "misc"
+
+
+def _load_misc(name):
+    """
+    import a misc/ script by name; they import each other as top-level modules
+    """
+    if not MISC.is_dir():
+        sys.exit(f"misc/ not found at {MISC}: this subcommand needs a source checkout")
+    if str(MISC) not in sys.path:
+        sys.path.append(str(MISC))
+    return importlib.import_module(name)
+
+
+def _use_backend(show):
+    if not show:
+        # render without a display, and without loading an interactive backend
+        import matplotlib
+
+        matplotlib.use("Agg")
+
+
+def _print_table(data, headers):
+    from tabulate import tabulate
+
+    print(tabulate(data, headers=headers, tablefmt="pretty"))
+
+
+# subcommands
+
+
+def fee_sweep(args):
+    find_optimal_fee_rate = _load_misc("find_optimal_fee_rate")
+
+    min_price, max_price = find_optimal_fee_rate.price_range(
+        args.initial_price, args.volatility, args.period, args.sigma_level
+    )
+    print(f"Price Range: {min_price} - {max_price}")
+
+    price_source = None
+    if args.price_source is not None:
+        from research_synstation import paths
+
+        price_source = paths.PriceReplay(args.price_source, args.block_time)
+
+    headers, data = find_optimal_fee_rate.fee_sweep(
+        args.fee_rates,
+        args.runs,
+        bid=args.bid,
+        daily_transaction=args.daily_transaction,
+        min_size=args.min_size,
+        max_size=args.max_size,
+        initial_price=args.initial_price,
+        volatility=args.volatility,
+        block_time=args.block_time,
+        period=args.period,
+        sigma_level=args.sigma_level,
+        seed=args.seed,
+        price_source=price_source,
+    )
+    _print_table(data, headers)
+
+
+def quote(args):
+    from research_synstation import amm
+
+    market = amm.OutcomeMarket(args.bid, args.probabilities, args.fee_bps)
+    if not 0 <= args.outcome < len(market):
+        raise SystemExit("outcome Out of range")
+
+    is_buy = not args.sell
+    split = market.find_optimal_split(args.outcome, args.amount, is_buy)
+    amount = market.quote(args.outcome, args.amount, split, is_buy)
+    print(json.dumps({"amount": float(amount[0]), "split": float(split[0])}))
+
+
+def psm_metrics(params, days, block_time, demand_volatility=None, seed=None):
+    """
+    metrics of one psm_ir_simulation run on a generated scenario
+    """
+    psm_ir_simulation = _load_misc("psm_ir_simulation")
+    psm_sweep = _load_misc("psm_sweep")
+
+    num_blocks = int(days * 86400 // block_time)
+    if demand_volatility is None:
+        # 200 GM per one minute block, aggregated over the block time
+        demand_volatility = 200 * (block_time / 60) ** 0.5
+
+    scenarios = psm_sweep.generate_scenarios(
+        1, num_blocks, block_time, demand_volatility=demand_volatility, seed=seed
+    )
+    return psm_ir_simulation.psm_simulation(
+        params, scenarios[0, 0], scenarios[1, 0], block_time
+    )
+
+
+def psm(args):
+    psm_ir_simulation = _load_misc("psm_ir_simulation")
+
+    params = {}
+    for param in args.param:
+        key, _, value = param.partition("=")
+        if key not in psm_ir_simulation.DEFAULT_PARAMS:
+            raise SystemExit(f"unknown parameter {key}")
+        params[key] = float(value)
+
+    metrics = psm_metrics(
+        params, args.days, args.block_time, args.demand_volatility, args.seed
+    )
+    _print_table(metrics.items(), ["Metric", "Value"])
+
+
+def treasury(args):
+    find_treasury_payment = _load_misc("find_treasury_payment")
+
+    if args.plot is not None:
+        _use_backend(args.show)
+        find_treasury_payment.plot_treasury_payment(
+            args.plot, args.bid, args.output, args.show
+        )
+        print(f"saved to {args.output}")
+        return
+
+    if args.probabilities is None:
+        raise SystemExit("--probabilities or --plot is required")
+    data = [
+        [
+            "Expected",
+            find_treasury_payment.get_expected_treasury_payment(
+                args.bid, args.probabilities
+            ),
+        ],
+        [
+            "Guaranteed",
+            find_treasury_payment.get_guaranteed_treasury_payment(
+                args.bid, args.probabilities
+            ),
+        ],
+    ]
+    _print_table(data, ["Treasury Payment", "Amount"])
+
+
+def emission(args):
+    plot_emission = _load_misc("plot_emission")
+
+    _use_backend(args.show)
+    plot_emission.plot_supply(
+        args.max_supply,
+        args.half_life,
+        args.halvings * args.half_life,
+        args.output,
+        args.show,
+    )
+    print(f"saved to {args.output}")
+
+
+# table name -> misc script, table function and its keyword arguments
+SIMULATION_TABLES = {
+    "fee_sweep": (
+        "find_optimal_fee_rate",
+        "fee_sweep",
+        {
+            "fee_rates": [1, 5, 10, 20, 30, 50, 100],
+            "runs": 50,
+            "bid": 10_000,
+            "daily_transaction": 200,
+            "min_size": 1,
+            "max_size": 100,
+            "initial_price": 4000,
+            "volatility": 0.01,
+            "block_time": 2,
+            "period": 90,
+            "sigma_level": 3,
+            "seed": 1337,
+        },
+    ),
+    "psm_sweep": (
+        "psm_sweep",
+        "sweep_table",
+        {
+            "grid": {
+                "kappa": [1e-5, 1e-4, 1e-3],
+                "target_debt_fraction": [0.3, 0.5],
+                "const_burn_fee_rate": [1000, 5000],
+                "burn_fee_rate_half_life": [60 * 60, 60 * 60 * 12],
+            },
+            "num_scenarios": 8,
+            "num_blocks": 24 * 7 * 4,
+            "block_time": 60 * 60,
+            "demand_volatility": 200 * 60**0.5,
+            "seed": 1337,
+        },
+    ),
+    "outcome_market": (
+        "outcome_market_simulation",
+        "outcome_table",
+        {
+            "fee_rates": [1, 5, 10, 30, 100],
+            "outcomes": [5, 10, 30],
+            "runs": 10,
+            "bid": 10_000,
+            "concentration": 200_000,
+            "daily_transaction": 200,
+            "min_size": 1,
+            "max_size": 100,
+            "block_time": 60,
+            "period": 7,
+        },
+    ),
+    "portfolio": (
+        "portfolio_simulation",
+        "portfolio_table",
+        {
+            "num_markets": 2000,
+            "fee_rates": [1, 5, 10, 30, 100],
+            "initial_prices": [4000, 100_000, 200],
+            "volatilities": [0.03, 0.02, 0.05],
+            "correlation": [[1.0, 0.8, 0.6], [0.8, 1.0, 0.5], [0.6, 0.5, 1.0]],
+            "block_time": 60,
+            "seed": 1337,
+        },
+    ),
+    "gauge": (
+        "gauge_simulation",
+        "gauge_table",
+        {
+            "lps": [1_000, 100_000, 1_000_000],
+            "num_pools": 10,
+            "actions_per_epoch": 1000,
+            "epoch": 60 * 60,
+            "period": 30,
+            "seed": 1337,
+        },
+    ),
+    "cdp_liquidation_cascade": (
+        "cdp_liquidation_cascade",
+        "cascade_table",
+        {
+            "num_troves": 100_000,
+            "initial_price": 4000,
+            "volatility": 0.05,
+            "block_time": 60,
+            "period": 7,
+            "seed": 1337,
+        },
+    ),
+    "redemption": (
+        "redemption_simulation",
+        "depeg_table",
+        {
+            "positions": [1_000, 100_000],
+            "num_blocks": 24 * 60 * 7,
+            "block_time": 60,
+            "depeg_start": 24 * 60,
+            "depeg_blocks": 24 * 60,
+            "sell_volume": 500,
+            "seed": 1337,
+        },
+    ),
+    "twap_manipulation": (
+        "twap_manipulation",
+        "manipulation_table",
+        {
+            "fees": [10, 30, 100],
+            "pushes": [100, 1_000, 10_000],
+            "bid": 100_000,
+            "p": [0.5, 0.3, 0.2],
+            "target": 2,
+            "blocks": 300,
+            "block_time": 2,
+        },
+    ),
+}
+
+# report --quick: small runs of every table, to check the report end to end
+QUICK_SIZES = {
+    "fee_sweep": {"runs": 2, "period": 0.25},
+    "psm_sweep": {"num_scenarios": 2, "num_blocks": 24 * 2},
+    "outcome_market": {"outcomes": [5], "runs": 2, "period": 0.25},
+    "portfolio": {"num_markets": 10, "expiries": (1, 2)},
+    "gauge": {"lps": [1_000], "period": 1},
+    "cdp_liquidation_cascade": {"num_troves": 1_000, "period": 1},
+    "redemption": {
+        "positions": [1_000],
+        "num_blocks": 600,
+        "depeg_start": 60,
+        "depeg_blocks": 60,
+    },
+    "twap_manipulation": {"pushes": [1_000], "blocks": 30},
+}
+
+
+def report(args):
+    from research_synstation import report
+
+    plot_emission = _load_misc("plot_emission")
+    find_treasury_payment = _load_misc("find_treasury_payment")
+
+    figures = {
+        "SYN_emission": (
+            plot_emission.plot_supply,
+            {"M": 1_000_000_000 * 0.5, "H": 180, "time_range": 4 * 180, "show": False},
+        ),
+        "treasury_payment": (
+            find_treasury_payment.plot_treasury_payment,
+            {"max_N": 10, "B": 1000, "show": False},
+        ),
+    }
+    for series in args.series:
+        name, _, path = series.partition("=")
+        if not path:
+            raise SystemExit(f"--series {series}: expected NAME=FILE.npy")
+        figures[name] = (
+            report.plot_series,
+            {"series": {name: path}, "title": name, "max_points": args.max_points},
+        )
+
+    tables = {
+        "psm_metrics": (
+            psm_metrics,
+            {"params": {}, "days": 28, "block_time": 3600, "seed": args.seed},
+        ),
+    }
+    # the sweeps and simulations of misc/, at the sizes of their __main__
+    for name, (script, func, kwargs) in SIMULATION_TABLES.items():
+        kwargs = dict(kwargs, **QUICK_SIZES[name]) if args.quick else kwargs
+        tables[name] = (getattr(_load_misc(script), func), kwargs)
+
+    paths = report.render_report(args.output, figures, tables, args.workers)
+    for path in paths:
+        print(f"saved to {path}")
+    print(f"saved to {Path(args.output) / 'report.md'}")
+
+
+# parser
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="research-synstation", description="SynStation research tools"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("fee-sweep", help="LP PnL and fees by fee rate")
+    p.add_argument("--fee-rates", type=float, nargs="+", default=[1, 5, 10, 20, 30])
+    p.add_argument("--runs", type=int, default=10)
+    p.add_argument("--bid", type=float, default=10_000)
+    p.add_argument("--daily-transaction", type=float, default=200)
+    p.add_argument("--min-size", type=float, default=1)
+    p.add_argument("--max-size", type=float, default=100)
+    p.add_argument("--initial-price", type=float, default=4000)
+    p.add_argument("--volatility", type=float, default=0.01, help="daily")
+    p.add_argument("--block-time", type=float, default=2, help="seconds")
+    p.add_argument("--period", type=float, default=90, help="days")
+    p.add_argument("--sigma-level", type=float, default=3)
+    p.add_argument("--seed", type=int)
+    p.add_argument("--price-source", help="CSV or .npy of historical ticks")
+    p.set_defaults(func=fee_sweep)
+
+    p = subparsers.add_parser("quote", help="quote an outcome trade, as JSON")
+    p.add_argument("--probabilities", type=float, nargs="+", required=True)
+    p.add_argument("--outcome", type=int, required=True)
+    p.add_argument("--amount", type=float, required=True, help="outcome tokens")
+    p.add_argument("--sell", action="store_true", help="sell instead of buy")
+    p.add_argument("--bid", type=float, default=10_000)
+    p.add_argument("--fee-bps", type=float, default=30)
+    p.set_defaults(func=quote)
+
+    p = subparsers.add_parser("psm", help="PSM & GM interest rate simulation")
+    p.add_argument("--days", type=float, default=28)
+    p.add_argument("--block-time", type=float, default=3600, help="seconds")
+    p.add_argument("--demand-volatility", type=float, help="GM per block")
+    p.add_argument("--seed", type=int)
+    p.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="override psm_ir_simulation.DEFAULT_PARAMS",
+    )
+    p.set_defaults(func=psm)
+
+    p = subparsers.add_parser("treasury", help="treasury payment for a new market")
+    p.add_argument("--bid", type=float, default=1000)
+    p.add_argument("--probabilities", type=float, nargs="+")
+    p.add_argument("--plot", type=int, metavar="MAX_N", help="plot up to MAX_N")
+    p.add_argument("--output", default="plots/treasury_payment.png")
+    p.add_argument("--show", action="store_true")
+    p.set_defaults(func=treasury)
+
+    p = subparsers.add_parser("emission", help="SYN emission schedule plot")
+    p.add_argument("--max-supply", type=float, default=1_000_000_000 * 0.5)
+    p.add_argument("--half-life", type=float, default=180, help="days")
+    p.add_argument("--halvings", type=int, default=4)
+    p.add_argument("--output", default="plots/SYN_emission.png")
+    p.add_argument("--show", action="store_true")
+    p.set_defaults(func=emission)
+
+    p = subparsers.add_parser("report", help="render figures and tables headlessly")
+    p.add_argument("--output", default="reports")
+    p.add_argument("--workers", type=int, help="worker processes, default all CPUs")
+    p.add_argument("--max-points", type=int, default=4000, help="per trajectory")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--quick", action="store_true", help="small sweeps and simulations")
+    p.add_argument(
+        "--series",
+        action="append",
+        default=[],
+        metavar="NAME=FILE",
+        help=".npy trajectory, 2-D for one line per row",
+    )
+    p.set_defaults(func=report)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Depth tables: approximate quotes of a pool or a routed market by interpolation
+
+A DepthTable stores the average rate output / amount of one trade direction on an
+adaptive grid of amounts. The rate is smooth and bounded for every (X + L) * Y = L**2
+pool, so a table of a few thousand knots keeps the relative interpolation error
+below rtol from dust up to the largest trade, where interpolating the output itself
+would need a grid as fine as the smallest trade.
+
+Tables answer bulk quote / inverse / impact queries with np.interp.
+Exact math (int_amm, the contract math) is only needed to execute a trade.
+"""
+
+import numpy as np
+
+from research_synstation import int_amm
+
+
+class DepthTable:
+    """
+    output of trading amount, for amount in [0, max_amount]
+
+    quote: vectorized exact quote, amounts -> outputs, increasing in amount
+    """
+
+    def __init__(
+        self,
+        quote,
+        max_amount,
+        rtol=1e-6,
+        min_amount=None,  # the rate is constant below min_amount
+        initial_knots=64,
+        max_knots=1 << 16,
+    ):
+        if min_amount is None:
+            min_amount = max_amount * 1e-9
+        self.rtol = rtol
+
+        amounts = np.geomspace(min_amount, max_amount, initial_knots)
+        rates = quote(amounts) / amounts
+
+        # bisect every interval whose midpoint is off the chord by more than rtol
+        while len(amounts) < max_knots:
+            mid = (amounts[:-1] + amounts[1:]) / 2
+            mid_rates = quote(mid) / mid
+            chord = (rates[:-1] + rates[1:]) / 2
+            refine = np.abs(mid_rates - chord) > rtol * np.abs(mid_rates)
+            if not refine.any():
+                break
+
+            amounts = np.insert(amounts, np.flatnonzero(refine) + 1, mid[refine])
+            rates = np.insert(rates, np.flatnonzero(refine) + 1, mid_rates[refine])
+
+        self.amounts = amounts
+        self.rates = rates
+        self.outputs = amounts * rates
+        # impact: fraction of the output lost against the spot rate
+        self.impacts = np.abs(1 - rates / rates[0])
+
+    def __len__(self):
+        return len(self.amounts)
+
+    @property
+    def max_amount(self):
+        return self.amounts[-1]
+
+    def rate(self, amount):
+        return np.interp(amount, self.amounts, self.rates)
+
+    def quote(self, amount):
+        """
+        approximate output of every amount; amounts above max_amount are clipped
+        """
+        amount = np.clip(amount, 0, self.max_amount)
+        return amount * self.rate(amount)
+
+    def amount_for_output(self, output, iterations=3):
+        """
+        approximate amount whose output is output
+        """
+        output = np.asarray(output, dtype=float)
+        amount = np.interp(output, self.outputs, self.amounts)
+        # the rate varies slowly, so a few fixed point steps reach the table accuracy
+        for _ in range(iterations):
+            amount = np.clip(output / self.rate(amount), 0, self.max_amount)
+        return amount
+
+    def depth(self, impact):
+        """
+        largest amount whose average rate is within impact of the spot rate
+        """
+        return np.interp(impact, self.impacts, self.amounts)
+
+
+class DepthIndex:
+    """
+    lazily built depth tables of route_in_gm.AMM pools
+
+    every table is kept with the reserves it was built from and rebuilt on the
+    first query after they changed, whether the pool was traded through swap
+    or directly, so a trade only costs the tables of its pool
+    """
+
+    def __init__(self, pools, rtol=1e-6, max_sell_ratio=10):
+        self.pools = pools
+        self.rtol = rtol
+        self.max_sell_ratio = max_sell_ratio  # largest sell is max_sell_ratio * x
+        self.tables = {}  # (i, is_buy) -> (x, y, table)
+
+    def _build(self, i, is_buy):
+        x, y = self.pools[i].x, self.pools[i].y
+
+        def quote(amounts):
+            amounts = np.rint(amounts)
+            if amounts[-1] < int_amm.SAFE_BOUND:
+                amounts = amounts.astype(np.int64)
+            else:
+                amounts = np.array([int(a) for a in amounts], dtype=object)
+            return np.asarray(
+                int_amm.quote_exact_input_single(x, y, amounts, is_buy), dtype=float
+            )
+
+        if is_buy:
+            # GM in, O out: new_y stays below L
+            max_amount = int(int_amm.get_L(x, y, True)) - y - 1
+        else:
+            # O in, GM out
+            max_amount = self.max_sell_ratio * x
+
+        # integer quotes are steps of one unit, keep the grid well above them
+        max_amount = float(max_amount)
+        min_amount = max(max_amount * 1e-9, 100 / self.rtol)
+        return DepthTable(quote, max_amount, self.rtol, min_amount)
+
+    def table(self, i, is_buy):
+        x, y = self.pools[i].x, self.pools[i].y
+        cached = self.tables.get((i, is_buy))
+        if cached is None or cached[:2] != (x, y):
+            cached = (x, y, self._build(i, is_buy))
+            self.tables[(i, is_buy)] = cached
+        return cached[2]
+
+    def quote(self, i, amount_in, is_buy):
+        return self.table(i, is_buy).quote(amount_in)
+
+    def amount_for_output(self, i, amount_out, is_buy):
+        return self.table(i, is_buy).amount_for_output(amount_out)
+
+    def depth(self, i, impact, is_buy):
+        return self.table(i, is_buy).depth(impact)
+
+    def quote_exact(self, i, amount_in, is_buy):
+        pool = self.pools[i]
+        return int_amm.quote_exact_input_single(pool.x, pool.y, amount_in, is_buy)
+
+    def invalidate(self, i):
+        """
+        drop the tables of pool i now instead of on its next query
+        """
+        self.tables.pop((i, True), None)
+        self.tables.pop((i, False), None)
+
+    def swap(self, i, dx, dy):
+        """
+        commit a swap on pool i with exact math and drop its tables
+        """
+        self.pools[i].swap(dx, dy)
+        self.invalidate(i)
+
+
+def market_depth_table(market, i, is_buy, max_amount, rtol=1e-6):
+    """
+    depth table of trading O_i on an amm.OutcomeMarket through the optimal split
+
+    buy: O_i amount -> GM paid, sell: O_i amount -> GM received
+    every pool of the market enters the routed quote,
+    so the table must be rebuilt after any trade on the market
+    """
+
+    def quote(dx):
+        dx_i = market.find_optimal_split(i, dx, is_buy)
+        return market.quote(i, dx, dx_i, is_buy)
+
+    return DepthTable(quote, max_amount, rtol)
@@ -0,0 +1,123 @@
+"""
+Gauges distributing SYN emissions to PMAMM LPs
+
+Each gauge keeps the cumulative reward per LP token, and every LP keeps the
+value it last settled at, so an LP's reward is balance * (accumulator - paid)
+and a deposit, withdrawal or claim is O(1) whatever the number of LPs or blocks.
+LPs live in arrays and every operation takes arrays of LP ids.
+
+Emissions follow the halving schedule of plot_emission.py, Y(t) = M * (1 - 2^(-t/H)),
+and are split between gauges by weight.
+"""
+
+import numpy as np
+
+
+def emission(M, H, t0, t1):
+    """
+    SYN emitted between t0 and t1, Y(t1) - Y(t0)
+    """
+    return M * (2 ** (-t0 / H) - 2 ** (-t1 / H))
+
+
+class Gauge:
+    def __init__(self, num_lps):
+        self.balance = np.zeros(num_lps)  # staked LP tokens
+        self.total_supply = 0.0
+        self.reward_per_token = 0.0
+        self.paid = np.zeros(num_lps)  # reward_per_token at the last settlement
+        self.claimable = np.zeros(num_lps)
+        self.queued = 0.0  # rewards notified while nothing was staked
+        self.total_claimed = 0.0
+
+    def __len__(self):
+        return len(self.balance)
+
+    def notify_reward(self, amount):
+        if self.total_supply == 0:
+            self.queued += amount
+            return
+        self.reward_per_token += (amount + self.queued) / self.total_supply
+        self.queued = 0.0
+
+    def _settle(self, ids):
+        ids = np.unique(ids)
+        self.claimable[ids] += self.balance[ids] * (
+            self.reward_per_token - self.paid[ids]
+        )
+        self.paid[ids] = self.reward_per_token
+
+    def earned(self, ids):
+        return self.claimable[ids] + self.balance[ids] * (
+            self.reward_per_token - self.paid[ids]
+        )
+
+    def deposit(self, ids, amounts):
+        ids = np.asarray(ids)
+        amounts = np.broadcast_to(np.asarray(amounts, dtype=float), ids.shape)
+        assert np.all(amounts >= 0), "amount Out of range"
+        self._settle(ids)
+        np.add.at(self.balance, ids, amounts)
+        self.total_supply += amounts.sum()
+        if self.queued > 0 and self.total_supply > 0:
+            self.notify_reward(0.0)
+
+    def withdraw(self, ids, amounts):
+        ids = np.asarray(ids)
+        amounts = np.broadcast_to(np.asarray(amounts, dtype=float), ids.shape)
+        assert np.all(amounts >= 0), "amount Out of range"
+        # check the total of every id before mutating, ids may repeat
+        totals = np.bincount(ids.ravel(), amounts.ravel(), minlength=len(self))
+        assert np.all(totals[ids] <= self.balance[ids]), "Insufficient balance"
+        self._settle(ids)
+        np.subtract.at(self.balance, ids, amounts)
+        self.total_supply -= amounts.sum()
+
+    def claim(self, ids):
+        """
+        return the rewards of ids and reset them, ids must be unique
+        """
+        ids = np.asarray(ids)
+        assert len(np.unique(ids)) == len(ids), "duplicate LP"
+        self._settle(ids)
+        rewards = self.claimable[ids].copy()
+        self.claimable[ids] = 0
+        self.total_claimed += rewards.sum()
+        return rewards
+
+
+class Minter:
+    def __init__(self, gauges, weights, M, H, start=0):
+        """
+        gauges: Gauge of each pool
+        weights: share of the emissions of each gauge, summing to 1
+        M: maximum emission
+        H: halving period, same unit as the timestamps
+        """
+        self.gauges = gauges
+        self.set_weights(weights)
+        self.M = M
+        self.H = H
+        self.start = start
+        self.last = start
+        self.total_minted = 0.0
+
+    def set_weights(self, weights):
+        weights = np.asarray(weights, dtype=float)
+        assert len(weights) == len(self.gauges), "one weight per gauge"
+        assert np.all(weights >= 0) and np.isclose(weights.sum(), 1), "invalid weights"
+        self.weights = weights
+
+    def mint(self, t):
+        """
+        stream the emissions since the last mint to the gauges,
+        before balances change at t
+        """
+        assert t >= self.last, "time goes backwards"
+        amount = emission(self.M, self.H, self.last - self.start, t - self.start)
+        for gauge, weight in zip(self.gauges, self.weights):
+            if weight > 0:
+                gauge.notify_reward(amount * weight)
+        self.last = t
+        self.total_minted += amount
+        return amount
@@ -0,0 +1,444 @@
+"""
+Vectorized integer math of PMAMM: (x + L) * y = L**2
+
+Every function takes arrays of reserves / amounts and returns exactly what the
+arbitrary precision implementation (misc/route_in_gm.py, the contract math) returns.
+Elements whose values are below SAFE_BOUND are computed on uint64 arrays,
+with 128-bit intermediate products held as (hi, lo) pairs.
+Other elements, and elements whose intermediate quotient overflows,
+fall back to Python ints one by one.
+"""
+
+import math
+
+import numpy as np
+
+SAFE_BOUND = 1 << 61  # reserves and amounts handled by the uint64 path
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHIFT32 = np.uint64(32)
+_ONE = np.uint64(1)
+_TWO64 = 2.0**64
+_QUOTIENT_BOUND = 2.0**62  # quotients above this are recomputed with Python ints
+
+
+# arbitrary precision (contract) math
+
+
+def div_up(a, b):
+    return (a + b - 1) // b
+
+
+def _get_L_exact(x, y, round_up):
+    assert x > 0, "x Out of range"
+    assert y > 0, "y Out of range"
+
+    L = (math.isqrt(y * y + ((x * y) << 2)) + y) >> 1
+
+    if L * L == (x + L) * y:
+        return L
+    elif round_up:
+        return L + 1
+    else:
+        return L
+
+
+def _get_dx_exact(x, y, dy):
+    new_y = y + dy
+    assert new_y > 0, "new_y Out of range"
+
+    L = _get_L_exact(x, y, True)
+    new_x = max(1, div_up(L**2, new_y) - L)
+
+    return new_x - x
+
+
+def _get_dy_exact(x, y, dx):
+    new_x = x + dx
+    assert new_x > 0, "new_x Out of range"
+
+    L = _get_L_exact(x, y, True)
+    new_y = div_up(L**2, new_x + L)
+    assert new_y > 0, "new_y Out of range"
+
+    return new_y - y
+
+
+# 128-bit helpers on uint64 arrays
+
+
+def _mul_wide(a, b):
+    """
+    a * b as (hi, lo) for uint64 arrays a, b
+    """
+    a0, a1 = a & _MASK32, a >> _SHIFT32
+    b0, b1 = b & _MASK32, b >> _SHIFT32
+
+    p00 = a0 * b0
+    p01 = a0 * b1
+    p10 = a1 * b0
+    p11 = a1 * b1
+
+    mid = (p00 >> _SHIFT32) + (p01 & _MASK32) + (p10 & _MASK32)
+    lo = (p00 & _MASK32) | ((mid & _MASK32) << _SHIFT32)
+    hi = p11 + (p01 >> _SHIFT32) + (p10 >> _SHIFT32) + (mid >> _SHIFT32)
+
+    return hi, lo
+
+
+def _add_wide(a, b):
+    lo = a[1] + b[1]
+    return a[0] + b[0] + (lo < a[1]), lo
+
+
+def _sub_wide(a, b):
+    """
+    a - b for a >= b
+    """
+    return a[0] - b[0] - (a[1] < b[1]), a[1] - b[1]
+
+
+def _lt_wide(a, b):
+    return (a[0] < b[0]) | ((a[0] == b[0]) & (a[1] < b[1]))
+
+
+def _eq_wide(a, b):
+    return (a[0] == b[0]) & (a[1] == b[1])
+
+
+def _to_float(a):
+    return a[0] * _TWO64 + a[1]
+
+
+def _diff_to_float(a, b):
+    """
+    a - b as float, sign included
+    """
+    neg = _lt_wide(a, b)
+    larger = np.where(neg, b[0], a[0]), np.where(neg, b[1], a[1])
+    smaller = np.where(neg, a[0], b[0]), np.where(neg, a[1], b[1])
+    return np.where(neg, -1.0, 1.0) * _to_float(_sub_wide(larger, smaller))
+
+
+def _isqrt_wide(n):
+    """
+    floor(sqrt(n)) for n < 2**126
+    """
+    s = np.floor(np.sqrt(_to_float(n))).astype(np.uint64)
+
+    # float newton steps remove the rounding error of the float sqrt
+    for _ in range(4):
+        step = np.floor(
+            _diff_to_float(n, _mul_wide(s, s)) / (2.0 * np.maximum(s, 1))
+        ).astype(np.int64)
+        if not step.any():
+            break
+        s = (s.astype(np.int64) + step).astype(np.uint64)
+
+    # exact correction
+    while True:
+        over = _lt_wide(n, _mul_wide(s, s))
+        if not over.any():
+            break
+        s -= over.astype(np.uint64)
+    while True:
+        under = ~_lt_wide(n, _mul_wide(s + _ONE, s + _ONE))
+        if not under.any():
+            break
+        s += under.astype(np.uint64)
+
+    return s
+
+
+def _div_wide(n, d):
+    """
+    floor(n / d) for 128-bit n and uint64 d > 0
+
+    returns the quotient and the mask of elements whose quotient is too large
+    """
+    q = np.floor(_to_float(n) / d)
+    overflow = q >= _QUOTIENT_BOUND
+    q = np.where(overflow, 0, q).astype(np.uint64)
+    n = np.where(overflow, 0, n[0]), np.where(overflow, 0, n[1])
+
+    # float correction with the remainder, then exact correction
+    for _ in range(4):
+        step = np.floor(_diff_to_float(n, _mul_wide(q, d)) / d).astype(np.int64)
+        if not step.any():
+            break
+        q = (q.astype(np.int64) + step).astype(np.uint64)
+    while True:
+        over = _lt_wide(n, _mul_wide(q, d))
+        if not over.any():
+            break
+        q -= over.astype(np.uint64)
+    while True:
+        under = ~_lt_wide(n, _mul_wide(q + _ONE, d))
+        if not under.any():
+            break
+        q += under.astype(np.uint64)
+
+    return q, overflow
+
+
+# uint64 path; every argument is an int64 array with |value| < SAFE_BOUND
+
+
+def _get_L_fast(x, y, round_up):
+    assert np.all(x > 0), "x Out of range"
+    assert np.all(y > 0), "y Out of range"
+
+    x = x.astype(np.uint64)
+    y = y.astype(np.uint64)
+
+    # y * y + 4 * x * y == y * (y + 4 * x), which fits in 128 bits
+    L = (_isqrt_wide(_mul_wide(y, y + (x << np.uint64(2)))) + y) >> _ONE
+
+    exact = _eq_wide(_mul_wide(L, L), _mul_wide(x + L, y))
+    if round_up:
+        L = L + (~exact).astype(np.uint64)
+
+    return (L.astype(np.int64),), np.zeros(len(L), dtype=bool)
+
+
+def _get_dx_fast(x, y, dy):
+    new_y = y + dy
+    assert np.all(new_y > 0), "new_y Out of range"
+
+    (L,), _ = _get_L_fast(x, y, True)
+    L = L.astype(np.uint64)
+    new_y = new_y.astype(np.uint64)
+
+    q, overflow = _div_wide(
+        _add_wide(_mul_wide(L, L), (np.zeros_like(L), new_y - _ONE)), new_y
+    )
+    new_x = np.maximum(1, q.astype(np.int64) - L.astype(np.int64))
+
+    return (new_x - x,), overflow
+
+
+def _get_dy_fast(x, y, dx):
+    new_x = x + dx
+    assert np.all(new_x > 0), "new_x Out of range"
+
+    (L,), _ = _get_L_fast(x, y, True)
+    L = L.astype(np.uint64)
+    d = new_x.astype(np.uint64) + L
+
+    # L**2 / (new_x + L) <= L, so the quotient never overflows
+    q, overflow = _div_wide(_add_wide(_mul_wide(L, L), (np.zeros_like(L), d - _ONE)), d)
+    new_y = q.astype(np.int64)
+    assert np.all(new_y[~overflow] > 0), "new_y Out of range"
+
+    return (new_y - y,), overflow
+
+
+# dispatch between the uint64 path and Python ints
+
+
+def _evaluate(fast, exact, args, *options):
+    """
+    evaluate fast on the elements within SAFE_BOUND and exact on the rest
+
+    fast returns (tuple of int64 arrays, overflow mask)
+    exact returns a tuple of Python ints
+    """
+    args = [np.asarray(a) for a in args]
+    args = [a if a.dtype.kind in "iu" else a.astype(object) for a in args]
+    args = np.broadcast_arrays(*args)
+    shape = args[0].shape
+    args = [a.ravel() for a in args]
+
+    safe = np.ones(len(args[0]), dtype=bool)
+    for a in args:
+        safe &= np.abs(a) < SAFE_BOUND
+    safe_index = np.flatnonzero(safe)
+
+    results = None
+    fallback = np.flatnonzero(~safe)
+    if len(safe_index):
+        fast_results, overflow = fast(
+            *[a[safe_index].astype(np.int64) for a in args], *options
+        )
+        results = [np.zeros(len(safe), dtype=np.int64) for _ in fast_results]
+        for r, fr in zip(results, fast_results):
+            r[safe_index] = fr
+        fallback = np.union1d(fallback, safe_index[overflow])
+
+    if len(fallback):
+        exact_results = list(
+            zip(*[exact(*[int(a[i]) for a in args], *options) for i in fallback])
+        )
+        if results is None:
+            results = [np.zeros(len(safe), dtype=np.int64) for _ in exact_results]
+        for k, values in enumerate(exact_results):
+            if any(v < -(1 << 63) or v >= 1 << 63 for v in values):
+                results[k] = np.array([int(v) for v in results[k]], dtype=object)
+            results[k][fallback] = values
+
+    return tuple(r.reshape(shape) for r in results)
+
+
+def get_L(x, y, round_up):
+    return _evaluate(
+        _get_L_fast, lambda x, y, r: (_get_L_exact(x, y, r),), (x, y), round_up
+    )[0]
+
+
+def get_dx(x, y, dy):
+    return _evaluate(_get_dx_fast, lambda *a: (_get_dx_exact(*a),), (x, y, dy))[0]
+
+
+def get_dy(x, y, dx):
+    return _evaluate(_get_dy_fast, lambda *a: (_get_dy_exact(*a),), (x, y, dx))[0]
+
+
+def quote_exact_input_single(x, y, amount_in, is_buy):
+    """
+    vectorized route_in_gm.quote_exact_input_single
+    """
+    if is_buy:
+        L = get_L(x, y, True)
+        dy = np.maximum(0, np.minimum(L - 1, amount_in))  # new_y in [1, L)
+        return -get_dx(x, y, dy)
+    else:
+        dx = np.maximum(0, amount_in)
+        return -get_dy(x, y, dx)
+
+
+def quote_exact_output_single(x, y, amount_out, is_buy):
+    """
+    vectorized route_in_gm.quote_exact_output_single
+    """
+    if is_buy:
+        dx = np.maximum(1 - np.asarray(x), -np.asarray(amount_out))
+        return get_dy(x, y, dx)
+    else:
+        assert np.all(np.asarray(y) - amount_out > 0), "y Out of range"
+        return get_dx(x, y, -np.asarray(amount_out))
+
+
+def swap(x, y, dx, dy):
+    """
+    vectorized route_in_gm.AMM.swap; returns the new reserves
+    """
+    new_x = np.asarray(x) + dx
+    new_y = np.asarray(y) + dy
+    assert np.all(new_x > 0), "x Out of range"
+    assert np.all(new_y > 0), "y Out of range"
+
+    old_L = get_L(x, y, True)
+    new_L = get_L(new_x, new_y, False)
+    assert np.all(new_L >= old_L), "L"
+
+    return new_x, new_y
+
+
+# liquidity provision, rounded in favor of the pool as PMAMM.vy
+
+
+def _mul_div_exact(a, b, d, round_up):
+    return (div_up(a * b, d) if round_up else a * b // d,)
+
+
+def _mul_div_fast(a, b, d, round_up):
+    assert np.all(d > 0), "d Out of range"
+    a, b, d = (v.astype(np.uint64) for v in (a, b, d))
+
+    n = _mul_wide(a, b)
+    if round_up:
+        n = _add_wide(n, (np.zeros_like(d), d - _ONE))
+    q, overflow = _div_wide(n, d)
+
+    return (q.astype(np.int64),), overflow
+
+
+def mul_div(a, b, d, round_up=False):
+    """
+    a * b / d rounded down (or up) without intermediate overflow
+    """
+    return _evaluate(_mul_div_fast, _mul_div_exact, (a, b, d), round_up)[0]
+
+
+def add_liquidity(x, y, supply, max_dx, max_dy):
+    """
+    vectorized PMAMM.add_liquidity; returns the LP tokens minted
+    and the amounts deposited, at most max_dx and max_dy
+    """
+    shares = np.minimum(mul_div(max_dx, supply, x), mul_div(max_dy, supply, y))
+    assert np.all(shares > 0), "Liquidity: zero shares"
+
+    return shares, mul_div(shares, x, supply, True), mul_div(shares, y, supply, True)
+
+
+def remove_liquidity(x, y, supply, shares):
+    """
+    vectorized PMAMM.remove_liquidity; returns the amounts withdrawn
+    """
+    dx = mul_div(shares, x, supply)
+    dy = mul_div(shares, y, supply)
+    assert np.all(dx < x) and np.all(dy < y), "Reserves: underflow"
+
+    return dx, dy
+
+
+def apply_liquidity(x, y, supply, pools, is_add, max_dx, max_dy, shares):
+    """
+    apply LP joins (is_add, depositing at most max_dx, max_dy) and exits
+    (burning shares) to many pools in one call, in order within each pool
+
+    operations are applied in rounds holding at most one operation per pool,
+    so the number of vectorized steps is the operation count of the busiest pool
+
+    returns the new x, y, supply of every pool, and the LP tokens minted or burned
+    and the amounts deposited or withdrawn by every operation
+    """
+    pools = np.asarray(pools)
+    is_add, max_dx, max_dy, shares = (
+        np.broadcast_to(v, pools.shape) for v in (is_add, max_dx, max_dy, shares)
+    )
+    state = [np.array(v) for v in (x, y, supply)]
+    if any(
+        v.dtype == object or np.any(v >= SAFE_BOUND)
+        for v in state + [max_dx, max_dy, shares]
+    ):
+        state = [v.astype(object) for v in state]
+    x, y, supply = state
+
+    # rank of every operation within its pool, and operations grouped by rank
+    order = np.argsort(pools, kind="stable")
+    first = np.searchsorted(pools[order], pools[order])
+    rank = np.empty(len(pools), dtype=np.int64)
+    rank[order] = np.arange(len(pools)) - first
+    by_rank = np.argsort(rank, kind="stable")
+    bounds = np.cumsum(np.bincount(rank))
+
+    out_shares, out_dx, out_dy = (np.zeros(len(pools), dtype=x.dtype) for _ in range(3))
+    for start, end in zip(np.concatenate([[0], bounds[:-1]]), bounds):
+        ops = by_rank[start:end]
+
+        add = ops[is_add[ops]]
+        if len(add):
+            p = pools[add]
+            s, dx, dy = add_liquidity(x[p], y[p], supply[p], max_dx[add], max_dy[add])
+            out_shares[add], out_dx[add], out_dy[add] = s, dx, dy
+            x[p] += dx
+            y[p] += dy
+            supply[p] += s
+
+        remove = ops[~is_add[ops]]
+        if len(remove):
+            p = pools[remove]
+            dx, dy = remove_liquidity(x[p], y[p], supply[p], shares[remove])
+            out_shares[remove], out_dx[remove], out_dy[remove] = shares[remove], dx, dy
+            x[p] -= dx
+            y[p] -= dy
+            supply[p] -= shares[remove]
+
+        # continue on Python ints before the int64 state can overflow
+        if x.dtype != object and max(x.max(), y.max(), supply.max()) >= SAFE_BOUND:
+            x, y, supply, out_shares, out_dx, out_dy = (
+                v.astype(object) for v in (x, y, supply, out_shares, out_dx, out_dy)
+            )
+
+    return (x, y, supply), (out_shares, out_dx, out_dy)
@@ -0,0 +1,115 @@
+"""
+TWAP oracle accumulators, vectorized across pools
+
+Every pool keeps the running integral of its price (and log price) over time,
+updated with the previous price whenever the price changes, and a ring buffer
+of (timestamp, cumulative) observations as in Uniswap V3. A time-weighted
+average over a window is the difference of two cumulative values divided by
+the window; the current cumulative is O(1), a past one a binary search over the
+ring buffer, run for all queried pools at once.
+"""
+
+import numpy as np
+
+
+class TWAPOracle:
+    def __init__(self, num_pools, initial_prices, cardinality=1024, start=0):
+        """
+        cardinality: observations kept per pool, bounding how far back queries reach
+        """
+        self.cardinality = cardinality
+        self.price = np.broadcast_to(
+            np.asarray(initial_prices, dtype=float), num_pools
+        ).copy()
+        assert np.all(self.price > 0), "price Out of range"
+        self.last = np.full(num_pools, start, dtype=float)
+        self.cumulative = np.zeros(num_pools)
+        self.log_cumulative = np.zeros(num_pools)
+
+        # ring buffer of observations, slot index[p] holds the latest of pool p
+        self.timestamps = np.full((cardinality, num_pools), start, dtype=float)
+        self.observations = np.zeros((cardinality, num_pools))
+        self.log_observations = np.zeros((cardinality, num_pools))
+        self.index = np.zeros(num_pools, dtype=np.int64)
+        self.count = np.ones(num_pools, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.price)
+
+    def update(self, ids, prices, t):
+        """
+        accumulate the current prices of pools ids up to t, then set their new prices;
+        one observation is written per pool and timestamp
+        """
+        ids = np.asarray(ids)
+        assert np.all(self.last[ids] <= t), "time goes backwards"
+        prices = np.broadcast_to(np.asarray(prices, dtype=float), ids.shape)
+        assert np.all(prices > 0), "price Out of range"
+
+        dt = t - self.last[ids]
+        self.cumulative[ids] += self.price[ids] * dt
+        self.log_cumulative[ids] += np.log(self.price[ids]) * dt
+
+        # a new slot when time moved, else the latest slot is rewritten
+        new = dt > 0
+        slot = np.where(new, (self.index[ids] + 1) % self.cardinality, self.index[ids])
+        self.timestamps[slot, ids] = t
+        self.observations[slot, ids] = self.cumulative[ids]
+        self.log_observations[slot, ids] = self.log_cumulative[ids]
+        self.index[ids] = slot
+        self.count[ids] = np.minimum(self.count[ids] + new, self.cardinality)
+
+        self.price[ids] = prices
+        self.last[ids] = t
+
+    def cumulative_at(self, ids, t, log=False):
+        """
+        integral of the price (or log price) of pools ids up to t
+        """
+        ids, t = np.broadcast_arrays(np.asarray(ids), np.asarray(t, dtype=float))
+        price = self.price[ids]
+        cumulative, observations = self.cumulative, self.observations
+        if log:
+            price = np.log(price)
+            cumulative, observations = self.log_cumulative, self.log_observations
+
+        # since the last update the price is the current one
+        result = cumulative[ids] + price * (t - self.last[ids])
+
+        past = np.flatnonzero(t < self.last[ids])
+        if len(past):
+            p, tp = ids[past], t[past]
+            oldest = self.index[p] - self.count[p] + 1
+            assert np.all(self.timestamps[oldest % self.cardinality, p] <= tp), (
+                "Oracle: observation too old"
+            )
+
+            # latest observation k at or before t, k counted from the oldest
+            lo = np.zeros(len(p), dtype=np.int64)
+            hi = self.count[p] - 1
+            while np.any(lo < hi):
+                mid = (lo + hi + 1) // 2
+                before = self.timestamps[(oldest + mid) % self.cardinality, p] <= tp
+                lo = np.where(before, mid, lo)
+                hi = np.where(before, hi, mid - 1)
+
+            # the price is constant between consecutive observations
+            k0 = (oldest + lo) % self.cardinality
+            k1 = (oldest + lo + 1) % self.cardinality
+            t0, t1 = self.timestamps[k0, p], self.timestamps[k1, p]
+            c0, c1 = observations[k0, p], observations[k1, p]
+            result[past] = c0 + (c1 - c0) * (tp - t0) / (t1 - t0)
+
+        return result
+
+    def twap(self, ids, window, t, geometric=False):
+        """
+        time-weighted average price of pools ids over [t - window, t],
+        arithmetic, or geometric from the log price accumulator
+        """
+        delta = self.cumulative_at(ids, t, geometric) - self.cumulative_at(
+            ids, np.asarray(t) - window, geometric
+        )
+        if geometric:
+            return np.exp(delta / window)
+        return delta / window
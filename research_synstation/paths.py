@@ -0,0 +1,380 @@
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+SECONDS_PER_YEAR = 365 * SECONDS_PER_DAY
+
+
+def to_outcome_price(P, strike, volatility, period, sigma_level):
+    """
+    fundamental value of UP token
+
+    log price range [log(strike) - k, log(strike) + k] is mapped linearly onto [0, 1]
+    where k = volatility * sqrt(period) * sigma_level
+    """
+    return np.clip(
+        0.5 * (1 + np.log(P / strike) / (volatility * np.sqrt(period) * sigma_level)),
+        0,
+        1,
+    )
+
+
+class PricePath:
+    """
+    GBM price of underlying asset, generated in chunks of blocks
+
+    the random walk W is carried across chunks, so concatenating the chunks
+    gives exactly the same path as generating the whole horizon at once
+    (i.e. chunk_size >= num_blocks) with the same seed
+    """
+
+    def __init__(
+        self,
+        initial_price,
+        volatility,  # daily volatility
+        block_time,  # seconds
+        period,  # days
+        chunk_size=1 << 16,  # blocks per chunk
+        seed=None,
+    ):
+        self.initial_price = initial_price
+        self.block_volatility = volatility * np.sqrt(block_time / SECONDS_PER_DAY)
+        self.num_blocks = int(period * SECONDS_PER_DAY / block_time)
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+        self.block = 0  # index of the next block to generate
+        self.W = 0.0  # log return of the last generated block
+
+    def __iter__(self):
+        while self.block < self.num_blocks:
+            yield self.next_chunk()
+
+    def next_chunk(self):
+        n = min(self.chunk_size, self.num_blocks - self.block)
+
+        # cumsum is sequential, so adding the carry to the first increment
+        # reproduces the single-shot rounding exactly
+        W = self.rng.normal(0, self.block_volatility, n)
+        W[0] += self.W
+        W.cumsum(out=W)
+
+        self.W = W[-1]
+        self.block += n
+
+        return self.initial_price * np.exp(W)
+
+
+class NoiseArrivals:
+    """
+    Poisson arrival of noise traders with Uniform(min_size, max_size) trade size
+
+    next_chunk(n) returns the number of trades in each of the next n blocks
+    and the sizes of those trades in order of arrival
+    """
+
+    def __init__(self, arrival_rate, min_size, max_size, seed=None):
+        self.arrival_rate = arrival_rate  # expected number of trades per block
+        self.min_size = min_size
+        self.max_size = max_size
+
+        # independent streams, so that chunking does not interleave the draws
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        arrival_seed, size_seed = seed.spawn(2)
+        self.arrival_rng = np.random.default_rng(arrival_seed)
+        self.size_rng = np.random.default_rng(size_seed)
+
+    def next_chunk(self, n):
+        arrivals = self.arrival_rng.poisson(self.arrival_rate, n)
+        trade_size = self.size_rng.uniform(self.min_size, self.max_size, arrivals.sum())
+
+        return arrivals, trade_size
+
+
+class CorrelatedPricePath:
+    """
+    GBM prices of several correlated underlying assets, generated in chunks of blocks
+
+    next_chunk() returns an array of shape (blocks, assets)
+    """
+
+    def __init__(
+        self,
+        initial_prices,
+        volatilities,  # daily volatility of each asset
+        correlation,  # correlation matrix of daily log returns
+        block_time,  # seconds
+        period,  # days
+        chunk_size=1 << 12,  # blocks per chunk
+        seed=None,
+    ):
+        self.initial_prices = np.asarray(initial_prices, dtype=float)
+        self.block_volatility = np.asarray(volatilities, dtype=float) * np.sqrt(
+            block_time / SECONDS_PER_DAY
+        )
+        self.cholesky = np.linalg.cholesky(np.asarray(correlation, dtype=float))
+        self.num_blocks = int(period * SECONDS_PER_DAY / block_time)
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+        self.block = 0  # index of the next block to generate
+        self.W = np.zeros(len(self.initial_prices))  # log returns of the last block
+
+    def __iter__(self):
+        while self.block < self.num_blocks:
+            yield self.next_chunk()
+
+    def next_chunk(self):
+        n = min(self.chunk_size, self.num_blocks - self.block)
+        k = len(self.initial_prices)
+
+        # correlate column by column instead of a BLAS matmul,
+        # so that the rounding of each row does not depend on the chunk size
+        Z = self.rng.standard_normal((n, k))
+        W = np.zeros((n, k))
+        for a in range(k):
+            for b in range(a + 1):
+                W[:, a] += self.cholesky[a, b] * Z[:, b]
+        W *= self.block_volatility
+        W[0] += self.W
+        W.cumsum(axis=0, out=W)
+
+        self.W = W[-1].copy()
+        self.block += n
+
+        return self.initial_prices * np.exp(W)
+
+
+class DirichletProbabilityPath:
+    """
+    external probabilities of n outcomes, generated in chunks of blocks
+
+    p_{t+1} ~ Dirichlet(concentration * p_t), a martingale on the simplex
+    whose per-block variance is p * (1 - p) / (concentration + 1)
+    """
+
+    def __init__(
+        self,
+        initial_probabilities,
+        concentration,
+        num_blocks,
+        chunk_size=1 << 12,  # blocks per chunk
+        seed=None,
+        min_probability=1e-6,  # keeps every alpha positive
+    ):
+        self.p = np.asarray(initial_probabilities, dtype=float)
+        self.concentration = concentration
+        self.num_blocks = num_blocks
+        self.chunk_size = chunk_size
+        self.min_probability = min_probability
+        self.rng = np.random.default_rng(seed)
+        self.block = 0  # index of the next block to generate
+
+    def __iter__(self):
+        while self.block < self.num_blocks:
+            yield self.next_chunk()
+
+    def next_chunk(self):
+        n = min(self.chunk_size, self.num_blocks - self.block)
+
+        P = np.empty((n, len(self.p)))
+        p = self.p
+        for i in range(n):
+            p = self.rng.dirichlet(
+                self.concentration * np.maximum(p, self.min_probability)
+            )
+            P[i] = p
+
+        self.p = p
+        self.block += n
+
+        return P
+
+
+class PriceReplay:
+    """
+    historical price of underlying asset, resampled to blocks in chunks
+
+    source is a tick file sorted by time:
+        .csv      read with pandas in chunks of read_size rows
+        .npy      memory-mapped array of shape (ticks, 2): timestamp, price
+    timestamps are seconds, or datetimes for csv
+
+    the price of a block is the last tick at or before the end of the block,
+    so only one chunk of ticks and one chunk of blocks are in memory at a time
+    """
+
+    def __init__(
+        self,
+        source,
+        block_time,  # seconds
+        chunk_size=1 << 16,  # blocks per chunk
+        read_size=1 << 20,  # ticks read at once
+        timestamp_column="timestamp",
+        price_column="price",
+        start=None,  # first block ends at start + block_time, default first tick
+        end=None,  # timestamp of the end of the replay, default last tick
+    ):
+        self.source = str(source)
+        self.block_time = block_time
+        self.chunk_size = chunk_size
+        self.read_size = read_size
+        self.timestamp_column = timestamp_column
+        self.price_column = price_column
+        self.start = start
+        self.end = end
+
+    def _read_ticks(self):
+        """
+        yield (timestamps, prices) arrays of consecutive ticks
+        """
+        if self.source.endswith(".npy"):
+            ticks = np.load(self.source, mmap_mode="r")
+            for i in range(0, len(ticks), self.read_size):
+                chunk = np.asarray(ticks[i : i + self.read_size], dtype=float)
+                yield chunk[:, 0], chunk[:, 1]
+        else:
+            import pandas as pd
+
+            for frame in pd.read_csv(
+                self.source,
+                usecols=[self.timestamp_column, self.price_column],
+                chunksize=self.read_size,
+            ):
+                yield self._to_arrays(frame)
+
+    def _to_arrays(self, frame):
+        import pandas as pd
+
+        timestamps = frame[self.timestamp_column]
+        if not pd.api.types.is_numeric_dtype(timestamps):
+            timestamps = pd.to_datetime(timestamps, utc=True, format="ISO8601")
+        if pd.api.types.is_datetime64_any_dtype(timestamps):
+            timestamps = (timestamps - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+        return (
+            timestamps.to_numpy(dtype=float),
+            frame[self.price_column].to_numpy(dtype=float),
+        )
+
+    def __iter__(self):
+        block_end = None  # end of the next block to emit
+        last_timestamp = None
+        last_price = None  # price carried from previous ticks
+        buffer = []  # blocks waiting to fill a chunk
+        buffered = 0
+
+        for timestamps, prices in self._read_ticks():
+            if block_end is None:
+                start = timestamps[0] if self.start is None else self.start
+                block_end = start + self.block_time
+
+            # blocks ending before the last tick are final, blocks ending at it
+            # may still receive ticks with the same timestamp from the next read
+            while block_end < timestamps[-1] and (
+                self.end is None or block_end <= self.end
+            ):
+                n = min(
+                    self.chunk_size - buffered,
+                    int(np.ceil((timestamps[-1] - block_end) / self.block_time)),
+                )
+                if self.end is not None:
+                    n = min(n, int((self.end - block_end) // self.block_time) + 1)
+                block_ends = block_end + self.block_time * np.arange(n)
+                index = np.searchsorted(timestamps, block_ends, side="right") - 1
+
+                # blocks before the first tick of this read keep the carried price
+                P = prices[np.maximum(index, 0)]
+                P[index < 0] = np.nan if last_price is None else last_price
+
+                buffer.append(P)
+                buffered += n
+                block_end += self.block_time * n
+                if buffered == self.chunk_size:
+                    yield self._flush(buffer)
+                    buffer, buffered = [], 0
+
+            last_timestamp = timestamps[-1]
+            last_price = prices[-1]
+            if self.end is not None and last_timestamp >= self.end:
+                break
+
+        if block_end is None:
+            return
+
+        # every tick up to the remaining blocks has been read
+        end = last_timestamp if self.end is None else self.end
+        while block_end <= end:
+            n = min(
+                self.chunk_size - buffered,
+                int((end - block_end) // self.block_time) + 1,
+            )
+            buffer.append(np.full(n, last_price))
+            buffered += n
+            block_end += self.block_time * n
+            if buffered == self.chunk_size:
+                yield self._flush(buffer)
+                buffer, buffered = [], 0
+
+        if buffered:
+            yield self._flush(buffer)
+
+    def _flush(self, buffer):
+        P = np.concatenate(buffer)
+        if np.isnan(P).any():
+            raise ValueError("blocks before the first tick have no price")
+        return P
+
+
+class CIRPath:
+    """
+    Cox-Ingersoll-Ross rate dr = speed * (mean - r) dt + volatility * sqrt(r) dW,
+    sampled exactly at every step and generated in chunks of steps for many paths
+
+    r_{t + dt} = c * X, X ~ noncentral chi-square(df, r_t * exp(-speed * dt) / c)
+    with c = volatility**2 * (1 - exp(-speed * dt)) / (4 * speed)
+    and df = 4 * speed * mean / volatility**2,
+    so the step can be hours or days without discretization bias
+    """
+
+    def __init__(
+        self,
+        initial_rate,  # scalar or one per path
+        mean,  # long-run mean
+        speed,  # mean reversion speed, per year
+        volatility,  # per sqrt(year)
+        step,  # seconds
+        num_steps,
+        num_paths=1,
+        chunk_size=1 << 12,  # steps per chunk
+        seed=None,
+    ):
+        dt = step / SECONDS_PER_YEAR
+        self.c = volatility**2 * (1 - np.exp(-speed * dt)) / (4 * speed)
+        self.df = 4 * speed * mean / volatility**2
+        self.decay = np.exp(-speed * dt)
+        self.r = np.broadcast_to(
+            np.asarray(initial_rate, dtype=float), num_paths
+        ).copy()
+        self.num_steps = num_steps
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+        self.step = 0  # index of the next step to generate
+
+    def __iter__(self):
+        while self.step < self.num_steps:
+            yield self.next_chunk()
+
+    def next_chunk(self):
+        """
+        rates at the end of the next steps, shape (steps, paths)
+        """
+        n = min(self.chunk_size, self.num_steps - self.step)
+
+        R = np.empty((n, len(self.r)))
+        r = self.r
+        for i in range(n):
+            r = self.c * self.rng.noncentral_chisquare(self.df, r * self.decay / self.c)
+            R[i] = r
+
+        self.r = r
+        self.step += n
+
+        return R
@@ -0,0 +1,336 @@
+"""
+Sums over all the pools of a market of trading the same amount of every outcome
+
+Routing O_i through complete sets trades the same amount d on every other pool,
+so every probe of a split search sums a quote over all j != i. For (X + L) * Y = L**2
+pools, with B = X + L, both directions reduce to one sum over the pools:
+
+    S(s) = sum_j L_j**2 / (B_j + s) - L_j**2 / B_j
+    sell d of every O_j: GM received = offset - S((1 - f) * d)
+    buy d of every O_j:  GM paid     = (S(-d) - offset) / (1 - f)
+    offset = sum_j Y_j - L_j**2 / B_j  (0 for float pools, rounding of integer pools)
+
+Pools are grouped in buckets of B on a geometric grid. Around the center c of a bucket,
+with u = (B - c) / c and w = c / (c + s),
+
+    L**2 / (B + s) - L**2 / B = 1 / c * sum_k L**2 * (-u)**k * (w**(k + 1) - 1)
+
+so a bucket only keeps the moments sum L**2 * (-u)**k of its pools, and S costs
+O(buckets * terms) however many pools the market has. |u| <= sqrt(ratio) - 1 and the
+series converges as (|u| * w)**k: always fast when selling (w <= 1), and buckets too
+close to the pole when buying (-s near B) are summed exactly over their pools.
+
+A pool change moves its moments in O(terms); moments are rebuilt from the pools
+after n updates, so rounding does not accumulate.
+
+The derivative of S comes from the same moments, so exact_output routes an exact
+output by equalizing the marginal rates of the pool and of complete sets,
+one monotone root in the amount through complete sets.
+"""
+
+import numpy as np
+
+LOG2_B_MIN = -64  # grid of B: [2**LOG2_B_MIN, 2**LOG2_B_MAX)
+LOG2_B_MAX = 192
+
+
+class PoolSum:
+    def __init__(
+        self, X, L, Y=None, fee_bps=0, ratio=2 ** (1 / 8), terms=10, max_rho=0.1
+    ):
+        """
+        X, L, Y: pool state, Y defaults to L**2 / (X + L)
+        ratio: growth of B from one bucket to the next
+        terms: terms of the series of a bucket
+        max_rho: buckets converging slower than max_rho**k are summed exactly
+        """
+        self.c = 1 - fee_bps / 10**4
+        self.log_ratio = np.log(ratio)
+        self.terms = terms
+        self.max_rho = max_rho
+        self.sqrt_ratio = np.sqrt(ratio)
+        self.dev = self.sqrt_ratio - 1  # bound of |u|
+
+        # grid of buckets, centers at the geometric middle
+        self.b_min = int(np.floor(LOG2_B_MIN * np.log(2) / self.log_ratio))
+        b_max = int(np.ceil(LOG2_B_MAX * np.log(2) / self.log_ratio))
+        self.center = np.exp((np.arange(self.b_min, b_max) + 0.5) * self.log_ratio)
+
+        self.X = np.array(X, dtype=float)
+        self.L = np.array(L, dtype=float)
+        self.Y = self.L**2 / (self.X + self.L) if Y is None else np.array(Y, float)
+        self._rebuild()
+
+    def __len__(self):
+        return len(self.X)
+
+    def _bucket(self, B):
+        assert np.all(B >= 2.0**LOG2_B_MIN) and np.all(B < 2.0**LOG2_B_MAX), (
+            "B Out of range"
+        )
+        b = np.floor(np.log(B) / self.log_ratio).astype(np.int64) - self.b_min
+        # floor of the log can land one bucket off at the edges
+        b -= B < self.center[b] / self.sqrt_ratio
+        b += B >= self.center[b] * self.sqrt_ratio
+        return b
+
+    def _moments(self, B, L, b):
+        """
+        L**2 * (-u)**k of every pool, shape (pools, terms)
+        """
+        u = B / self.center[b] - 1
+        return L[:, None] ** 2 * (-u[:, None]) ** np.arange(self.terms)
+
+    def _rebuild(self):
+        B = self.X + self.L
+        self.bucket = self._bucket(B)
+        self.moments = np.zeros((len(self.center), self.terms))
+        np.add.at(self.moments, self.bucket, self._moments(B, self.L, self.bucket))
+        self.count = np.bincount(self.bucket, minlength=len(self.center))
+        self.members = {}
+        for j, b in enumerate(self.bucket):
+            self.members.setdefault(b, set()).add(j)
+        self.offset = np.sum(self.Y - self.L**2 / B)
+        self.updates = 0
+        self._refresh()
+
+    def _refresh(self):
+        """
+        cache the buckets holding pools
+        """
+        self.active = np.flatnonzero(self.count)
+        self.active_center = self.center[self.active]
+        self.active_moments = self.moments[self.active]
+        # below this shift the series of a bucket converges slower than max_rho**k
+        self.active_pole = self.active_center * (self.dev / self.max_rho - 1)
+        self.smallest = None
+
+    def update(self, ids, X, L, Y=None):
+        """
+        set the state of the pools ids, O(terms) per pool
+        """
+        ids = np.atleast_1d(ids)
+        assert len(np.unique(ids)) == len(ids), "duplicate pool"
+        X = np.broadcast_to(np.asarray(X, dtype=float), ids.shape)
+        L = np.broadcast_to(np.asarray(L, dtype=float), ids.shape)
+        Y = L**2 / (X + L) if Y is None else np.broadcast_to(Y, ids.shape)
+
+        old_B = self.X[ids] + self.L[ids]
+        old_b = self.bucket[ids]
+        new_B = X + L
+        new_b = self._bucket(new_B)
+
+        np.add.at(self.moments, old_b, -self._moments(old_B, self.L[ids], old_b))
+        np.add.at(self.moments, new_b, self._moments(new_B, L, new_b))
+        np.add.at(self.count, old_b, -1)
+        np.add.at(self.count, new_b, 1)
+        self.offset += np.sum(Y - L**2 / new_B) - np.sum(
+            self.Y[ids] - self.L[ids] ** 2 / old_B
+        )
+        for j, b0, b1 in zip(ids, old_b, new_b):
+            if b0 != b1:
+                self.members[b0].discard(j)
+                self.members.setdefault(b1, set()).add(j)
+
+        self.X[ids] = X
+        self.L[ids] = L
+        self.Y[ids] = Y
+        self.bucket[ids] = new_b
+
+        self.updates += len(ids)
+        if self.updates >= len(self):
+            self._rebuild()
+        else:
+            self._refresh()
+
+    def _S(self, s, derivative=False):
+        """
+        S(s), or its derivative -sum_j L_j**2 / (B_j + s)**2, for every shift of s
+        """
+        s = np.asarray(s, dtype=float)
+        flat = s.reshape(-1, 1)
+        c = self.active_center
+
+        # buckets too close to the pole are summed exactly
+        exact = flat < self.active_pole
+        if exact.any():
+            flat_c = np.where(exact, 0, flat)
+        else:
+            flat_c = flat
+
+        log_w = -np.log1p(flat_c / c)[..., None]
+        k = np.arange(self.terms)
+        if derivative:
+            # dw / ds = -w**2 / c
+            powers = -(k + 1) * np.exp(log_w * (k + 2))
+            series = np.einsum("pbk,bk->pb", powers, self.active_moments) / c**2
+        else:
+            powers = np.expm1(log_w * (k + 1))
+            series = np.einsum("pbk,bk->pb", powers, self.active_moments) / c
+        total = np.where(exact, 0, series).sum(axis=1)
+
+        for p, q in zip(*np.nonzero(exact)):
+            j = np.fromiter(self.members[self.active[q]], dtype=np.int64)
+            total[p] += np.sum(self._S_pool(j, flat[p], derivative))
+
+        return total.reshape(s.shape)
+
+    def _S_pool(self, j, s, derivative=False):
+        """
+        the terms of S, or of its derivative, of the pools j
+        """
+        B = self.X[j] + self.L[j]
+        if derivative:
+            return -(self.L[j] ** 2) / (B + s) ** 2
+        return -(self.L[j] ** 2) * s / (B * (B + s))
+
+    def min_X(self, exclude=None):
+        """
+        smallest X of the pools other than exclude, cached until the next update
+        """
+        if self.smallest is None:
+            j = np.argpartition(self.X, min(1, len(self) - 1))[:2]
+            self.smallest = j[np.argsort(self.X[j])]
+        for j in self.smallest:
+            if j != exclude:
+                return self.X[j]
+        return np.inf
+
+    def sell(self, d, exclude=None):
+        """
+        GM received by selling d of every O_j, j != exclude
+        """
+        s = self.c * np.asarray(d, dtype=float)
+        total = self.offset - self._S(s)
+        if exclude is not None:
+            offset = self.Y[exclude] - self.L[exclude] ** 2 / (
+                self.X[exclude] + self.L[exclude]
+            )
+            total -= offset - self._S_pool(exclude, s)
+        return total
+
+    def buy(self, d, exclude=None):
+        """
+        GM paid for buying d of every O_j, j != exclude; d below every X_j
+        """
+        s = -np.asarray(d, dtype=float)
+        total = (self._S(s) - self.offset) / self.c
+        if exclude is not None:
+            offset = self.Y[exclude] - self.L[exclude] ** 2 / (
+                self.X[exclude] + self.L[exclude]
+            )
+            total -= (self._S_pool(exclude, s) - offset) / self.c
+        return total
+
+    def sell_marginal(self, d, exclude=None):
+        """
+        derivative of sell in d: GM received per O_j at the margin, summed
+        """
+        s = self.c * np.asarray(d, dtype=float)
+        total = -self.c * self._S(s, True)
+        if exclude is not None:
+            total += self.c * self._S_pool(exclude, s, True)
+        return total
+
+    def buy_marginal(self, d, exclude=None):
+        """
+        derivative of buy in d: GM paid per O_j at the margin, summed
+        """
+        s = -np.asarray(d, dtype=float)
+        total = -self._S(s, True) / self.c
+        if exclude is not None:
+            total += self._S_pool(exclude, s, True) / self.c
+        return total
+
+
+def _solve_increasing(phi, lo, hi, tolerance=1e-12, max_iterations=200):
+    """
+    root of phi increasing on [lo, hi] by false position (Illinois)
+    lo if phi(lo) >= 0, hi if phi(hi) <= 0
+    """
+    f_lo, f_hi = phi(lo), phi(hi)
+    if f_lo >= 0:
+        return lo
+    if f_hi <= 0:
+        return hi
+
+    side = 0
+    for _ in range(max_iterations):
+        if hi - lo <= tolerance * max(1, abs(hi)):
+            break
+        x = hi - f_hi * (hi - lo) / (f_hi - f_lo)
+        if not lo < x < hi:
+            x = (lo + hi) / 2
+        f = phi(x)
+        if f == 0:
+            return x
+        if f < 0:
+            lo, f_lo = x, f
+            if side == -1:
+                f_hi /= 2
+            side = -1
+        else:
+            hi, f_hi = x, f
+            if side == 1:
+                f_lo /= 2
+            side = 1
+    return (lo + hi) / 2
+
+
+def exact_output(pools, i, amount_out, is_buy, precision=1e-6):
+    """
+    route an exact output of outcome i through its pool and complete sets
+
+    is_buy: receive amount_out O_i for the least GM
+        b of them are minted and the other O_j sold, the rest bought on pool i
+    else: receive amount_out GM for the least O_i
+        b of them are burnt with O_j bought, the rest sold on pool i
+
+    the cost is convex in b, so the optimal b is the root of its derivative,
+    where the marginal rates of both paths are equal; every probe sums over
+    the other pools through pools (a PoolSum)
+
+    return: amount in (GM for buys, O_i for sells), b
+    """
+    X, L, Y, c = pools.X[i], pools.L[i], pools.Y[i], pools.c
+    B = X + L
+
+    if is_buy:
+        # pool i can not give more than its X
+        lo = max(0.0, amount_out - X * (1 - precision))
+
+        def phi(b):
+            a = amount_out - b
+            return 1 - pools.sell_marginal(b, exclude=i) - L**2 / ((B - a) ** 2 * c)
+
+        b = _solve_increasing(phi, lo, amount_out)
+        a = amount_out - b
+        amount_in = (L**2 / (B - a) - Y) / c + b - pools.sell(b, exclude=i)
+        return float(amount_in), float(b)
+
+    def h(b):
+        # GM of burning b complete sets, buying the other O_j
+        return b - pools.buy(b, exclude=i)
+
+    def a_of(b):
+        # O_i sold on pool i for the GM not covered by burning
+        g = amount_out - h(b)
+        if g >= Y:
+            return np.inf
+        return max(0.0, (L**2 / (Y - g) - B) / c)
+
+    def phi(b):
+        return c * L**2 / (B + c * a_of(b)) ** 2 - (
+            1 - pools.buy_marginal(b, exclude=i)
+        )
+
+    # the other pools can not give more than their X
+    hi = max(0.0, pools.min_X(exclude=i) - precision)
+    b = _solve_increasing(phi, 0.0, hi)
+    if h(b) > amount_out:
+        # burning alone pays more than amount_out before the rates are equal
+        b = _solve_increasing(lambda b: h(b) - amount_out, 0.0, b)
+
+    a = a_of(b)
+    assert np.isfinite(a), "amount_out Out of range"
+    return float(a + b), float(b)
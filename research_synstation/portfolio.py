@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class BinaryMarketPortfolio:
+    """
+    Many BinaryMarkets with vectorized state
+
+    pool state is stored in arrays of shape (markets, 2),
+    column 0 is the YES pool and column 1 is the NO pool.
+    every operation is the elementwise version of amm.AMM / amm.BinaryMarket,
+    so the cost of a block scales with the array size, not with the number of markets
+    """
+
+    def __init__(self, bids, fee_rates):
+        """
+        (X + L) * Y = L**2
+        always initialized with 0.5 / 0.5 probabilities
+        """
+        bids = np.asarray(bids, dtype=float)
+        p = 0.5
+
+        self.X = np.repeat(bids[:, None] / 2, 2, axis=1)
+        self.L = self.X * np.sqrt(p) / (1 - np.sqrt(p))
+        self.Y = self.X * p / (1 - np.sqrt(p))
+        self.fee_bps = np.asarray(fee_rates, dtype=float)[:, None]
+        self.noise_fee = np.zeros_like(self.X)
+        self.arb_fee = np.zeros_like(self.X)
+
+    def __len__(self):
+        return len(self.X)
+
+    def get_value(self, P_ext):
+        P_ext = np.asarray(P_ext, dtype=float)
+        return (
+            self.Y[:, 0]
+            + self.X[:, 0] * P_ext
+            + self.Y[:, 1]
+            + self.X[:, 1] * (1 - P_ext)
+        )
+
+    def noise_trade(self, dy, choice, mask):
+        """
+        trade dy amount of token Y on the markets in mask
+
+        choice: 0 YES buy, 1 YES sell, 2 NO buy, 3 NO sell
+        (same meaning as the quartiles of np.random.rand() in BinaryMarket.noise_trade)
+        """
+        rows = np.flatnonzero(mask)
+        cols = choice[rows] // 2
+        sign = np.where(choice[rows] % 2 == 0, 1.0, -1.0)
+
+        Y = self.Y[rows, cols]
+        L = self.L[rows, cols]
+        new_Y = np.clip(Y + sign * dy[rows], 1, L)
+        new_X = L**2 / new_Y - L
+
+        self.noise_fee[rows, cols] += np.abs(new_Y - Y) * self.fee_bps[rows, 0] / 10000
+        self.X[rows, cols] = new_X
+        self.Y[rows, cols] = new_Y
+
+    def arbitrage(self, P_ext, mask=None):
+        """
+        Arbitrageur moves the price of every pool in mask
+        to the edge of the no-arbitrage band around P_ext (YES) and 1 - P_ext (NO)
+        """
+        P_ext = np.stack([P_ext, 1 - P_ext], axis=1)
+        fee = 1 + self.fee_bps / 10000
+        P = self.Y / (self.X + self.L)
+
+        buy = P_ext > P * fee
+        sell = P_ext * fee < P
+        move = buy | sell
+        if mask is not None:
+            move &= mask[:, None]
+
+        new_P = np.where(buy, P_ext / fee, P_ext * fee)
+        new_Y = np.clip(self.L * np.sqrt(new_P), 1, self.L)
+        new_X = self.L**2 / new_Y - self.L
+
+        self.arb_fee += np.where(move, np.abs(new_Y - self.Y) * self.fee_bps / 10000, 0)
+        self.X = np.where(move, new_X, self.X)
+        self.Y = np.where(move, new_Y, self.Y)
+
+    def total_noise_fee(self):
+        return self.noise_fee.sum(axis=1)
+
+    def total_arb_fee(self):
+        return self.arb_fee.sum(axis=1)
@@ -0,0 +1,267 @@
+"""
+Asyncio quote server over amm.OutcomeMarket routing
+
+JSON over HTTP/1.1 (keep-alive):
+    POST /quote  {"market", "outcome", "amount", "is_buy"} -> {"amount", "split", "version"}
+    POST /swap   {"market", "outcome", "amount", "is_buy"} -> {"amount", "version"}
+    GET  /stats  -> request counts, batches, cache hits and latency percentiles (ms)
+
+Concurrent quotes of the same market, outcome and direction arriving within
+batch_window are evaluated together by one vectorized optimal split search.
+Results are cached per market until a swap changes that market's state,
+keeping the cache_size most recently used quotes of each market.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from research_synstation import amm
+
+
+class QuoteServer:
+    def __init__(
+        self,
+        markets,
+        batch_window=0.001,
+        latency_samples=1 << 14,
+        cache_size=1 << 12,  # quotes kept per market
+    ):
+        self.markets = markets  # market id -> amm.OutcomeMarket
+        self.batch_window = batch_window  # seconds
+        self.cache_size = cache_size
+        self.versions = {market_id: 0 for market_id in markets}
+        # market id -> (outcome, is_buy, amount) -> quote, least recently used first
+        self.cache = {market_id: OrderedDict() for market_id in markets}
+        self.pending = {}  # (market, outcome, is_buy) -> [(amount, future)]
+        self.latencies = deque(maxlen=latency_samples)
+        self.requests = 0
+        self.batches = 0
+        self.cache_hits = 0
+        self.server = None
+
+    # routing
+
+    async def quote(self, market_id, outcome, amount, is_buy):
+        """
+        GM paid (buy) or received (sell) for amount of O_outcome, and its split
+        """
+        market = self.markets[market_id]
+        if not 0 <= outcome < len(market):
+            raise ValueError("outcome Out of range")
+        if not amount > 0:
+            raise ValueError("amount Out of range")
+
+        cache = self.cache[market_id]
+        cached = cache.get((outcome, is_buy, amount))
+        if cached is not None:
+            cache.move_to_end((outcome, is_buy, amount))
+            self.cache_hits += 1
+            return cached
+
+        key = (market_id, outcome, is_buy)
+        future = asyncio.get_running_loop().create_future()
+        if key not in self.pending:
+            self.pending[key] = []
+            asyncio.get_running_loop().call_later(self.batch_window, self._flush, key)
+        self.pending[key].append((amount, future))
+        return await future
+
+    def _flush(self, key):
+        """
+        evaluate every pending quote of key with one vectorized search
+        """
+        requests = self.pending.pop(key)
+        market_id, outcome, is_buy = key
+        market = self.markets[market_id]
+        self.batches += 1
+
+        amounts = np.unique([amount for amount, _ in requests])
+        try:
+            split = market.find_optimal_split(outcome, amounts, is_buy)
+            dy = market.quote(outcome, amounts, split, is_buy)
+        except (ValueError, AssertionError) as e:
+            # amounts the market cannot fill, answered with 400
+            self._fail(requests, e)
+            return
+        except BaseException:
+            # answer the waiting requests with 500, the loop logs the error
+            self._fail(requests, RuntimeError("quote failed"))
+            raise
+
+        version = self.versions[market_id]
+        quotes = {
+            float(amount): {"amount": float(d), "split": float(s), "version": version}
+            for amount, s, d in zip(amounts, split, dy)
+        }
+        cache = self.cache[market_id]
+        for amount, quote in quotes.items():
+            cache[(outcome, is_buy, amount)] = quote
+            cache.move_to_end((outcome, is_buy, amount))
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+        for amount, future in requests:
+            if not future.done():
+                future.set_result(quotes[amount])
+
+    @staticmethod
+    def _fail(requests, error):
+        for _, future in requests:
+            if not future.done():
+                future.set_exception(error)
+
+    def swap(self, market_id, outcome, amount, is_buy):
+        """
+        execute a trade and drop the cached quotes of the market
+        """
+        market = self.markets[market_id]
+        if not 0 <= outcome < len(market):
+            raise ValueError("outcome Out of range")
+        if not amount > 0:
+            raise ValueError("amount Out of range")
+
+        if is_buy:
+            dy = market.buy(outcome, amount)
+        else:
+            dy = market.sell(outcome, amount)
+
+        self.versions[market_id] += 1
+        self.cache[market_id] = OrderedDict()
+        return {"amount": float(dy), "version": self.versions[market_id]}
+
+    def stats(self):
+        stats = {
+            "requests": self.requests,
+            "batches": self.batches,
+            "cache_hits": self.cache_hits,
+        }
+        if self.latencies:
+            p50, p90, p99, p999 = np.percentile(self.latencies, [50, 90, 99, 99.9])
+            stats.update(
+                latency_ms={
+                    "p50": p50 * 1e3,
+                    "p90": p90 * 1e3,
+                    "p99": p99 * 1e3,
+                    "p99.9": p999 * 1e3,
+                    "max": max(self.latencies) * 1e3,
+                }
+            )
+        return stats
+
+    # HTTP
+
+    async def _dispatch(self, method, path, body):
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+
+        if method == "POST" and path in ("/quote", "/swap"):
+            request = json.loads(body)
+            args = (
+                request["market"],
+                int(request["outcome"]),
+                float(request["amount"]),
+                bool(request["is_buy"]),
+            )
+            if args[0] not in self.markets:
+                return 404, {"error": "unknown market"}
+            if path == "/quote":
+                return 200, await self.quote(*args)
+            return 200, self.swap(*args)
+
+        return 404, {"error": "not found"}
+
+    async def _read_request(self, reader):
+        """
+        return (start, method, path, body) of the next request, None at end of stream;
+        raise ValueError on a malformed request line or Content-Length
+        """
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        start = time.perf_counter()
+        method, path, _ = request_line.decode().split(" ", 2)
+
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length < 0:
+            raise ValueError("content-length Out of range")
+        return start, method, path, await reader.readexactly(length)
+
+    async def _respond(self, writer, status, response):
+        payload = json.dumps(response).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode()
+            + payload
+        )
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ValueError as e:
+                    # the stream can not be framed past a malformed request
+                    await self._respond(writer, 400, {"error": f"bad request: {e}"})
+                    break
+                if request is None:
+                    break
+                start, method, path, body = request
+
+                try:
+                    status, response = await self._dispatch(method, path, body)
+                except (KeyError, TypeError, ValueError, AssertionError) as e:
+                    status, response = 400, {"error": str(e)}
+                except RuntimeError as e:
+                    status, response = 500, {"error": str(e)}
+                await self._respond(writer, status, response)
+
+                self.requests += 1
+                if path != "/stats":
+                    self.latencies.append(time.perf_counter() - start)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8000):
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def serve(markets, host, port, batch_window):
+    server = QuoteServer(markets, batch_window)
+    port = await server.start(host, port)
+    print(f"serving {len(markets)} markets on http://{host}:{port}")
+    await server.server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="quote server of outcome markets")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--batch-window", type=float, default=0.001)
+    parser.add_argument("--outcomes", type=int, nargs="+", default=[2, 5, 10, 30])
+    parser.add_argument("--fee-bps", type=float, default=30)
+    args = parser.parse_args()
+
+    # one market with uniform probabilities for each number of outcomes
+    _markets = {
+        str(i): amm.OutcomeMarket(10_000, np.full(n, 1 / n), args.fee_bps)
+        for i, n in enumerate(args.outcomes)
+    }
+    asyncio.run(serve(_markets, args.host, args.port, args.batch_window))
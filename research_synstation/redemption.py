@@ -0,0 +1,309 @@
+"""
+GM redemptions against debt positions ordered by user-set interest rate,
+following Liquity V2: redemptions hit the lowest-rate positions first
+
+Rates are set on ticks. Interest is simple since a position was last touched and
+compounds when it is touched, so the debt of tick b at time t is linear in t,
+A_b + B_b * t with A_b = sum(d_i * (1 - r_b * t_i)) and B_b = r_b * sum(d_i).
+Fenwick trees over A, B and the number of positions per tick give the debt ahead
+of any rate and the first non-empty tick in O(log n) at any time, without
+touching the positions, and a redemption drains the k positions it hits in
+O(k log n). Within a tick, positions are redeemed in the order they arrived.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from research_synstation.paths import SECONDS_PER_YEAR
+
+
+class Fenwick:
+    """
+    prefix sums over a fixed number of slots
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0.0] * (size + 1)
+
+    def add(self, i, delta):
+        i += 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """
+        sum of slots [0, i)
+        """
+        total = 0.0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def search(self, target):
+        """
+        smallest i with prefix(i + 1) > target, for non-negative slots
+        """
+        i = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            if i + step <= self.size and self.tree[i + step] <= target:
+                i += step
+                target -= self.tree[i]
+            step >>= 1
+        return i
+
+
+class RedemptionIndex:
+    def __init__(
+        self, num_positions, tick=0.001, max_rate=1.0, fee_rate=0.005, GM=None
+    ):
+        """
+        tick: rate granularity, per year
+        fee_rate: share of the redeemed value kept by the redeemed positions
+        GM: GoodMoney minting borrowed GM and interest, and burning repaid
+            and redeemed GM
+        """
+        self.tick = tick
+        self.num_ticks = round(max_rate / tick) + 1
+        self.fee_rate = fee_rate
+        self.GM = GM
+
+        self.coll = np.zeros(num_positions)
+        self.debt = np.zeros(num_positions)  # recorded at last_update
+        self.last_update = np.zeros(num_positions)
+        self.bucket = np.zeros(num_positions, dtype=np.int64)  # rate tick
+        self.active = np.zeros(num_positions, dtype=bool)
+        self.version = np.zeros(num_positions, dtype=np.int64)
+
+        self.queues = [deque() for _ in range(self.num_ticks)]  # (id, version)
+        self.rates = np.arange(self.num_ticks) * tick / SECONDS_PER_YEAR
+        self.A = Fenwick(self.num_ticks)
+        self.B = Fenwick(self.num_ticks)
+        self.count = Fenwick(self.num_ticks)
+        # sum of A_b, B_b and of r_b * A_b, r_b * B_b for the average rate
+        self.sums = np.zeros(4)
+        self.minted_debt = 0.0  # total debt already minted as GM
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    # views
+
+    def rate(self, ids):
+        """
+        interest rate of positions, per year
+        """
+        return self.bucket[ids] * self.tick
+
+    def debt_of(self, ids, t):
+        b = self.bucket[ids]
+        return self.debt[ids] * (1 + self.rates[b] * (t - self.last_update[ids]))
+
+    def total_debt(self, t):
+        return self.sums[0] + self.sums[1] * t
+
+    def average_rate(self, t):
+        """
+        debt-weighted average interest rate, per year
+        """
+        total = self.total_debt(t)
+        if total == 0:
+            return 0.0
+        return (self.sums[2] + self.sums[3] * t) / total * SECONDS_PER_YEAR
+
+    def debt_ahead(self, rate, t):
+        """
+        debt redeemed before a position at rate, on ticks below it
+        """
+        b = self._tick(rate)
+        return self.A.prefix(b) + self.B.prefix(b) * t
+
+    def redemption_rate(self, amount, t):
+        """
+        highest rate hit by a redemption of amount, without executing it
+        """
+        # descend both trees at once on the debt A + B * t
+        A, B = self.A.tree, self.B.tree
+        i = 0
+        step = 1 << self.num_ticks.bit_length()
+        while step:
+            if i + step <= self.num_ticks and A[i + step] + B[i + step] * t < amount:
+                i += step
+                amount -= A[i] + B[i] * t
+            step >>= 1
+        return min(i, self.num_ticks - 1) * self.tick
+
+    # index
+
+    def _tick(self, rate):
+        b = np.round(np.asarray(rate) / self.tick).astype(np.int64)
+        assert np.all((b >= 0) & (b < self.num_ticks)), "rate Out of range"
+        return b
+
+    def _update_ticks(self, ids, sign):
+        """
+        add (sign=1) or remove (sign=-1) the recorded debts of ids from their ticks
+        """
+        b = self.bucket[ids]
+        r = self.rates[b]
+        a = sign * self.debt[ids] * (1 - r * self.last_update[ids])
+        s = sign * self.debt[ids] * r
+        ticks, inverse = np.unique(b, return_inverse=True)
+        a_tick = np.bincount(inverse, a, len(ticks))
+        s_tick = np.bincount(inverse, s, len(ticks))
+        n_tick = np.bincount(inverse, minlength=len(ticks)) * sign
+        for tick, da, db, dn in zip(
+            ticks.tolist(), a_tick.tolist(), s_tick.tolist(), n_tick.tolist()
+        ):
+            self.A.add(tick, da)
+            self.B.add(tick, db)
+            self.count.add(tick, dn)
+        self.sums += [a.sum(), s.sum(), (r * a).sum(), (r * s).sum()]
+
+    def _enqueue(self, ids):
+        self.version[ids] += 1
+        for i, b, v in zip(
+            ids.tolist(), self.bucket[ids].tolist(), self.version[ids].tolist()
+        ):
+            self.queues[b].append((i, v))
+
+    def _sync_GM(self, t, change=0.0):
+        """
+        mint the accrued interest and the borrowed (positive)
+        or burn the repaid (negative) GM
+        """
+        interest = self.total_debt(t) - change - self.minted_debt
+        self.minted_debt = self.total_debt(t)
+        if self.GM is None:
+            return
+        if interest + change > 0:
+            self.GM.mint(interest + change, t)
+        elif interest + change < 0:
+            self.GM.burn(-(interest + change), t)
+
+    def _touch(self, ids, t):
+        """
+        compound the interest of ids and take them out of their ticks
+        """
+        self._update_ticks(ids, -1)
+        self.debt[ids] = self.debt_of(ids, t)
+        self.last_update[ids] = t
+
+    # positions, on arrays of unique position ids
+
+    def open(self, ids, coll, debt, rates, t):
+        ids = np.asarray(ids)
+        assert len(np.unique(ids)) == len(ids), "duplicate position"
+        assert not np.any(self.active[ids]), "Position is active"
+        debt = np.broadcast_to(np.asarray(debt, dtype=float), ids.shape)
+        assert np.all(debt > 0), "debt Out of range"
+
+        self.coll[ids] = coll
+        self.debt[ids] = debt
+        self.last_update[ids] = t
+        self.bucket[ids] = np.broadcast_to(self._tick(rates), ids.shape)
+        self.active[ids] = True
+        self._update_ticks(ids, 1)
+        self._enqueue(ids)
+        self._sync_GM(t, debt.sum())
+
+    def adjust(self, ids, coll_change, debt_change, t):
+        """
+        add (positive) or withdraw (negative) collateral and debt
+        """
+        ids = np.asarray(ids)
+        assert len(np.unique(ids)) == len(ids), "duplicate position"
+        assert np.all(self.active[ids]), "Position is not active"
+        self._touch(ids, t)
+        coll = self.coll[ids] + coll_change
+        debt = self.debt[ids] + debt_change
+        assert np.all(coll >= 0) and np.all(debt > 0), "amount Out of range"
+
+        self.coll[ids] = coll
+        self.debt[ids] = debt
+        self._update_ticks(ids, 1)
+        self._sync_GM(t, np.sum(debt_change))
+
+    def set_rate(self, ids, rates, t):
+        """
+        move positions to new rates, at the back of their new ticks
+        """
+        ids = np.asarray(ids)
+        assert len(np.unique(ids)) == len(ids), "duplicate position"
+        assert np.all(self.active[ids]), "Position is not active"
+        self._touch(ids, t)
+        self.bucket[ids] = np.broadcast_to(self._tick(rates), ids.shape)
+        self._update_ticks(ids, 1)
+        self._enqueue(ids)
+        self._sync_GM(t)
+
+    def close(self, ids, t):
+        """
+        return the collateral released and the debt repaid
+        """
+        ids = np.asarray(ids)
+        assert len(np.unique(ids)) == len(ids), "duplicate position"
+        assert np.all(self.active[ids]), "Position is not active"
+        self._touch(ids, t)
+        coll, debt = self.coll[ids].copy(), self.debt[ids].copy()
+
+        self.coll[ids] = 0
+        self.debt[ids] = 0
+        self.active[ids] = False
+        self.version[ids] += 1
+        self._sync_GM(t, -debt.sum())
+        return coll, debt
+
+    def redeem(self, amount, price, t):
+        """
+        burn up to amount of GM against the lowest-rate debt
+        for collateral worth amount * (1 - fee_rate) at price;
+        fully redeemed positions are closed, their remaining collateral kept in coll
+
+        returns the GM redeemed, the collateral paid and the ids hit
+        """
+        remaining = amount
+        paid = 0.0
+        hit = []
+        while remaining > 0 and self.count.prefix(self.num_ticks) > 0:
+            queue = self.queues[self.count.search(0)]
+
+            # positions of the lowest tick fully redeemed, then the partial one
+            ids = []
+            full = 0
+            while queue and remaining > 0:
+                i, v = queue[0]
+                if v != self.version[i]:
+                    queue.popleft()
+                    continue
+                debt = self.debt_of(i, t)
+                ids.append(i)
+                if debt > remaining:
+                    break
+                remaining -= debt
+                queue.popleft()
+                full += 1
+
+            ids = np.array(ids, dtype=np.int64)
+            self._touch(ids, t)
+            redeemed = self.debt[ids].copy()
+            if len(ids) > full:
+                redeemed[-1] = remaining
+                remaining = 0.0
+            coll = np.minimum(redeemed * (1 - self.fee_rate) / price, self.coll[ids])
+
+            self.debt[ids] -= redeemed
+            self.coll[ids] -= coll
+            self.active[ids[:full]] = False
+            self.version[ids[:full]] += 1
+            self.debt[ids[:full]] = 0
+            self._update_ticks(ids[full:], 1)
+            paid += coll.sum()
+            hit.extend(ids.tolist())
+
+        self._sync_GM(t, -(amount - remaining))
+        return amount - remaining, paid, np.array(hit, dtype=np.int64)
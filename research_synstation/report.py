@@ -0,0 +1,172 @@
+"""
+Headless report rendering
+
+Figures and tables are rendered by a pool of worker processes with the Agg
+backend, so a report over many sweep outputs is not bound by one matplotlib.
+Every job is a module-level function and its keyword arguments:
+
+    figure: func(path=..., **kwargs) saves a figure to path
+    table:  func(**kwargs) returns (headers, rows) or a dict of metrics
+
+Long trajectories are reduced by decimate before plotting: the minimum and
+maximum of every bucket of consecutive samples are kept, so spikes and
+drawdowns stay visible where striding would drop them. Trajectories given as
+.npy paths are memory-mapped in the worker instead of pickled to it.
+"""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+
+def decimate(y, max_points=4000, x=None):
+    """
+    min/max downsampling of a trajectory to at most max_points points
+
+    return: x, y of the first and last points and of the minimum and maximum
+    of every bucket, in their original order
+    """
+    assert max_points >= 4, "max_points Out of range"
+    y = np.asarray(y)
+    x = np.arange(len(y)) if x is None else np.asarray(x)
+    n = len(y)
+    if n <= max_points:
+        return x, y
+
+    size = -(-n // ((max_points - 2) // 2))  # samples per bucket
+    buckets = -(-n // size)
+    # pad the last bucket with the last sample, never chosen over the sample itself
+    blocks = np.concatenate([y, np.full(buckets * size - n, y[-1])])
+    blocks = blocks.reshape(buckets, size)
+    starts = np.arange(buckets) * size
+
+    index = np.unique(
+        np.concatenate(
+            [
+                [0, n - 1],
+                starts + blocks.argmin(axis=1),
+                starts + blocks.argmax(axis=1),
+            ]
+        )
+    )
+    index = index[index < n]
+    return x[index], y[index]
+
+
+def _load(a):
+    """
+    .npy paths are memory-mapped, so only the decimated points are read in full
+    """
+    if isinstance(a, (str, Path)):
+        return np.load(a, mmap_mode="r")
+    return np.asarray(a)
+
+
+def plot_series(
+    path, series, title="", xlabel="", ylabel="", max_points=4000, logy=False
+):
+    """
+    line plot of decimated trajectories
+
+    series: label -> y or (x, y), arrays or .npy paths;
+    a 2-D y is one line per row, e.g. the scenarios of a sweep
+    """
+    import matplotlib.pyplot as plt  # slow to import, only needed for plotting
+
+    plt.figure(figsize=(8, 6))
+    for label, y in series.items():
+        x = None
+        if isinstance(y, tuple):
+            x, y = y
+            x = _load(x)
+        y = _load(y)
+
+        rows = [y] if y.ndim == 1 else y
+        for i, row in enumerate(rows):
+            row_x = x if x is None or x.ndim == 1 else x[i]
+            plt.plot(
+                *decimate(row, max_points, row_x),
+                label=label if y.ndim == 1 else f"{label}[{i}]",
+                linewidth=0.8,
+            )
+
+    if logy:
+        plt.yscale("log")
+    plt.grid(True)
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.legend()
+    plt.savefig(path)
+    plt.close()
+
+
+def write_table(path, table):
+    """
+    write (headers, rows) or a dict of metrics as a markdown table
+    """
+    from tabulate import tabulate
+
+    if isinstance(table, dict):
+        headers, rows = ["Metric", "Value"], list(table.items())
+    else:
+        headers, rows = table
+    Path(path).write_text(tabulate(rows, headers=headers, tablefmt="github") + "\n")
+
+
+def _init_worker(path):
+    # render without a display, and import the jobs as the parent does
+    import matplotlib
+
+    matplotlib.use("Agg")
+    sys.path.extend(p for p in path if p not in sys.path)
+
+
+def _render(kind, func, kwargs, path):
+    if kind == "figure":
+        func(path=path, **kwargs)
+    else:
+        write_table(path, func(**kwargs))
+    return path
+
+
+def render_report(out_dir, figures=None, tables=None, max_workers=None):
+    """
+    render figures (name.png) and tables (name.md) into out_dir in parallel,
+    then write out_dir/report.md linking every figure and including every table
+
+    figures, tables: name -> (func, kwargs)
+    return: paths of the figures and tables, in the order given
+    """
+    figures = figures or {}
+    tables = tables or {}
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = [
+        ("figure", func, kwargs, out_dir / f"{name}.png")
+        for name, (func, kwargs) in figures.items()
+    ] + [
+        ("table", func, kwargs, out_dir / f"{name}.md")
+        for name, (func, kwargs) in tables.items()
+    ]
+
+    with ProcessPoolExecutor(
+        max_workers, initializer=_init_worker, initargs=(list(sys.path),)
+    ) as executor:
+        futures = [executor.submit(_render, *job) for job in jobs]
+        for future in as_completed(futures):
+            future.result()
+
+    lines = ["# SynStation Research Report", ""]
+    for kind, _, _, path in jobs:
+        lines += [f"## {path.stem}", ""]
+        if kind == "figure":
+            lines += [f"![{path.stem}]({path.name})", ""]
+        else:
+            lines += [path.read_text()]
+    (out_dir / "report.md").write_text("\n".join(lines))
+
+    return [path for _, _, _, path in jobs]
@@ -0,0 +1,124 @@
+"""
+Sync PMAMM reserves into array-backed pool state
+
+ReserveReader calls src/ReserveReader.vy with batches of pool addresses
+(MAX_POOLS per eth_call) and unpacks the _unpack layout, x = packed >> 128 and
+y = packed & (2**128 - 1), into arrays ready for int_amm.
+
+Two backends share the interface call(batches) -> list of [[packed, fee_rate]]:
+    from_contract: a boa / moccasin contract, e.g. on the in-process pyevm network
+    from_web3: a JSON-RPC endpoint; all batches go out as one JSON-RPC batch
+               over a pooled HTTP session
+"""
+
+import numpy as np
+
+from research_synstation import int_amm
+
+MAX_POOLS = 256  # ReserveReader.vy
+MASK128 = (1 << 128) - 1
+
+
+def unpack(packed):
+    """
+    x and y of packed reserves, as int64 arrays when they fit
+    """
+    x = [int(p) >> 128 for p in packed]
+    y = [int(p) & MASK128 for p in packed]
+    return _to_array(x), _to_array(y)
+
+
+def _to_array(values):
+    if all(v < int_amm.SAFE_BOUND for v in values):
+        return np.array(values, dtype=np.int64)
+    return np.array(values, dtype=object)
+
+
+class ReserveReader:
+    def __init__(self, call, batch_size=MAX_POOLS):
+        assert 0 < batch_size <= MAX_POOLS
+        self.call = call
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_contract(cls, reader, batch_size=MAX_POOLS):
+        """
+        reader: deployed ReserveReader.vy as a boa contract
+        """
+
+        def call(batches):
+            return [reader.get_reserves(batch) for batch in batches]
+
+        return cls(call, batch_size)
+
+    @classmethod
+    def from_web3(cls, url, reader_address, batch_size=MAX_POOLS, pool_size=4):
+        """
+        url: JSON-RPC endpoint, reader_address: deployed ReserveReader.vy
+        """
+        import requests
+        from web3 import Web3
+
+        # keep-alive connections are reused across syncs
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        w3 = Web3(Web3.HTTPProvider(url, session=session))
+        reader = w3.eth.contract(
+            address=Web3.to_checksum_address(reader_address), abi=READER_ABI
+        )
+
+        def call(batches):
+            with w3.batch_requests() as batch:
+                for pools in batches:
+                    pools = [Web3.to_checksum_address(pool) for pool in pools]
+                    batch.add(reader.functions.get_reserves(pools))
+                return batch.execute()
+
+        return cls(call, batch_size)
+
+    def read(self, pools):
+        """
+        x, y and fee rate (bps) of every pool, in order
+        """
+        pools = list(pools)
+        batches = [
+            pools[i : i + self.batch_size]
+            for i in range(0, len(pools), self.batch_size)
+        ]
+        results = [row for rows in self.call(batches) for row in rows]
+
+        x, y = unpack([packed for packed, _ in results])
+        fee_rate = np.array([int(fee) for _, fee in results], dtype=np.int64)
+        return x, y, fee_rate
+
+    def read_markets(self, markets):
+        """
+        markets: market id -> pool addresses
+        one sync for all markets; returns market id -> (x, y, fee_rate)
+        """
+        pools = [pool for market in markets.values() for pool in market]
+        x, y, fee_rate = self.read(pools)
+
+        result = {}
+        start = 0
+        for market_id, market in markets.items():
+            end = start + len(market)
+            result[market_id] = (x[start:end], y[start:end], fee_rate[start:end])
+            start = end
+        return result
+
+
+READER_ABI = [
+    {
+        "name": "get_reserves",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [{"name": "_pools", "type": "address[]"}],
+        "outputs": [{"name": "", "type": "uint256[2][]"}],
+    }
+]
@@ -0,0 +1,203 @@
+"""
+Vote-escrow (veSYN) accounting, following Curve's VotingEscrow
+
+A lock of amount a ending at t_end has voting power a / MAXTIME * (t_end - t).
+Instead of summing over lockers, the total is kept as one global point
+(bias, slope) plus the slope change scheduled for every week boundary,
+so the total at any time costs O(1) amortized, or O(log n) for past times
+through the history of global points.
+
+Lockers live in arrays and every operation takes arrays of locker ids,
+so a week of locks / increases / extensions / withdrawals is one numpy pass.
+"""
+
+import bisect
+
+import numpy as np
+
+WEEK = 7 * 86400
+MAXTIME = 4 * 365 * 86400
+
+
+class VoteEscrow:
+    def __init__(self, num_lockers, start=0, max_weeks=None):
+        """
+        start: timestamp of the first week boundary
+        max_weeks: weeks of slope changes allocated up front, default MAXTIME
+        plus ten years; the schedule grows when a timestamp goes past it
+        """
+        if max_weeks is None:
+            max_weeks = (MAXTIME + 10 * 365 * 86400) // WEEK
+        self.start = start - start % WEEK
+        self.amount = np.zeros(num_lockers)
+        self.end = np.zeros(num_lockers, dtype=np.int64)  # week-rounded unlock time
+        self.slope_changes = np.zeros(max_weeks + 1)
+
+        # global point
+        self.bias = 0.0
+        self.slope = 0.0
+        self.ts = self.start
+
+        # history of global points for past queries
+        self.history_ts = [self.start]
+        self.history_bias = [0.0]
+        self.history_slope = [0.0]
+
+    def _week(self, t):
+        return (np.asarray(t) - self.start) // WEEK
+
+    def _reserve(self, week):
+        """
+        grow the slope changes to cover week, doubling to keep growth amortized O(1)
+        """
+        size = len(self.slope_changes)
+        if week >= size:
+            grown = np.zeros(max(2 * size, week + 1))
+            grown[:size] = self.slope_changes
+            self.slope_changes = grown
+
+    def checkpoint(self, t):
+        """
+        move the global point to t, applying the slope changes of every week boundary
+        """
+        assert t >= self.ts, "time goes backwards"
+        # locks made at t end at most MAXTIME later
+        self._reserve(self._week(t) + MAXTIME // WEEK + 1)
+        week_ts = self.ts - (self.ts - self.start) % WEEK
+        while True:
+            week_ts += WEEK
+            if week_ts > t:
+                break
+            self.bias = max(0.0, self.bias - self.slope * (week_ts - self.ts))
+            self.slope = max(0.0, self.slope + self.slope_changes[self._week(week_ts)])
+            self.ts = week_ts
+            self._record()
+        self.bias = max(0.0, self.bias - self.slope * (t - self.ts))
+        self.ts = t
+        self._record()
+
+    def _record(self):
+        if self.history_ts[-1] == self.ts:
+            self.history_bias[-1] = self.bias
+            self.history_slope[-1] = self.slope
+        else:
+            self.history_ts.append(self.ts)
+            self.history_bias.append(self.bias)
+            self.history_slope.append(self.slope)
+
+    def _apply(self, ids, old_amount, old_end, new_amount, new_end, t):
+        """
+        replace the locks of ids, all of them active or empty, at the current time t
+        """
+        old_slope = np.where(old_end > t, old_amount / MAXTIME, 0)
+        new_slope = np.where(new_end > t, new_amount / MAXTIME, 0)
+
+        self.bias += np.sum(new_slope * (new_end - t)) - np.sum(
+            old_slope * (old_end - t)
+        )
+        self.slope += np.sum(new_slope) - np.sum(old_slope)
+
+        # the slope of a lock is removed at its end
+        np.add.at(
+            self.slope_changes,
+            self._week(old_end[old_slope > 0]),
+            old_slope[old_slope > 0],
+        )
+        np.add.at(
+            self.slope_changes,
+            self._week(new_end[new_slope > 0]),
+            -new_slope[new_slope > 0],
+        )
+
+        self.amount[ids] = new_amount
+        self.end[ids] = new_end
+        self._record()
+
+    def _round_end(self, ids, unlock_time, t):
+        end = self.start + self._week(np.broadcast_to(unlock_time, ids.shape)) * WEEK
+        assert np.all(end > t), "Can only lock until time in the future"
+        assert np.all(end <= t + MAXTIME), "Voting lock can be 4 years max"
+        return end
+
+    def create_lock(self, ids, amounts, unlock_times, t):
+        ids = np.asarray(ids)
+        self.checkpoint(t)
+        assert np.all(self.amount[ids] == 0), "Withdraw old tokens first"
+        assert len(np.unique(ids)) == len(ids), "duplicate locker"
+        end = self._round_end(ids, unlock_times, t)
+        self._apply(
+            ids,
+            self.amount[ids],
+            self.end[ids],
+            np.broadcast_to(np.asarray(amounts, dtype=float), ids.shape),
+            end,
+            t,
+        )
+
+    def increase_amount(self, ids, amounts, t):
+        ids = np.asarray(ids)
+        self.checkpoint(t)
+        assert np.all(self.end[ids] > t), "Cannot add to expired lock. Withdraw"
+        assert len(np.unique(ids)) == len(ids), "duplicate locker"
+        self._apply(
+            ids,
+            self.amount[ids],
+            self.end[ids],
+            self.amount[ids] + amounts,
+            self.end[ids],
+            t,
+        )
+
+    def increase_unlock_time(self, ids, unlock_times, t):
+        ids = np.asarray(ids)
+        self.checkpoint(t)
+        assert np.all(self.end[ids] > t), "Lock expired"
+        assert len(np.unique(ids)) == len(ids), "duplicate locker"
+        end = self._round_end(ids, unlock_times, t)
+        assert np.all(end > self.end[ids]), "Can only increase lock duration"
+        self._apply(ids, self.amount[ids], self.end[ids], self.amount[ids], end, t)
+
+    def withdraw(self, ids, t):
+        """
+        return the unlocked amounts; expired locks no longer count in the global point
+        """
+        ids = np.asarray(ids)
+        self.checkpoint(t)
+        assert np.all(self.end[ids] <= t), "The lock didn't expire"
+        amounts = self.amount[ids].copy()
+        self.amount[ids] = 0
+        self.end[ids] = 0
+        return amounts
+
+    def balance_of(self, ids, t):
+        """
+        voting power of lockers at t, for t not before their last action
+        """
+        return np.maximum(self.amount[ids] / MAXTIME * (self.end[ids] - t), 0)
+
+    def total_supply(self, t):
+        """
+        total voting power at t
+
+        past t: last global point before t, O(log n)
+        future t: the global point carried through the scheduled slope changes
+        """
+        if t < self.ts:
+            i = bisect.bisect_right(self.history_ts, t) - 1
+            return max(
+                0.0,
+                self.history_bias[i] - self.history_slope[i] * (t - self.history_ts[i]),
+            )
+
+        # all weeks at once: bias at the boundaries from the cumulative slope
+        first = self._week(self.ts) + 1
+        last = self._week(t)
+        if last < first:
+            return max(0.0, self.bias - self.slope * (t - self.ts))
+        self._reserve(last)
+        week_ts = self.start + np.arange(first, last + 1) * WEEK
+        slopes = self.slope + np.concatenate(
+            [[0.0], np.cumsum(self.slope_changes[first : last + 1])]
+        )
+        dt = np.diff(np.concatenate([[self.ts], week_ts, [t]]))
+        return max(0.0, self.bias - np.sum(slopes * dt))
@@ -0,0 +1,78 @@
+import random
+
+import boa
+from moccasin.boa_tools import VyperContract
+from tabulate import tabulate
+
+from src import Router
+
+# Newton's method from x + y + 1, as shipped before the isqrt version
+LEGACY_GET_L = """
+# pragma version ^0.4.0
+
+@internal
+@pure
+def _get_L(_x: uint256, _y: uint256, _round_up: bool) -> uint256:
+    assert _x < 2**126 - 1 and _y < 2**126 - 1, "Reserves: overflow"
+
+    L_prev: uint256 = 0
+    L_new: uint256 = _x + _y + 1
+
+    for i: uint256 in range(128):
+        L_prev = L_new
+        L_new = (L_prev**2 + _x * _y) // (2 * L_prev - _y)
+        if L_new >= L_prev:
+            break
+    if _round_up:
+        return L_prev
+    else:
+        return L_prev + 1
+"""
+
+
+def get_L_gas(contract, x, y):
+    L = contract.internal._get_L(x, y, True)
+    return L, contract._computation.get_gas_used()
+
+
+def benchmark(router: VyperContract, legacy: VyperContract, max_bit, n=64):
+    """
+    mean and max gas of _get_L for random reserves below 2**max_bit
+    """
+    legacy_gas = []
+    new_gas = []
+    for _ in range(n):
+        x = random.randint(1, (1 << max_bit) - 2)
+        y = random.randint(1, (1 << max_bit) - 2)
+        L_legacy, gas = get_L_gas(legacy, x, y)
+        legacy_gas.append(gas)
+        L_new, gas = get_L_gas(router, x, y)
+        new_gas.append(gas)
+        assert L_legacy == L_new, f"x: {x}, y: {y}"
+
+    return [
+        max_bit,
+        sum(legacy_gas) / n,
+        max(legacy_gas),
+        sum(new_gas) / n,
+        max(new_gas),
+    ]
+
+
+def moccasin_main():
+    router = Router.deploy()
+    legacy = boa.loads(LEGACY_GET_L)
+
+    print(
+        tabulate(
+            [benchmark(router, legacy, max_bit) for max_bit in [32, 64, 96, 126]],
+            headers=[
+                "max_bit",
+                "Newton Mean Gas",
+                "Newton Max Gas",
+                "isqrt Mean Gas",
+                "isqrt Max Gas",
+            ],
+            tablefmt="pretty",
+        )
+    )
@@ -0,0 +1,30 @@
+from tabulate import tabulate
+
+from script.deploy_market import deploy_market, get_reserves
+
+
+def get_quote_gas(router, is_buy, amount, option_index):
+    quote = router.get_quote(0, is_buy, amount, option_index)
+    return quote, router._computation.get_gas_used()
+
+
+def moccasin_main():
+    """
+    gas of Router.get_quote on uniform markets with n options
+    """
+    table_data = []
+    for n in [2, 3, 4, 6, 8, 12, 16, 24, 32]:
+        router, _ = deploy_market([get_reserves(10**12, 1 / n) for _ in range(n)], 30)
+        amount = 100 * 10**6
+
+        _, buy_gas = get_quote_gas(router, True, amount, 0)
+        _, sell_gas = get_quote_gas(router, False, amount, 0)
+        table_data.append([n, buy_gas, sell_gas, buy_gas // n, sell_gas // n])
+
+    print(
+        tabulate(
+            table_data,
+            headers=["n", "Buy Gas", "Sell Gas", "Buy Gas / n", "Sell Gas / n"],
+            tablefmt="pretty",
+        )
+    )
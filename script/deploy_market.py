@@ -0,0 +1,62 @@
+import math
+
+import boa
+from moccasin.boa_tools import VyperContract
+
+from src import PMAMM, Router
+from src.mocks import MockERC20
+
+
+def get_reserves(L: int, p: float) -> tuple[int, int]:
+    """
+    reserves of a pool with liquidity L and price p, as in route_in_gm.AMM
+    """
+    return max(1, math.isqrt(int(L**2 / p)) - L), max(1, math.isqrt(int(L**2 * p)))
+
+
+def deploy_market(
+    reserves: list[tuple[int, int]], fee_rate: int, market_id: int = 0
+) -> tuple[VyperContract, list[VyperContract]]:
+    """
+    deploy one O_i <> GM pool per (x, y) in reserves and register them on a new router
+    """
+    owner = boa.env.eoa
+    good_money = MockERC20.deploy("Good Money", "GM")
+
+    pools = []
+    for i, (x, y) in enumerate(reserves):
+        outcome = MockERC20.deploy(f"Outcome {i}", f"O_{i}")
+
+        # PMAMM pulls the reserves in its constructor
+        pool_address = boa.env.generate_address()
+        outcome.mint(owner, x)
+        good_money.mint(owner, y)
+        outcome.approve(pool_address, x)
+        good_money.approve(pool_address, y)
+
+        pools.append(
+            PMAMM.deploy(
+                outcome.address,
+                good_money.address,
+                x << 128 | y,
+                fee_rate,
+                owner,
+                owner,
+                override_address=pool_address,
+            )
+        )
+
+    router = Router.deploy()
+    router.set_market(market_id, [pool.address for pool in pools])
+
+    return router, pools
+
+
+def moccasin_main() -> VyperContract:
+    # 40% / 40% / 20% market with 30 bps fee
+    router, _ = deploy_market(
+        [get_reserves(1000 * 10**6, p) for p in [0.4, 0.4, 0.2]], 30
+    )
+    print("GM to buy 100 O_2: ", router.get_quote(0, True, 100 * 10**6, 2) / 10**6)
+    print("GM for 100 O_2: ", router.get_quote(0, False, 100 * 10**6, 2) / 10**6)
+    return router
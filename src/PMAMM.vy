@@ -126,12 +126,68 @@ def swap(_base_amount: uint256, _is_buy: bool) -> uint256:
 
 @external
 def add_liquidity(_amounts: uint256) -> uint256:
-    return empty(uint256)
+    """
+    deposit at most the packed amounts [x, y] in proportion to the reserves
+    LP tokens are rounded down and the amounts pulled are rounded up
+
+    return: LP tokens minted
+    """
+    reserves: uint256[2] = self._unpack(self.reserves)
+    amounts: uint256[2] = self._unpack(_amounts)
+    supply: uint256 = erc20.totalSupply
+
+    # amounts < 2**128 and supply <= L < 2**127, no overflow
+    shares: uint256 = min(
+        amounts[0] * supply // reserves[0], amounts[1] * supply // reserves[1]
+    )
+    assert shares > 0, "Liquidity: zero shares"
+
+    dx: uint256 = (shares * reserves[0] + supply - 1) // supply  # round up
+    dy: uint256 = (shares * reserves[1] + supply - 1) // supply  # round up
+    new_x: uint256 = reserves[0] + dx
+    new_y: uint256 = reserves[1] + dy
+    assert new_x < 2**126 - 1 and new_y < 2**126 - 1, "Reserves: overflow"
+
+    self.reserves = self._pack([new_x, new_y])
+    erc20._mint(msg.sender, shares)
+
+    # pull the assets
+    assert extcall IERC20(self.base_asset).transferFrom(
+        msg.sender, self, dx, default_return_value=True
+    ), "Liquidity: failed to pull base asset"
+    assert extcall IERC20(self.quote_asset).transferFrom(
+        msg.sender, self, dy, default_return_value=True
+    ), "Liquidity: failed to pull quote asset"
+
+    return shares
 
 
 @external
-def remove_liquidity(_amounts: uint256) -> uint256:
-    return empty(uint256)
+def remove_liquidity(_lp_amount: uint256) -> uint256:
+    """
+    burn LP tokens for the reserves in proportion, rounded down
+
+    return: packed amounts [x, y] withdrawn
+    """
+    reserves: uint256[2] = self._unpack(self.reserves)
+    supply: uint256 = erc20.totalSupply
+
+    dx: uint256 = _lp_amount * reserves[0] // supply  # round down
+    dy: uint256 = _lp_amount * reserves[1] // supply  # round down
+    assert dx < reserves[0] and dy < reserves[1], "Reserves: underflow"
+
+    self.reserves = self._pack([reserves[0] - dx, reserves[1] - dy])
+    erc20._burn(msg.sender, _lp_amount)
+
+    # transfer the assets
+    assert extcall IERC20(self.base_asset).transfer(
+        msg.sender, dx, default_return_value=True
+    ), "Liquidity: failed to transfer base asset"
+    assert extcall IERC20(self.quote_asset).transfer(
+        msg.sender, dy, default_return_value=True
+    ), "Liquidity: failed to transfer quote asset"
+
+    return self._pack([dx, dy])
 
 
 @internal
@@ -140,7 +196,8 @@ def _get_L(_x: uint256, _y: uint256, _round_up: bool) -> uint256:
     """
     (x + L) * y = L**2
 
-    find L via Newton's method
+    L = floor((y + sqrt(y**2 + 4 * x * y)) / 2) = (isqrt(y**2 + 4 * x * y) + y) >> 1
+    (flooring the square root first does not change the result for integer y)
 
     return value always satisfies followings:
         (x + L) * y >= L**2
@@ -148,24 +205,19 @@ def _get_L(_x: uint256, _y: uint256, _round_up: bool) -> uint256:
     """
     assert _x < 2**126 - 1 and _y < 2**126 - 1, "Reserves: overflow"
 
-    L_prev: uint256 = 0
-    L_new: uint256 = _x + _y + 1  # (x + (x + y + 1)) * y < (x + y + 1)**2
+    # y * (y + 4 * x) < 2**126 * 2**129, no overflow
+    L: uint256 = (isqrt(_y * (_y + 4 * _x)) + _y) >> 1
 
-    for i: uint256 in range(128):
-        L_prev = L_new
-        L_new = (L_prev**2 + _x * _y) // (2 * L_prev - _y)
-        if L_new >= L_prev:
-            break
     if _round_up:
-        return L_prev
+        return L
     else:
-        return L_prev + 1
+        return L + 1
 
 
 @internal
 @pure
 def _unpack(_reserves: uint256) -> uint256[2]:
-    return [_reserves >> 128, _reserves & (1 << 128 - 1)]
+    return [_reserves >> 128, _reserves & ((1 << 128) - 1)]
 
 
 @internal
@@ -0,0 +1,34 @@
+# pragma version ^0.4.0
+# @license MIT
+
+"""
+Batched reader of PMAMM state
+
+One eth_call returns the packed reserves and the fee rate of up to MAX_POOLS pools,
+so off-chain models can sync hundreds of markets in a few requests.
+Reserves are returned packed as in PMAMM: x << 128 | y
+"""
+
+
+interface IPMAMM:
+    def reserves() -> uint256: view
+    def fee_rate() -> uint256: view
+
+
+MAX_POOLS: constant(uint256) = 256
+
+
+@external
+@view
+def get_reserves(
+    _pools: DynArray[address, MAX_POOLS]
+) -> DynArray[uint256[2], MAX_POOLS]:
+    """
+    [packed reserves, fee rate] of every pool
+    """
+    result: DynArray[uint256[2], MAX_POOLS] = []
+    for pool: address in _pools:
+        result.append(
+            [staticcall IPMAMM(pool).reserves(), staticcall IPMAMM(pool).fee_rate()]
+        )
+    return result
@@ -15,9 +15,40 @@ For Selling:
     2. Swap GM into O_j for j != i => burn O_j for j in [n] => GM
 """
 
+from snekmate.auth import ownable
+
+initializes: ownable
+
+exports: ownable.__interface__
+
+
+interface IPMAMM:
+    def reserves() -> uint256: view
+    def fee_rate() -> uint256: view
+
+
 PHI_NUM: constant(uint256) = 16180
 PHI_DEN: constant(uint256) = 10000
 PRECISION: constant(uint256) = 1  # in bps
+MAX_OPTIONS: constant(uint256) = 32
+
+markets: public(HashMap[uint256, DynArray[address, MAX_OPTIONS]])  # O_i <> GM pools
+
+
+@deploy
+def __init__():
+    ownable.__init__()
+
+
+@external
+def set_market(_marketId: uint256, _pools: DynArray[address, MAX_OPTIONS]):
+    """
+    register the O_i <> GM pools of a market, ordered by option index
+    every pool of a market is expected to share the same fee rate
+    """
+    ownable._check_owner()
+    assert len(_pools) >= 2, "Router: at least two options"
+    self.markets[_marketId] = _pools
 
 
 @external
@@ -30,13 +61,28 @@ def get_quote(
 ) -> uint256:
     """
     Get quote amount for buying/selling
+
+    buy: amount of GM required to receive exactly _base_amount O_i
+    sell: amount of GM received for exactly _base_amount O_i
     """
     # get market info
+    pools: DynArray[address, MAX_OPTIONS] = self.markets[_marketId]
+    assert _option_index < len(pools), "Router: invalid option"
+
+    packed_reserves: DynArray[uint256, MAX_OPTIONS] = []
+    for pool: address in pools:
+        packed_reserves.append(staticcall IPMAMM(pool).reserves())
+    fee_rate: uint256 = staticcall IPMAMM(pools[_option_index]).fee_rate()
 
     # find the optimal split
+    split: uint256[2] = self._get_optimal_split(
+        _is_buy, _base_amount, packed_reserves, fee_rate, _option_index
+    )
 
     # get quote amount
-    return empty(uint256)
+    return self._get_quote_amount_multi(
+        _is_buy, _base_amount, split[0], fee_rate, _option_index, packed_reserves
+    )
 
 
 @internal
@@ -50,14 +96,20 @@ def _get_optimal_split(
 ) -> uint256[2]:
     """
     find the optimal split using golden section search.
+
+    path1: amount of O_i traded directly on the O_i <> GM pool
+    path2: amount of O_i obtained by minting (buy) or burning (sell) complete sets
     """
     left: uint256 = empty(uint256)
     right: uint256 = empty(uint256)
     a: uint256 = empty(uint256)
     b: uint256 = empty(uint256)
     if _is_buy:
-        left = 1
-        right = self._unpack(_packed_reserves[option_index])[0]
+        # path1 can not drain the O_i pool
+        left = 0
+        right = min(
+            _base_amount, self._unpack(_packed_reserves[option_index])[0] - 1
+        )
         a = right - (right - left) * PHI_DEN // PHI_NUM
         b = left + (right - left) * PHI_DEN // PHI_NUM
 
@@ -100,7 +152,11 @@ def _get_optimal_split(
                     _packed_reserves,
                 )
     else:
-        left = _base_amount - self._get_min_reserve(_packed_reserves, True)
+        # path2 can not drain any O_j pool for j != i
+        left = _base_amount - min(
+            _base_amount,
+            self._get_min_reserve(_packed_reserves, True, option_index) - 1,
+        )
         right = _base_amount
         a = right - (right - left) * PHI_DEN // PHI_NUM
         b = left + (right - left) * PHI_DEN // PHI_NUM
@@ -115,6 +171,8 @@ def _get_optimal_split(
         for i: uint256 in range(
             16
         ):  # 0.618**16 ~= 0.0004 (maximum 0.02% error)
+            if a >= b:
+                break
             if f_a > f_b:  # a is better; update right boundary
                 right = b
                 b = a
@@ -152,11 +210,14 @@ def _get_optimal_split(
 def _get_min_reserve(
     _packed_reserves: DynArray[uint256, 32],
     _is_x: bool,
+    _skip_index: uint256,
 ) -> uint256:
     min_reserve: uint256 = 2**126 - 1
 
-    for packed_reserve: uint256 in _packed_reserves:
-        reserves: uint256[2] = self._unpack(packed_reserve)
+    for i: uint256 in range(len(_packed_reserves), bound=MAX_OPTIONS):
+        if i == _skip_index:
+            continue
+        reserves: uint256[2] = self._unpack(_packed_reserves[i])
         if _is_x:
             min_reserve = min(min_reserve, reserves[0])
         else:
@@ -176,8 +237,57 @@ def _get_quote_amount_multi(
 ) -> uint256:
     """
     Calculate quote amount for buying/selling
+
+    buy: GM paid for path1 O_i on the O_i pool
+        + GM paid for minting path2 complete sets
+        - GM received for selling path2 O_j on every O_j pool for j != i
+    sell: GM received for path1 O_i on the O_i pool
+        + GM received for burning path2 complete sets
+        - GM paid for buying path2 O_j on every O_j pool for j != i
+
+    infeasible splits are quoted as max_value(uint256) for buying and 0 for selling
     """
-    return empty(uint256)
+    path2_amount: uint256 = _base_amount - _path1_amount
+    reserves: uint256[2] = self._unpack(_packed_reserves[_option_index])
+    quote_in: uint256 = 0
+    quote_out: uint256 = 0
+
+    if _is_buy:
+        quote_in = self._get_quote_amount_single(
+            True, _path1_amount, reserves[0], reserves[1], _fee_rate
+        )
+        if quote_in == max_value(uint256):
+            return max_value(uint256)
+        quote_in += path2_amount
+    else:
+        quote_out = (
+            self._get_quote_amount_single(
+                False, _path1_amount, reserves[0], reserves[1], _fee_rate
+            )
+            + path2_amount
+        )
+
+    if path2_amount > 0:
+        for j: uint256 in range(len(_packed_reserves), bound=MAX_OPTIONS):
+            if j == _option_index:
+                continue
+            reserves = self._unpack(_packed_reserves[j])
+            if _is_buy:
+                quote_out += self._get_quote_amount_single(
+                    False, path2_amount, reserves[0], reserves[1], _fee_rate
+                )
+            else:
+                quote_j: uint256 = self._get_quote_amount_single(
+                    True, path2_amount, reserves[0], reserves[1], _fee_rate
+                )
+                if quote_j == max_value(uint256):
+                    return 0
+                quote_in += quote_j
+
+    # selling O_j can pay for more than the minted complete sets when prices sum over 1
+    if _is_buy:
+        return quote_in - min(quote_in, quote_out)
+    return quote_out - min(quote_in, quote_out)
 
 
 @internal
@@ -190,9 +300,29 @@ def _get_quote_amount_single(
     _fee_rate: uint256,
 ) -> uint256:
     """
-    Calculate quote amount for buying/selling
+    Calculate quote amount for buying/selling, same as PMAMM.swap
+
+    buy: amount of quote asset to pay for _base_amount of base asset
+        (max_value(uint256) if the pool does not have enough base asset)
+    sell: amount of quote asset to receive for _base_amount of base asset
     """
-    return empty(uint256)
+    if _base_amount == 0:
+        return 0
+
+    L: uint256 = self._get_L(_base_reserve, _quote_reserve, False)  # round down
+
+    if _is_buy:
+        if _base_amount >= _base_reserve:
+            return max_value(uint256)
+        new_x: uint256 = _base_reserve - _base_amount
+        new_y: uint256 = L**2 // (new_x + L) + 1  # round up
+        return (new_y - _quote_reserve) * 10000 // (10000 - _fee_rate) + 1
+    else:
+        new_x: uint256 = _base_reserve + _base_amount
+        new_y: uint256 = L**2 // (new_x + L) + 1  # round up
+        if new_y >= _quote_reserve:
+            return 0
+        return (_quote_reserve - new_y) * (10000 - _fee_rate) // 10000
 
 
 @internal
@@ -201,7 +331,8 @@ def _get_L(_x: uint256, _y: uint256, _round_up: bool) -> uint256:
     """
     (x + L) * y = L**2
 
-    find L via Newton's method
+    L = floor((y + sqrt(y**2 + 4 * x * y)) / 2) = (isqrt(y**2 + 4 * x * y) + y) >> 1
+    (flooring the square root first does not change the result for integer y)
 
     return value always satisfies followings:
         (x + L) * y >= L**2
@@ -209,24 +340,19 @@ def _get_L(_x: uint256, _y: uint256, _round_up: bool) -> uint256:
     """
     assert _x < 2**126 - 1 and _y < 2**126 - 1, "Reserves: overflow"
 
-    L_prev: uint256 = 0
-    L_new: uint256 = _x + _y + 1  # (x + (x + y + 1)) * y < (x + y + 1)**2
+    # y * (y + 4 * x) < 2**126 * 2**129, no overflow
+    L: uint256 = (isqrt(_y * (_y + 4 * _x)) + _y) >> 1
 
-    for i: uint256 in range(128):
-        L_prev = L_new
-        L_new = (L_prev**2 + _x * _y) // (2 * L_prev - _y)
-        if L_new >= L_prev:
-            break
     if _round_up:
-        return L_prev
+        return L
     else:
-        return L_prev + 1
+        return L + 1
 
 
 @internal
 @pure
 def _unpack(_reserves: uint256) -> uint256[2]:
-    return [_reserves >> 128, _reserves & (1 << 128 - 1)]
+    return [_reserves >> 128, _reserves & ((1 << 128) - 1)]
 
 
 @internal
@@ -0,0 +1,20 @@
+# pragma version ^0.4.0
+# @license MIT
+
+"""
+Mintable ERC20 for tests and local deployments
+"""
+
+from snekmate.auth import ownable
+from snekmate.tokens import erc20
+
+initializes: ownable
+initializes: erc20[ownable := ownable]
+
+exports: erc20.__interface__
+
+
+@deploy
+def __init__(_name: String[25], _symbol: String[5]):
+    ownable.__init__()
+    erc20.__init__(_name, _symbol, 18, _name, "1.0.0")
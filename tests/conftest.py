@@ -1,7 +1,14 @@
 import pytest
+
 from script.deploy import deploy
+from src import Router
 
 
 @pytest.fixture
 def counter_contract():
     return deploy()
+
+
+@pytest.fixture
+def router_contract():
+    return Router.deploy()
@@ -0,0 +1,114 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from research_synstation import arbitrage
+
+sys.path.append(str(Path(__file__).parents[1] / "misc"))
+import route_in_outcome
+
+# probabilities summing above 1 are minted and sold, below 1 bought and burned
+MINT_AND_SELL = [0.5, 0.4, 0.3]
+BUY_AND_BURN = [0.3, 0.25, 0.2, 0.1]
+
+
+def make_pools(p, X=1000.0, fee_bps=30):
+    return [route_in_outcome.AMM(X, p_j, fee_bps) for p_j in p]
+
+
+def brute_force(amms, num=200_001):
+    """
+    best q and profit on a grid, executing the trades with route_in_outcome.AMM quotes
+    """
+    q = np.linspace(0, sum(amm.X for amm in amms), num)
+    mint = sum(amm.get_quote(q, False) for amm in amms) - q
+    q_burn = np.linspace(0, min(amm.X for amm in amms) - amms[0].precision, num)
+    burn = q_burn - sum(amm.get_quote(q_burn, True) for amm in amms)
+    if mint.max() >= burn.max():
+        return q[np.argmax(mint)], mint.max()
+    return -q_burn[np.argmax(burn)], burn.max()
+
+
+def solve(amms):
+    X = np.array([amm.X for amm in amms])
+    L = np.array([amm.L for amm in amms])
+    q, profit = arbitrage.solve_complete_set_arbitrage(X, L, amms[0].fee_bps)
+    return float(q), float(profit)
+
+
+@pytest.mark.parametrize("p, sign", [(MINT_AND_SELL, 1), (BUY_AND_BURN, -1)])
+@pytest.mark.parametrize("fee_bps", [0, 30, 100])
+def test_solution_matches_brute_force(p, sign, fee_bps):
+    amms = make_pools(p, fee_bps=fee_bps)
+    q, profit = solve(amms)
+    q_grid, profit_grid = brute_force(amms)
+
+    assert np.sign(q) == sign
+    assert profit >= profit_grid - 1e-9
+    assert profit == pytest.approx(profit_grid, rel=1e-6)
+    assert q == pytest.approx(q_grid, rel=1e-3)
+
+
+def test_no_arbitrage_band():
+    # sum of prices within the fees on both sides
+    q, profit = solve(make_pools([0.5, 0.501], fee_bps=30))
+    assert q == 0 and profit == 0
+
+
+def test_ragged_batch_with_mask():
+    markets = [
+        make_pools(MINT_AND_SELL, X=500.0),
+        make_pools(BUY_AND_BURN, X=2000.0, fee_bps=10),
+        make_pools([0.5, 0.5]),
+        make_pools([0.6, 0.2, 0.2, 0.1, 0.05], fee_bps=50),
+    ]
+    n = max(len(amms) for amms in markets)
+    # padded outcomes hold NaN, so any leak into a market shows up in its result
+    X = np.full((len(markets), n), np.nan)
+    L = np.full((len(markets), n), np.nan)
+    fee_bps = np.zeros((len(markets), n))
+    mask = np.zeros((len(markets), n), dtype=bool)
+    for i, amms in enumerate(markets):
+        X[i, : len(amms)] = [amm.X for amm in amms]
+        L[i, : len(amms)] = [amm.L for amm in amms]
+        fee_bps[i] = amms[0].fee_bps
+        mask[i, : len(amms)] = True
+
+    q, profit = arbitrage.solve_complete_set_arbitrage(X, L, fee_bps, mask)
+    expected = np.array([solve(amms) for amms in markets])
+    assert q == pytest.approx(expected[:, 0], rel=1e-9, abs=1e-12)
+    assert profit == pytest.approx(expected[:, 1], rel=1e-9, abs=1e-12)
+
+    new_X, new_Y, fee_X, fee_Y = arbitrage.apply_complete_set_arbitrage(
+        X, L, fee_bps, q, mask
+    )
+    assert np.all(np.isnan(new_X[~mask]))
+    assert np.all(fee_X[~mask] == 0) and np.all(fee_Y[~mask] == 0)
+    assert np.all(np.isfinite(new_X[mask])) and np.all(np.isfinite(new_Y[mask]))
+
+
+@pytest.mark.parametrize("p", [MINT_AND_SELL, BUY_AND_BURN])
+def test_apply_matches_amm_execution(p):
+    amms = make_pools(p)
+    X = np.array([amm.X for amm in amms])
+    L = np.array([amm.L for amm in amms])
+    q, profit = solve(amms)
+
+    new_X, new_Y, fee_X, fee_Y = arbitrage.apply_complete_set_arbitrage(X, L, 30, q)
+    if q > 0:
+        cash = sum(amm.sell_X(q) for amm in amms) - q
+    else:
+        cash = -q - sum(amm.buy_X(-q) for amm in amms)
+
+    assert cash == pytest.approx(profit, rel=1e-9)
+    assert new_X == pytest.approx([amm.X for amm in amms], rel=1e-12)
+    assert new_Y == pytest.approx([amm.Y for amm in amms], rel=1e-12)
+    assert fee_X == pytest.approx([amm.fee_X for amm in amms], rel=1e-12, abs=1e-12)
+    assert fee_Y == pytest.approx([amm.fee_Y for amm in amms], rel=1e-12, abs=1e-12)
+
+    # the pools are left in the no-arbitrage band
+    q, profit = arbitrage.solve_complete_set_arbitrage(new_X, L, 30)
+    assert abs(q) < 1e-6 * X.min()
+    assert profit < 1e-9
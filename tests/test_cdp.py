@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from research_synstation import cdp
+
+
+def test_liquidations_match_rescan():
+    rng = np.random.default_rng(0)
+    n, mcr = 2000, 1.1
+    book = cdp.TroveBook(n, mcr)
+    active = np.zeros(n, dtype=bool)
+
+    price = 1000.0
+    ids = np.arange(n // 2)
+    coll = rng.uniform(1, 10, len(ids))
+    book.open(ids, coll, coll * price / (mcr + rng.exponential(0.5, len(ids))), price)
+    active[ids] = True
+
+    for _ in range(200):
+        price *= np.exp(rng.normal(0, 0.02))
+        book.accrue(1.0001)
+
+        # open, adjust and close random troves between ticks
+        ids = rng.choice(np.flatnonzero(~active), 5, replace=False)
+        coll = rng.uniform(1, 10, 5)
+        book.open(ids, coll, coll * price / (mcr + rng.exponential(0.5, 5)), price)
+        active[ids] = True
+
+        ids = np.flatnonzero(active)
+        ids = rng.choice(ids[book.icr(ids, price) > 1.5], 5, replace=False)
+        book.adjust(ids, rng.uniform(-0.1, 0.1, 5), rng.uniform(-10, 10, 5), price)
+
+        ids = rng.choice(np.flatnonzero(active), 2, replace=False)
+        book.close(ids)
+        active[ids] = False
+
+        ids = np.flatnonzero(active)
+        expected = ids[book.icr(ids, price) < mcr]
+        expected_debt = book.debt(expected).sum()
+
+        liquidated, coll, debt = book.liquidate(price)
+        assert sorted(liquidated) == sorted(expected)
+        assert debt.sum() == pytest.approx(expected_debt)
+        # lowest ratio first
+        assert np.all(np.diff(coll / debt) >= -1e-12)
+        active[liquidated] = False
+
+        assert len(book) == active.sum()
+        assert book.total_debt() == pytest.approx(book.debt(active).sum())
+        assert book.total_coll == pytest.approx(book.coll[active].sum())
+        if active.any():
+            ids = np.flatnonzero(active)
+            assert book.lowest() == ids[np.argmin(book.icr(ids, price))]
+
+
+def test_trove_rules():
+    book = cdp.TroveBook(2, mcr=1.1)
+    with pytest.raises(AssertionError, match="ICR below MCR"):
+        book.open([0], 1.0, 1000.0, 1000.0)
+    book.open([0], 1.0, 500.0, 1000.0)
+    with pytest.raises(AssertionError, match="Trove is active"):
+        book.open([0], 1.0, 500.0, 1000.0)
+    with pytest.raises(AssertionError, match="ICR below MCR"):
+        book.adjust([0], -0.5, 0.0, 1000.0)
+
+    # interest pushes the trove below MCR without a price move
+    book.accrue(2.0)
+    ids, coll, debt = book.liquidate(1000.0)
+    assert list(ids) == [0] and coll[0] == 1.0 and debt[0] == 1000.0
+    assert len(book) == 0 and book.lowest() is None
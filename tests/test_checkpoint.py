@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from research_synstation import checkpoint, paths
+
+sys.path.append(str(Path(__file__).parents[1] / "misc"))
+import find_optimal_fee_rate
+
+ARGS = {
+    "bid": 10_000,
+    "fee_rates": [1, 30],
+    "daily_transaction": 2000,
+    "min_size": 1,
+    "max_size": 100,
+    "initial_price": 4000,
+    "volatility": 0.01,
+    "block_time": 60,
+    "period": 2,
+    "chunk_size": 256,
+    "seed": 5,
+}
+
+
+class Preempted(Exception):
+    pass
+
+
+def run(**kwargs):
+    np.random.seed(11)
+    return find_optimal_fee_rate.spectral_market_simulation(**ARGS, **kwargs)
+
+
+def test_resume_is_bit_identical(tmp_path, monkeypatch):
+    expected = run()
+    path = tmp_path / "run.ckpt"
+
+    # preempt the run in the middle of the fifth chunk
+    next_chunk = paths.NoiseArrivals.next_chunk
+    calls = []
+
+    def preempted_next_chunk(self, n):
+        calls.append(n)
+        if len(calls) == 5:
+            raise Preempted
+        return next_chunk(self, n)
+
+    monkeypatch.setattr(paths.NoiseArrivals, "next_chunk", preempted_next_chunk)
+    with pytest.raises(Preempted):
+        run(checkpoint_path=path, checkpoint_every=2)
+    monkeypatch.undo()
+
+    assert checkpoint.load(path)["block"] == 4 * ARGS["chunk_size"]
+
+    # np.random is reseeded by run, the checkpoint restores it
+    assert run(checkpoint_path=path, checkpoint_every=2) == expected
+    assert not path.exists()
+
+
+def test_resume_replayed_prices(tmp_path):
+    def prices(preempt_after=None):
+        price_path = paths.PricePath(4000, 0.01, 60, 2, 256, seed=9)
+        for i, P in enumerate(price_path):
+            if i == preempt_after:
+                raise Preempted
+            yield P
+
+    expected = run(price_source=prices())
+    path = tmp_path / "run.ckpt"
+
+    with pytest.raises(Preempted):
+        run(price_source=prices(3), checkpoint_path=path, checkpoint_every=1)
+    assert run(price_source=prices(), checkpoint_path=path) == expected
@@ -0,0 +1,93 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from research_synstation import amm, cli
+
+ROOT = Path(__file__).parents[1]
+
+# startup of the CLI before any subcommand runs, relative to a bare interpreter,
+# so the bound holds on slow and loaded machines alike
+STARTUP_FACTOR = 2
+
+HEAVY_MODULES = ["numpy", "tabulate", "matplotlib", "scipy", "pandas"]
+
+
+def run_python(*args):
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *args], env=env, capture_output=True, text=True, check=True
+    )
+    return time.perf_counter() - start, result.stdout
+
+
+def test_startup_imports_only_the_standard_library():
+    _, stdout = run_python(
+        "-c",
+        "import sys\n"
+        "from research_synstation import cli\n"
+        "cli.build_parser().parse_args(['quote', '--probabilities', '0.5', '0.5',"
+        " '--outcome', '0', '--amount', '1'])\n"
+        "print(' '.join(sorted(sys.modules)))",
+    )
+    loaded = {name.split(".")[0] for name in stdout.split()}
+    assert not loaded & set(HEAVY_MODULES)
+
+
+def test_startup_budget():
+    # interleaved, so a burst of load slows both sides alike
+    baseline, startup = [], []
+    for _ in range(5):
+        baseline.append(run_python("-c", "pass")[0])
+        startup.append(run_python("-m", "research_synstation.cli", "--help")[0])
+    assert min(startup) < STARTUP_FACTOR * min(baseline)
+
+
+@pytest.mark.parametrize("sell", [False, True])
+def test_quote(capsys, sell):
+    args = ["quote", "--probabilities", "0.5", "0.3", "0.2", "--outcome", "2"]
+    cli.main(args + ["--amount", "100"] + (["--sell"] if sell else []))
+    result = json.loads(capsys.readouterr().out)
+
+    market = amm.OutcomeMarket(10_000, [0.5, 0.3, 0.2], 30)
+    split = market.find_optimal_split(2, 100, not sell)
+    assert result["split"] == pytest.approx(split[0])
+    assert result["amount"] == pytest.approx(market.quote(2, 100, split, not sell)[0])
+
+
+def test_emission_plot(tmp_path):
+    output = tmp_path / "emission.png"
+    cli.main(["emission", "--output", str(output)])
+    assert output.stat().st_size > 0
+
+
+def test_unknown_psm_parameter():
+    with pytest.raises(SystemExit, match="unknown parameter"):
+        cli.main(["psm", "--param", "kappaa=1e-6"])
+
+
+def test_report(tmp_path):
+    np.save(tmp_path / "walk.npy", np.arange(1e5))
+
+    series = f"walk={tmp_path / 'walk.npy'}"
+    cli.main(["report", "--output", str(tmp_path), "--quick", "--series", series])
+    for name in ["SYN_emission.png", "treasury_payment.png", "walk.png"]:
+        assert (tmp_path / name).stat().st_size > 0
+    assert "peg_deviation_mean" in (tmp_path / "psm_metrics.md").read_text()
+    for name in cli.SIMULATION_TABLES:
+        assert (tmp_path / f"{name}.md").stat().st_size > 0
+    assert "kappa" in (tmp_path / "psm_sweep.md").read_text()
+    assert "![walk](walk.png)" in (tmp_path / "report.md").read_text()
+
+
+def test_misc_subcommand_outside_checkout(monkeypatch, tmp_path):
+    monkeypatch.setattr(cli, "MISC", tmp_path / "misc")
+    with pytest.raises(SystemExit, match="needs a source checkout"):
+        cli.main(["emission", "--output", str(tmp_path / "emission.png")])
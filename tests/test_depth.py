@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from research_synstation import amm, depth
+
+sys.path.append(str(Path(__file__).parents[1] / "misc"))
+import route_in_gm
+
+
+@pytest.mark.parametrize("is_buy", [True, False])
+@pytest.mark.parametrize("p", [0.05, 0.5, 0.95])
+def test_pool_table_within_rtol(p, is_buy):
+    index = depth.DepthIndex([route_in_gm.AMM(10**16, p, 0)], rtol=1e-6)
+    table = index.table(0, is_buy)
+    amounts = np.random.default_rng(0).uniform(1e8, table.max_amount, 1000)
+
+    exact = np.asarray(
+        index.quote_exact(0, amounts.astype(np.int64), is_buy), dtype=float
+    )
+    approx = index.quote(0, amounts.astype(np.int64), is_buy)
+    assert np.max(np.abs(approx / exact - 1)) < 2e-6
+
+    inverse = index.amount_for_output(0, exact, is_buy)
+    assert np.max(np.abs(inverse / amounts - 1)) < 1e-5
+
+
+def test_depth_matches_impact():
+    index = depth.DepthIndex([route_in_gm.AMM(10**18, 0.3, 0)])
+    table = index.table(0, False)
+    impacts = np.array([0.01, 0.02, 0.05])
+
+    amounts = index.depth(0, impacts, False)
+    outputs = np.asarray(
+        index.quote_exact(0, amounts.astype(np.int64), False), dtype=float
+    )
+    assert outputs / amounts / table.rates[0] == pytest.approx(1 - impacts, rel=1e-5)
+
+
+def test_swap_invalidates_only_its_pool():
+    pools = [route_in_gm.AMM(10**18, p, 0) for p in [0.2, 0.8]]
+    index = depth.DepthIndex(pools)
+    first, second = index.table(0, True), index.table(1, True)
+
+    dx = -(10**15)
+    dy = int(route_in_gm.quote_exact_output_single(pools[0], -dx, True))
+    index.swap(0, dx, dy)
+
+    assert index.table(0, True) is not first
+    assert index.table(1, True) is second
+    assert index.quote(0, 10**15, True) == pytest.approx(
+        float(index.quote_exact(0, 10**15, True)), rel=2e-6
+    )
+
+
+def test_direct_trade_rebuilds_stale_tables():
+    pools = [route_in_gm.AMM(10**18, p, 0) for p in [0.2, 0.8]]
+    index = depth.DepthIndex(pools)
+    first, second = index.table(0, False), index.table(1, False)
+    before = index.quote(0, 10**16, False)
+
+    # traded on the pool itself, not through index.swap
+    dx = 10**16
+    pools[0].swap(dx, -int(route_in_gm.quote_exact_input_single(pools[0], dx, False)))
+
+    assert index.table(0, False) is not first
+    assert index.table(1, False) is second
+    after = index.quote(0, 10**16, False)
+    assert after < before
+    assert after == pytest.approx(float(index.quote_exact(0, 10**16, False)), rel=2e-6)
+
+
+def test_market_table_matches_routed_quote():
+    market = amm.OutcomeMarket(10_000, np.full(10, 0.1), 30)
+    table = depth.market_depth_table(market, 3, True, 2000)
+    dx = np.random.default_rng(1).uniform(1, 2000, 100)
+
+    exact = market.quote(3, dx, market.find_optimal_split(3, dx, True), True)
+    assert np.max(np.abs(table.quote(dx) / exact - 1)) < 2e-6
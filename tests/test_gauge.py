@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from research_synstation import gauge
+
+
+def test_emission_schedule():
+    M, H = 500e6, 180 * 86400
+    assert gauge.emission(M, H, 0, H) == pytest.approx(M / 2)
+    assert gauge.emission(M, H, 0, 1e12) == pytest.approx(M)
+    assert gauge.emission(M, H, 0, 3 * H) == pytest.approx(
+        sum(gauge.emission(M, H, t, t + H) for t in [0, H, 2 * H])
+    )
+
+
+def test_accumulators_match_per_block_distribution():
+    rng = np.random.default_rng(0)
+    num_lps, num_blocks, block_time = 50, 300, 12
+    M, H = 1e6, 86400
+    weights = [0.7, 0.3]
+
+    gauges = [gauge.Gauge(num_lps), gauge.Gauge(num_lps)]
+    minter = gauge.Minter(gauges, weights, M, H)
+
+    # naive model: every block, every LP gets its pro-rata share
+    balances = np.zeros((2, num_lps))
+    rewards = np.zeros((2, num_lps))
+    claimed = np.zeros((2, num_lps))
+
+    for block in range(1, num_blocks + 1):
+        t = block * block_time
+        amount = minter.mint(t)
+        for g in range(2):
+            total = balances[g].sum()
+            if total > 0:
+                rewards[g] += amount * weights[g] * balances[g] / total
+
+        for g in range(2):
+            ids = rng.integers(0, num_lps, 5)
+            amounts = rng.uniform(0, 100, 5)
+            gauges[g].deposit(ids, amounts)
+            np.add.at(balances[g], ids, amounts)
+
+            ids = np.flatnonzero(balances[g] > 0)[:2]
+            amounts = balances[g][ids] / 2
+            gauges[g].withdraw(ids, amounts)
+            balances[g][ids] -= amounts
+
+            ids = rng.choice(num_lps, 3, replace=False)
+            claimed[g][ids] += gauges[g].claim(ids)
+            rewards[g][ids] = 0
+
+    for g in range(2):
+        assert np.allclose(gauges[g].balance, balances[g])
+        assert np.allclose(gauges[g].earned(np.arange(num_lps)), rewards[g])
+        total = claimed[g].sum() + gauges[g].earned(np.arange(num_lps)).sum()
+        assert total == pytest.approx(minter.total_minted * weights[g])
+
+
+def test_rewards_before_first_deposit_are_kept():
+    g = gauge.Gauge(2)
+    g.notify_reward(10.0)
+    g.deposit([0, 1], [1.0, 3.0])
+    g.notify_reward(4.0)
+    assert np.allclose(g.claim([0, 1]), [3.5, 10.5])
+
+    with pytest.raises(AssertionError, match="Insufficient balance"):
+        g.withdraw([0], [2.0])
+
+
+def test_failed_withdraw_leaves_state_unchanged():
+    g = gauge.Gauge(3)
+    g.deposit([0, 1, 2], [1.0, 2.0, 3.0])
+    g.notify_reward(6.0)
+
+    # each amount fits the balance of LP 1, their total does not
+    with pytest.raises(AssertionError, match="Insufficient balance"):
+        g.withdraw([1, 0, 1], [1.5, 0.5, 1.5])
+    assert np.array_equal(g.balance, [1.0, 2.0, 3.0])
+    assert g.total_supply == 6.0
+    assert np.allclose(g.earned([0, 1, 2]), [1.0, 2.0, 3.0])
+
+    g.withdraw([1, 1], [1.5, 0.5])
+    assert np.array_equal(g.balance, [1.0, 0.0, 3.0])
+    assert g.total_supply == 4.0
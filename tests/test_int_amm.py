@@ -0,0 +1,183 @@
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from research_synstation import int_amm
+
+sys.path.append(str(Path(__file__).parents[1] / "misc"))
+import get_amms_initializations
+import route_in_gm
+
+
+def random_reserves(max_bit, n=2000):
+    x = [random.randint(1, 1 << max_bit) for _ in range(n)]
+    y = [random.randint(1, 1 << max_bit) for _ in range(n)]
+    amount = [random.randint(0, 1 << random.randint(1, max_bit)) for _ in range(n)]
+    return x, y, amount
+
+
+@pytest.mark.parametrize("max_bit", [16, 40, 60, 64, 96, 126])
+def test_get_L_matches_contract_math(max_bit):
+    x, y, _ = random_reserves(max_bit)
+
+    for round_up in [True, False]:
+        L = int_amm.get_L(
+            np.array(x, dtype=object), np.array(y, dtype=object), round_up
+        )
+        expected = [int_amm._get_L_exact(a, b, round_up) for a, b in zip(x, y)]
+        assert [int(v) for v in L] == expected
+
+
+@pytest.mark.parametrize("max_bit", [16, 40, 60, 64, 96, 126])
+def test_quotes_match_contract_math(max_bit):
+    x, y, amount = random_reserves(max_bit)
+    X, Y, A = (np.array(v, dtype=object) for v in (x, y, amount))
+
+    dx = int_amm.get_dx(X, Y, A)
+    dy = int_amm.get_dy(X, Y, A)
+    assert [int(v) for v in dx] == [
+        int_amm._get_dx_exact(*args) for args in zip(x, y, amount)
+    ]
+    assert [int(v) for v in dy] == [
+        int_amm._get_dy_exact(*args) for args in zip(x, y, amount)
+    ]
+
+
+def reference_pool(x, y):
+    amm = route_in_gm.AMM.__new__(route_in_gm.AMM)
+    amm.x, amm.y, amm.fee_bps = x, y, 0
+    return amm
+
+
+@pytest.mark.parametrize("max_bit", [16, 60, 96])
+def test_exact_output_matches_reference(max_bit):
+    x, y, _ = random_reserves(max_bit, n=500)
+    pools = [reference_pool(a, b) for a, b in zip(x, y)]
+    X, Y = (np.array(v, dtype=object) for v in (x, y))
+
+    # negative amounts take reserves out of the pool, down to one unit
+    dy = [-random.randint(0, b - 1) for b in y]
+    dx = [-random.randint(0, a - 1) for a in x]
+    assert [int(v) for v in int_amm.get_dx(X, Y, np.array(dy, dtype=object))] == [
+        route_in_gm.get_dx(amm, d) for amm, d in zip(pools, dy)
+    ]
+    assert [int(v) for v in int_amm.get_dy(X, Y, np.array(dx, dtype=object))] == [
+        route_in_gm.get_dy(amm, d) for amm, d in zip(pools, dx)
+    ]
+
+    # buys are clipped to the x of the pool, sells must leave some y
+    buy_out = [random.randint(0, 2 * a) for a in x]
+    sell_out = [random.randint(0, b - 1) for b in y]
+    for is_buy, amount_out in [(True, buy_out), (False, sell_out)]:
+        quotes = int_amm.quote_exact_output_single(
+            X, Y, np.array(amount_out, dtype=object), is_buy
+        )
+        assert [int(v) for v in quotes] == [
+            route_in_gm.quote_exact_output_single(amm, a, is_buy)
+            for amm, a in zip(pools, amount_out)
+        ]
+
+    # negative exact inputs quote nothing
+    amount_in = np.array([-random.randint(1, 1 << max_bit) for _ in x], dtype=object)
+    for is_buy in [True, False]:
+        quotes = int_amm.quote_exact_input_single(X, Y, amount_in, is_buy)
+        assert [int(v) for v in quotes] == [
+            route_in_gm.quote_exact_input_single(amm, int(a), is_buy)
+            for amm, a in zip(pools, amount_in)
+        ]
+
+
+@pytest.mark.parametrize("x, y", [(10**6, 3 * 10**6), (3 << 70, 1 << 70)])
+def test_out_of_range_matches_reference(x, y):
+    amm = reference_pool(x, y)
+    cases = [
+        ("new_y Out of range", int_amm.get_dx, route_in_gm.get_dx, -y),
+        ("new_x Out of range", int_amm.get_dy, route_in_gm.get_dy, -x),
+        (
+            "y Out of range",
+            lambda x, y, a: int_amm.quote_exact_output_single(x, y, a, False),
+            lambda amm, a: route_in_gm.quote_exact_output_single(amm, a, False),
+            y,
+        ),
+    ]
+    for message, vectorized, reference, amount in cases:
+        with pytest.raises(AssertionError, match=message):
+            reference(amm, amount)
+        with pytest.raises(AssertionError, match=message):
+            vectorized(x, y, amount)
+        # one element out of range fails the whole array
+        amounts = np.array([0, amount, amount // 2], dtype=object)
+        with pytest.raises(AssertionError, match=message):
+            vectorized(
+                np.array([x] * 3, dtype=object),
+                np.array([y] * 3, dtype=object),
+                amounts,
+            )
+
+
+def test_uint64_path_stays_int64():
+    x = np.random.randint(1, int_amm.SAFE_BOUND, 1000)
+    y = np.random.randint(1, int_amm.SAFE_BOUND, 1000)
+
+    assert int_amm.get_L(x, y, True).dtype == np.int64
+    assert int_amm.quote_exact_input_single(x, y, y // 3, False).dtype == np.int64
+
+
+@pytest.mark.parametrize("max_bit", [40, 60, 96])
+def test_bulk_liquidity_matches_sequential(max_bit):
+    num_pools, num_ops = 20, 1000
+    amms = [
+        get_amms_initializations.PMAMM(
+            random.randint(1 << (max_bit - 8), 1 << max_bit),
+            random.randint(1 << (max_bit - 8), 1 << max_bit),
+        )
+        for _ in range(num_pools)
+    ]
+    x, y, supply = (
+        [getattr(amm, k) for amm in amms] for k in ("x", "y", "total_supply")
+    )
+    if max_bit > 60:
+        x, y, supply = (np.array(v, dtype=object) for v in (x, y, supply))
+
+    pools = [random.randrange(num_pools) for _ in range(num_ops)]
+    is_add = [random.random() < 0.6 for _ in range(num_ops)]
+    max_dx = [random.randint(1, 1 << (max_bit - 4)) for _ in range(num_ops)]
+    max_dy = [random.randint(1, 1 << (max_bit - 4)) for _ in range(num_ops)]
+    shares = [random.randint(1, 1 << (max_bit - 12)) for _ in range(num_ops)]
+
+    expected = []
+    for p, add, a, b, s in zip(pools, is_add, max_dx, max_dy, shares):
+        if add:
+            expected.append(amms[p].add_liquidity(a, b))
+        else:
+            expected.append((s, *amms[p].remove_liquidity(s)))
+
+    dtype = object if max_bit > 60 else np.int64
+    (x, y, supply), results = int_amm.apply_liquidity(
+        x,
+        y,
+        supply,
+        pools,
+        np.array(is_add),
+        np.array(max_dx, dtype=dtype),
+        np.array(max_dy, dtype=dtype),
+        np.array(shares, dtype=dtype),
+    )
+    assert [tuple(int(v) for v in r) for r in zip(*results)] == expected
+    assert [int(v) for v in x] == [amm.x for amm in amms]
+    assert [int(v) for v in y] == [amm.y for amm in amms]
+    assert [int(v) for v in supply] == [amm.total_supply for amm in amms]
+
+
+def test_liquidity_rounds_in_favor_of_pool():
+    amm = get_amms_initializations.PMAMM(10**12 + 7, 3 * 10**12 + 1)
+    L = amm.get_L(amm.x, amm.y, False)
+    shares, dx, dy = amm.add_liquidity(10**9, 10**9)
+    # no LP token is minted for free, and the pool keeps at least its share of L
+    assert shares * amm.x <= dx * amm.total_supply
+    assert shares * amm.y <= dy * amm.total_supply
+    dx, dy = amm.remove_liquidity(shares)
+    assert amm.get_L(amm.x, amm.y, False) >= L
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from research_synstation import amm, oracle
+
+
+def integrate(history, t0, t1, f=lambda p: p):
+    """
+    integral of a step function given as [(time, price from then on)]
+    """
+    total = 0.0
+    for (start, price), (end, _) in zip(history, history[1:] + [(np.inf, None)]):
+        total += f(price) * max(0.0, min(end, t1) - max(start, t0))
+    return total
+
+
+def test_twap_matches_price_history():
+    rng = np.random.default_rng(0)
+    n = 8
+    prices = rng.uniform(0.1, 1, n)
+    twap_oracle = oracle.TWAPOracle(n, prices, cardinality=64, start=0)
+    history = [[(0.0, p)] for p in prices]
+
+    t = 0.0
+    for _ in range(300):
+        t += rng.choice([0, 1, 2, 12])
+        ids = rng.choice(n, rng.integers(1, n + 1), replace=False)
+        new_prices = rng.uniform(0.1, 1, len(ids))
+        twap_oracle.update(ids, new_prices, t)
+        for i, p in zip(ids, new_prices):
+            if history[i][-1][0] == t:
+                history[i][-1] = (t, p)
+            else:
+                history[i].append((t, p))
+
+    ids = np.arange(n)
+    for end, window in [(t, 50), (t + 7, 30), (t - 40, 25.5), (t - 3, 1)]:
+        expected = [integrate(h, end - window, end) / window for h in history]
+        assert np.allclose(twap_oracle.twap(ids, window, end), expected)
+
+        expected = [
+            np.exp(integrate(h, end - window, end, np.log) / window) for h in history
+        ]
+        assert np.allclose(twap_oracle.twap(ids, window, end, geometric=True), expected)
+
+    # per pool windows end at different times
+    ends = t - rng.uniform(0, 30, n)
+    expected = [integrate(h, e - 10, e) / 10 for h, e in zip(history, ends)]
+    assert np.allclose(twap_oracle.twap(ids, 10, ends), expected)
+
+    with pytest.raises(AssertionError, match="observation too old"):
+        twap_oracle.twap(ids, t, t)
+
+
+def test_outcome_market_records_trades():
+    market = amm.OutcomeMarket(10_000, [0.5, 0.3, 0.2], 30)
+    twap_oracle = market.attach_oracle()
+    history = [[(0.0, p)] for p in market.get_prob()]
+
+    for block in range(1, 50):
+        market.observe(block * 2)
+        market.buy(block % 3, 100)
+        for h, p in zip(history, market.get_prob()):
+            h.append((block * 2, p))
+
+    ids = np.arange(3)
+    expected = [integrate(h, 60, 98) / 38 for h in history]
+    assert np.allclose(twap_oracle.twap(ids, 38, 98), expected)
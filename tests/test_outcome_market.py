@@ -0,0 +1,53 @@
+import copy
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from research_synstation import amm
+
+sys.path.append(str(Path(__file__).parents[1] / "misc"))
+import route_in_outcome
+
+
+def make_market(n, fee_bps, seed):
+    p = np.random.default_rng(seed).dirichlet(np.full(n, 3.0))
+    market = amm.OutcomeMarket(10_000, p, fee_bps)
+    amms = [route_in_outcome.AMM(market.X[j], p[j], fee_bps) for j in range(n)]
+    return market, amms, p
+
+
+@pytest.mark.parametrize("is_buy", [True, False])
+@pytest.mark.parametrize("n", [2, 5, 30])
+def test_trade_matches_route_in_outcome(n, is_buy):
+    market, amms, _ = make_market(n, 30, n)
+    i = n // 2
+    dx = np.array([1.0, 50.0, 500.0])
+
+    quote = route_in_outcome.buy_quote if is_buy else route_in_outcome.sell_quote
+    dx_i = market.find_optimal_split(i, dx, is_buy)
+    dy = market.quote(i, dx, dx_i, is_buy)
+    for k in range(len(dx)):
+        expected = route_in_outcome.find_optimal_split(amms, i, dx[k], is_buy)
+        # both searches stop at a relative width of precision
+        assert dx_i[k] == pytest.approx(expected, rel=1e-5)
+        assert dy[k] == pytest.approx(quote(amms, i, dx[k], dx_i[k]), rel=1e-9)
+
+    trade = route_in_outcome.buy_multiple if is_buy else route_in_outcome.sell_multiple
+    expected = trade(copy.deepcopy(amms), i, dx[1], dx_i[1])
+    dy = market.buy(i, dx[1]) if is_buy else market.sell(i, dx[1])
+    assert dy == pytest.approx(expected, rel=1e-9)
+
+
+def test_arbitrage_moves_pools_to_band():
+    market, _, p = make_market(10, 30, 0)
+    P_ext = np.random.default_rng(1).dirichlet(p * 50)
+    c = 1 - 30 / 10**4
+
+    market.arbitrage(P_ext)
+    P = market.get_prob()
+
+    assert np.all(P >= P_ext * c * (1 - 1e-9))
+    assert np.all(P <= P_ext / c * (1 + 1e-9))
+    assert market.complete_set_arbitrage() == 0.0
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from research_synstation import paths
+
+
+def test_price_path_chunks_match_single_shot():
+    single = paths.PricePath(4000, 0.01, 2, 3, chunk_size=1 << 20, seed=42)
+    chunked = paths.PricePath(4000, 0.01, 2, 3, chunk_size=1000, seed=42)
+
+    P_single = np.concatenate(list(single))
+    P_chunked = np.concatenate(list(chunked))
+
+    assert len(P_single) == 3 * 86400 // 2
+    assert np.array_equal(P_single, P_chunked)
+
+
+def test_noise_arrivals_chunks_match_single_shot():
+    num_blocks = 100_000
+    single = paths.NoiseArrivals(0.3, 1, 100, seed=7)
+    chunked = paths.NoiseArrivals(0.3, 1, 100, seed=7)
+
+    arrivals, trade_size = single.next_chunk(num_blocks)
+    chunks = [chunked.next_chunk(n) for n in [1, 999, 9000, 90_000]]
+
+    assert np.array_equal(arrivals, np.concatenate([c[0] for c in chunks]))
+    assert np.array_equal(trade_size, np.concatenate([c[1] for c in chunks]))
+
+
+def test_price_replay_resamples_to_last_tick(tmp_path):
+    rng = np.random.default_rng(3)
+    timestamps = np.floor(np.cumsum(rng.exponential(1.3, 50_000)) * 2) / 2
+    prices = 4000 * np.exp(np.cumsum(rng.normal(0, 1e-4, len(timestamps))))
+    np.save(tmp_path / "ticks.npy", np.stack([timestamps, prices], axis=1))
+    pd.DataFrame({"timestamp": timestamps, "price": prices}).to_csv(
+        tmp_path / "ticks.csv", index=False
+    )
+
+    block_ends = np.arange(timestamps[0] + 2, timestamps[-1] + 1e-9, 2)
+    expected = prices[np.searchsorted(timestamps, block_ends, side="right") - 1]
+
+    for source in ["ticks.npy", "ticks.csv"]:
+        replay = paths.PriceReplay(
+            tmp_path / source, 2, chunk_size=777, read_size=10_007
+        )
+        chunks = list(replay)
+
+        assert max(len(P) for P in chunks) == 777
+        assert np.allclose(np.concatenate(chunks), expected, rtol=1e-15, atol=0)
+
+
+def test_cir_path_chunks_and_moments():
+    kappa, theta, sigma, r0 = 2.0, 0.05, 0.1, 0.02
+    single = paths.CIRPath(r0, theta, kappa, sigma, 86400, 182, 20_000, seed=1)
+    chunked = paths.CIRPath(r0, theta, kappa, sigma, 86400, 182, 20_000, 50, seed=1)
+
+    R = np.concatenate(list(single))
+    assert np.array_equal(R, np.concatenate(list(chunked)))
+    assert R.shape == (182, 20_000)
+    assert R.min() > 0
+
+    # exact transition: mean and variance at the horizon match the closed form
+    t = 182 / 365
+    mean = theta + (r0 - theta) * np.exp(-kappa * t)
+    var = (
+        r0 * sigma**2 / kappa * (np.exp(-kappa * t) - np.exp(-2 * kappa * t))
+        + theta * sigma**2 / (2 * kappa) * (1 - np.exp(-kappa * t)) ** 2
+    )
+    assert R[-1].mean() == pytest.approx(mean, rel=2e-3)
+    assert R[-1].var() == pytest.approx(var, rel=3e-2)
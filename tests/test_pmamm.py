@@ -0,0 +1,50 @@
+import boa
+import pytest
+
+from research_synstation import int_amm
+from script.deploy_market import deploy_market, get_reserves
+from src.mocks import MockERC20
+
+
+@pytest.mark.parametrize("fee_rate", [0, 30])
+def test_liquidity_matches_int_amm(fee_rate):
+    _, (pool, _) = deploy_market(
+        [get_reserves(10**24, p) for p in [0.3, 0.7]], fee_rate
+    )
+    outcome = MockERC20.at(pool.base_asset())
+    good_money = MockERC20.at(pool.quote_asset())
+
+    lp = boa.env.generate_address()
+    outcome.mint(lp, 10**30)
+    good_money.mint(lp, 10**30)
+    with boa.env.prank(lp):
+        outcome.approve(pool.address, 2**256 - 1)
+        good_money.approve(pool.address, 2**256 - 1)
+
+    for max_dx, max_dy in [(10**18 + 3, 10**21), (10**22, 7 * 10**17 + 1), (1, 10**20)]:
+        packed = pool.reserves()
+        x, y, supply = packed >> 128, packed & ((1 << 128) - 1), pool.totalSupply()
+        shares, dx, dy = (
+            int(v) for v in int_amm.add_liquidity(x, y, supply, max_dx, max_dy)
+        )
+
+        balance = outcome.balanceOf(lp), good_money.balanceOf(lp)
+        assert pool.add_liquidity(max_dx << 128 | max_dy, sender=lp) == shares
+        assert pool.reserves() == (x + dx) << 128 | (y + dy)
+        assert (outcome.balanceOf(lp), good_money.balanceOf(lp)) == (
+            balance[0] - dx,
+            balance[1] - dy,
+        )
+
+    packed = pool.reserves()
+    x, y, supply = packed >> 128, packed & ((1 << 128) - 1), pool.totalSupply()
+    shares = pool.balanceOf(lp) // 3
+    dx, dy = (int(v) for v in int_amm.remove_liquidity(x, y, supply, shares))
+    assert pool.remove_liquidity(shares, sender=lp) == dx << 128 | dy
+    assert pool.reserves() == (x - dx) << 128 | (y - dy)
+    assert pool.totalSupply() == supply - shares
+
+    with boa.reverts("Liquidity: zero shares"):
+        pool.add_liquidity(10**20, sender=lp)
+    with boa.reverts("Reserves: underflow"):
+        pool.remove_liquidity(pool.totalSupply(), sender=pool.owner())
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from research_synstation import amm, portfolio
+
+BIDS = [1_000.0, 5_000.0, 20_000.0, 100_000.0]
+FEES = [0, 10, 30, 100]
+
+
+def make_markets():
+    return (
+        portfolio.BinaryMarketPortfolio(BIDS, FEES),
+        [amm.BinaryMarket(bid, fee) for bid, fee in zip(BIDS, FEES)],
+    )
+
+
+def assert_same_state(vectorized, markets):
+    for i, market in enumerate(markets):
+        for col, pool in enumerate([market.YesMarket, market.NoMarket]):
+            assert vectorized.X[i, col] == pytest.approx(pool.X, rel=1e-9)
+            assert vectorized.Y[i, col] == pytest.approx(pool.Y, rel=1e-9)
+            assert vectorized.L[i, col] == pytest.approx(pool.L, rel=1e-9)
+    np.testing.assert_allclose(
+        vectorized.total_noise_fee(),
+        [m.total_noise_fee() for m in markets],
+        rtol=1e-9,
+        atol=1e-12,
+    )
+    np.testing.assert_allclose(
+        vectorized.total_arb_fee(),
+        [m.total_arb_fee() for m in markets],
+        rtol=1e-9,
+        atol=1e-12,
+    )
+
+
+def test_matches_binary_markets():
+    rng = np.random.default_rng(0)
+    vectorized, markets = make_markets()
+    P_ext = np.full(len(markets), 0.5)
+
+    for _ in range(200):
+        # noise trades on a random subset, large enough to hit the clip bounds
+        dy = rng.exponential(np.asarray(BIDS) / 10)
+        choice = rng.integers(0, 4, len(markets))
+        mask = rng.random(len(markets)) < 0.7
+        vectorized.noise_trade(dy, choice, mask)
+        for i in np.flatnonzero(mask):
+            pool = [markets[i].YesMarket, markets[i].NoMarket][choice[i] // 2]
+            (pool.buy if choice[i] % 2 == 0 else pool.sell)(dy[i])
+
+        P_ext = np.clip(P_ext + rng.normal(0, 0.05, len(markets)), 0.01, 0.99)
+        arb_mask = rng.random(len(markets)) < 0.8
+        vectorized.arbitrage(P_ext, arb_mask)
+        for i in np.flatnonzero(arb_mask):
+            markets[i].arbitrage(P_ext[i])
+
+        assert_same_state(vectorized, markets)
+        np.testing.assert_allclose(
+            vectorized.get_value(P_ext),
+            [m.get_value(p) for m, p in zip(markets, P_ext)],
+            rtol=1e-9,
+        )
+
+
+def test_arbitrage_without_mask_moves_every_market():
+    vectorized, markets = make_markets()
+    P_ext = np.array([0.1, 0.4, 0.6, 0.9])
+
+    vectorized.arbitrage(P_ext)
+    for market, p in zip(markets, P_ext):
+        market.arbitrage(p)
+
+    assert_same_state(vectorized, markets)
+    assert np.all(vectorized.total_arb_fee()[1:] > 0)
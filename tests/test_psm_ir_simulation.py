@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parents[1] / "misc"))
+import psm_ir_simulation
+
+
+def make_GM():
+    GM = psm_ir_simulation.GoodMoney(1000, 0.05, 0.5, 1e-6)
+    PSM = psm_ir_simulation.PegStabilityModule(GM, 0, 0, 0, 3600)
+    GM.setPSM(PSM)
+    PSM.deposit(1000, 0)
+    return GM, PSM
+
+
+# supply events: (timestamp, amount minted, negative for burns)
+EVENTS = [(3_000, 500), (7_200, -800), (7_201, 100), (20_000, -300)]
+END = 30_000
+
+
+def test_lazy_index_matches_per_second_stepping():
+    lazy, _ = make_GM()
+    stepped, _ = make_GM()
+    rates = [stepped.interestRate]
+
+    events = dict(EVENTS)
+    for t in range(1, END + 1):
+        stepped.updateInterestRate(t)
+        rates.append(stepped.interestRate)
+        if t in events:
+            (stepped.mint if events[t] > 0 else stepped.burn)(abs(events[t]), t)
+    for t, amount in EVENTS:
+        (lazy.mint if amount > 0 else lazy.burn)(abs(amount), t)
+
+    # accrued only on the supply events, read at the end
+    assert lazy.getInterestRate(END) == pytest.approx(stepped.interestRate, rel=1e-12)
+    assert lazy.getInterestIndex(END) == pytest.approx(stepped.interestIndex, rel=1e-12)
+    # and the integral of the per-second rates, trapezoidal
+    rates = np.array(rates)
+    integral = np.sum(rates[1:] + rates[:-1]) / 2
+    assert lazy.getInterestIndex(END) == pytest.approx(integral, rel=1e-6)
+
+
+def test_rate_moves_with_debt_fraction():
+    GM, _ = make_GM()
+    # debt fraction 1000 / 2000 is on target: constant rate
+    assert GM.getInterestRate(10_000) == pytest.approx(0.05)
+    assert GM.getInterestIndex(10_000) == pytest.approx(0.05 * 10_000)
+
+    # more borrowed GM lowers the debt fraction and raises the rate
+    GM.mint(2000, 10_000)
+    assert GM.getInterestRate(20_000) > 0.05
+    # less borrowed GM lowers it
+    GM.burn(3000, 20_000)
+    rate = GM.getInterestRate(20_000)
+    assert GM.getInterestRate(30_000) < rate
+
+
+def test_reads_do_not_change_state():
+    GM, _ = make_GM()
+    GM.mint(500, 100)
+    state = vars(GM).copy()
+    GM.getInterestRate(10_000)
+    GM.getInterestIndex(10_000)
+    assert vars(GM) == state
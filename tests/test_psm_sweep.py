@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parents[1] / "misc"))
+import psm_ir_simulation
+import psm_sweep
+
+BLOCK_TIME = 60 * 60
+
+
+def test_sweep_matches_direct_runs():
+    configs = [
+        {"kappa": kappa, "target_debt_fraction": fraction}
+        for kappa in [1e-7, 1e-5]
+        for fraction in [0.3, 0.5]
+    ]
+    scenarios = psm_sweep.generate_scenarios(2, 48, BLOCK_TIME, seed=0)
+
+    results = {
+        (i, s): metrics
+        for i, s, metrics in psm_sweep.sweep(
+            configs, scenarios, BLOCK_TIME, max_workers=2
+        )
+    }
+    assert len(results) == len(configs) * 2
+
+    for (i, s), metrics in results.items():
+        expected = psm_ir_simulation.psm_simulation(
+            configs[i], scenarios[0, s], scenarios[1, s], BLOCK_TIME
+        )
+        assert metrics.keys() == expected.keys()
+        for m in expected:
+            assert metrics[m] == pytest.approx(expected[m], rel=1e-12)
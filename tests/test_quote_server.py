@@ -0,0 +1,165 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from research_synstation import amm, quote_server
+
+
+async def request(port, method, path, body=None, n=1):
+    """
+    send n requests over one keep-alive connection
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = b"" if body is None else json.dumps(body).encode()
+    responses = []
+    for _ in range(n):
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+            + payload
+        )
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        data = await reader.readexactly(int(headers["content-length"]))
+        responses.append((status, json.loads(data)))
+    writer.close()
+    return responses if n > 1 else responses[0]
+
+
+def make_markets():
+    return {"m": amm.OutcomeMarket(10_000, np.full(10, 0.1), 30)}
+
+
+def test_concurrent_quotes_are_coalesced():
+    async def main():
+        server = quote_server.QuoteServer(make_markets(), batch_window=0.01)
+        port = await server.start(port=0)
+        amounts = np.linspace(1, 500, 50)
+        responses = await asyncio.gather(
+            *[
+                request(
+                    port,
+                    "POST",
+                    "/quote",
+                    {"market": "m", "outcome": 3, "amount": a, "is_buy": True},
+                )
+                for a in amounts
+            ]
+        )
+        stats = (await request(port, "GET", "/stats"))[1]
+        await server.stop()
+        return amounts, responses, stats
+
+    amounts, responses, stats = asyncio.run(main())
+    market = make_markets()["m"]
+    expected = market.quote(
+        3, amounts, market.find_optimal_split(3, amounts, True), True
+    )
+
+    assert [status for status, _ in responses] == [200] * len(amounts)
+    assert [r["amount"] for _, r in responses] == pytest.approx(expected, rel=1e-12)
+    assert stats["requests"] == len(amounts)
+    assert stats["batches"] < len(amounts)
+    assert stats["latency_ms"]["p50"] <= stats["latency_ms"]["p99"]
+
+
+def test_cache_is_dropped_on_swap():
+    async def main():
+        server = quote_server.QuoteServer(make_markets())
+        port = await server.start(port=0)
+        body = {"market": "m", "outcome": 1, "amount": 100, "is_buy": False}
+
+        first, repeated = await request(port, "POST", "/quote", body, n=2)
+        swap = await request(port, "POST", "/swap", body)
+        after = await request(port, "POST", "/quote", body)
+        missing = await request(port, "POST", "/quote", dict(body, market="x"))
+        invalid = await request(port, "POST", "/quote", dict(body, outcome=10))
+        await server.stop()
+        return server, first, repeated, swap, after, missing, invalid
+
+    server, first, repeated, swap, after, missing, invalid = asyncio.run(main())
+
+    assert repeated == first
+    assert server.cache_hits == 1
+    assert swap[1]["amount"] == pytest.approx(first[1]["amount"], rel=1e-9)
+    assert after[1]["version"] == 1
+    assert after[1]["amount"] < first[1]["amount"]
+    assert missing[0] == 404
+    assert invalid[0] == 400
+
+
+def test_cache_evicts_least_recently_used():
+    async def main():
+        server = quote_server.QuoteServer(make_markets(), cache_size=3)
+        for amount in [1.0, 2.0, 3.0, 1.0, 4.0]:
+            await server.quote("m", 0, amount, True)
+        return server
+
+    server = asyncio.run(main())
+    cache = server.cache["m"]
+    assert list(cache) == [(0, True, 3.0), (0, True, 1.0), (0, True, 4.0)]
+    assert server.cache_hits == 1
+
+
+def test_failed_batch_answers_every_request():
+    def fail(error):
+        def find_optimal_split(*args):
+            raise error
+
+        return find_optimal_split
+
+    async def main():
+        markets = make_markets()
+        server = quote_server.QuoteServer(markets, batch_window=0.01)
+        port = await server.start(port=0)
+        body = {"market": "m", "outcome": 2, "amount": 10, "is_buy": True}
+        statuses = []
+        for error in [ValueError("split Out of range"), ZeroDivisionError()]:
+            markets["m"].find_optimal_split = fail(error)
+            responses = await asyncio.gather(
+                *[request(port, "POST", "/quote", dict(body, amount=a)) for a in [1, 2]]
+            )
+            statuses.append([status for status, _ in responses])
+        await server.stop()
+        return statuses
+
+    assert asyncio.run(main()) == [[400, 400], [500, 500]]
+
+
+def test_malformed_request_is_answered_and_closed():
+    async def send(port, raw):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        response = await reader.read()  # until the server closes the connection
+        writer.close()
+        return response
+
+    async def main():
+        server = quote_server.QuoteServer(make_markets())
+        port = await server.start(port=0)
+        responses = [
+            await send(port, raw)
+            for raw in [
+                b"GARBAGE\r\n\r\n",
+                b"POST /quote HTTP/1.1\r\nContent-Length: abc\r\n\r\n{}",
+                b"POST /quote HTTP/1.1\r\nContent-Length: -1\r\n\r\n",
+                b"\xff\xfe /quote HTTP/1.1\r\n\r\n",
+            ]
+        ]
+        # the server keeps serving other connections
+        stats = await request(port, "GET", "/stats")
+        await server.stop()
+        return responses, stats
+
+    responses, stats = asyncio.run(main())
+    for response in responses:
+        head, _, body = response.partition(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.1 400")
+        assert json.loads(body)["error"].startswith("bad request")
+    assert stats[0] == 200
@@ -0,0 +1,116 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from research_synstation import redemption
+from research_synstation.paths import SECONDS_PER_YEAR
+
+sys.path.append(str(Path(__file__).parents[1] / "misc"))
+import psm_ir_simulation
+
+
+def test_fenwick():
+    rng = np.random.default_rng(0)
+    values = np.zeros(100)
+    tree = redemption.Fenwick(100)
+    for _ in range(500):
+        i = int(rng.integers(0, 100))
+        delta = float(rng.uniform(0, 10))
+        values[i] += delta
+        tree.add(i, delta)
+    cumsum = np.concatenate([[0], np.cumsum(values)])
+    assert np.allclose([tree.prefix(i) for i in range(101)], cumsum)
+    for target in rng.uniform(0, cumsum[-1], 20):
+        assert tree.search(target) == np.searchsorted(cumsum[1:], target, "right")
+
+
+def test_redemptions_hit_lowest_rates_first():
+    rng = np.random.default_rng(1)
+    n = 500
+    index = redemption.RedemptionIndex(n, tick=0.005, max_rate=0.2, fee_rate=0.005)
+
+    # reference: positions redeemed by (rate, arrival), debts accrued one by one
+    arrival = np.zeros(n)
+    debt = np.zeros(n)
+    last = np.zeros(n)
+    rate = np.zeros(n)
+    active = np.zeros(n, dtype=bool)
+
+    def accrued(ids, t):
+        return debt[ids] * (1 + rate[ids] * (t - last[ids]) / SECONDS_PER_YEAR)
+
+    t = 0
+    clock = 0
+    for _ in range(100):
+        t += int(rng.integers(1, 86400))
+
+        ids = rng.choice(np.flatnonzero(~active), 5, replace=False)
+        rates = rng.integers(1, 40, 5) * 0.005
+        index.open(ids, 10.0, rng.uniform(100, 1000, 5), rates, t)
+        debt[ids], last[ids], rate[ids] = index.debt[ids], t, rates
+        arrival[ids] = clock + np.arange(5)
+        clock += 5
+        active[ids] = True
+
+        ids = rng.choice(np.flatnonzero(active), 2, replace=False)
+        rates = rng.integers(1, 40, 2) * 0.005
+        index.set_rate(ids, rates, t)
+        debt[ids], last[ids], rate[ids] = accrued(ids, t), t, rates
+        arrival[ids] = clock + np.arange(2)
+        clock += 2
+
+        ids = np.flatnonzero(active)
+        assert index.total_debt(t) == pytest.approx(accrued(ids, t).sum())
+        assert index.average_rate(t) == pytest.approx(
+            np.average(rate[ids], weights=accrued(ids, t))
+        )
+        assert index.debt_ahead(0.1, t) == pytest.approx(
+            accrued(ids[rate[ids] < 0.1 - 1e-9], t).sum()
+        )
+
+        amount = rng.uniform(0, 3000)
+        order = ids[np.lexsort((arrival[ids], np.round(rate[ids] / 0.005)))]
+        cumulative = np.cumsum(accrued(order, t))
+        k = np.searchsorted(cumulative, amount, "right")
+        assert index.redemption_rate(amount, t) == pytest.approx(
+            rate[order[min(k, len(order) - 1)]]
+        )
+
+        redeemed, coll, hit = index.redeem(amount, 200.0, t)
+        assert redeemed == pytest.approx(min(amount, cumulative[-1]))
+        assert list(hit) == list(order[: k + 1])
+        assert coll == pytest.approx(redeemed * 0.995 / 200.0)
+
+        # only the positions hit compound their interest
+        debt[hit], last[hit] = accrued(hit, t), t
+        debt[order[:k]] = 0
+        active[order[:k]] = False
+        if k < len(order):
+            debt[order[k]] -= amount - (cumulative[k - 1] if k else 0)
+
+        assert np.array_equal(index.active, active)
+        assert np.allclose(index.debt_of(np.arange(n), t), accrued(np.arange(n), t))
+
+
+def test_gm_supply_follows_debt():
+    GM = psm_ir_simulation.GoodMoney(1000, 0.05, 0.5, 1e-6)
+    PSM = psm_ir_simulation.PegStabilityModule(GM, 0.01, 5000, 5000, 3600)
+    GM.setPSM(PSM)
+    PSM.deposit(1000, 0)
+
+    index = redemption.RedemptionIndex(3, GM=GM)
+    index.open([0, 1], 10.0, [500.0, 500.0], [0.02, 0.05], 0)
+    assert GM.totalSupply == pytest.approx(1990 + 1000)
+
+    t = SECONDS_PER_YEAR
+    index.adjust([0], 0.0, -100.0, t)
+    # interest of the year minted, repaid debt burned
+    assert GM.totalSupply == pytest.approx(1990 + 1000 + 10 + 25 - 100)
+    assert GM.totalSupply == pytest.approx(1990 + index.total_debt(t))
+
+    _, _, hit = index.redeem(600, 1.0, t)
+    assert list(hit) == [0, 1] and not index.active[0]
+    assert GM.totalSupply == pytest.approx(1990 + 1000 + 10 + 25 - 100 - 600)
+    assert index.debt_of(1, t) == pytest.approx(525 - (600 - 410))
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from research_synstation import report
+
+
+def metrics(scale):
+    return {"mean": 1.5 * scale, "max": 3.0 * scale}
+
+
+@pytest.mark.parametrize("n", [4001, 10_007, 1_000_000])
+def test_decimate_keeps_bucket_extremes(n):
+    rng = np.random.default_rng(n)
+    y = np.cumsum(rng.normal(size=n))
+    x = np.linspace(0, 1, n)
+
+    dx, dy = report.decimate(y, 4000, x)
+
+    assert len(dy) <= 4000
+    assert np.all(np.diff(dx) > 0)
+    assert dx[0] == x[0] and dx[-1] == x[-1]
+    assert dy.min() == y.min() and dy.max() == y.max()
+    # every point is a sample of the trajectory
+    assert np.array_equal(dy, y[np.searchsorted(x, dx)])
+
+
+def test_decimate_keeps_spikes():
+    y = np.zeros(1_000_000)
+    y[123_457] = 10
+    y[876_543] = -10
+
+    _, dy = report.decimate(y, 1000)
+    assert 10 in dy and -10 in dy
+    # striding to the same number of points misses both
+    assert not np.any(y[:: len(y) // 1000])
+
+
+def test_decimate_short_series_unchanged():
+    y = np.arange(100.0)
+    dx, dy = report.decimate(y, 4000)
+    assert np.array_equal(dx, np.arange(100))
+    assert np.array_equal(dy, y)
+
+
+def test_render_report(tmp_path):
+    np.save(tmp_path / "walk.npy", np.cumsum(np.ones((3, 100_000)), axis=1))
+    figures = {
+        "walk": (
+            report.plot_series,
+            {"series": {"walk": str(tmp_path / "walk.npy")}, "title": "walk"},
+        )
+    }
+    tables = {"metrics": (metrics, {"scale": 2})}
+
+    paths = report.render_report(tmp_path / "report", figures, tables, 2)
+
+    assert [path.name for path in paths] == ["walk.png", "metrics.md"]
+    assert paths[0].stat().st_size > 0
+    index = (tmp_path / "report" / "report.md").read_text()
+    assert "![walk](walk.png)" in index
+    assert "| max      |       6 |" in index
@@ -0,0 +1,49 @@
+import numpy as np
+
+from research_synstation import int_amm, reserve_reader
+from script.deploy_market import deploy_market, get_reserves
+from src import ReserveReader
+
+
+def test_read_markets_matches_pools():
+    markets = {}
+    pools = {}
+    for market_id, probabilities in enumerate([[0.4, 0.4, 0.2], [0.1] * 10]):
+        reserves = [get_reserves(10**24, p) for p in probabilities]
+        _, pools[market_id] = deploy_market(reserves, 30 + market_id, market_id)
+        markets[market_id] = [pool.address for pool in pools[market_id]]
+
+    reader = reserve_reader.ReserveReader.from_contract(
+        ReserveReader.deploy(), batch_size=4
+    )
+    state = reader.read_markets(markets)
+
+    for market_id, (x, y, fee_rate) in state.items():
+        packed = [pool.reserves() for pool in pools[market_id]]
+        assert list(x) == [p >> 128 for p in packed]
+        assert list(y) == [p & ((1 << 128) - 1) for p in packed]
+        assert list(fee_rate) == [30 + market_id] * len(packed)
+
+    # the state is ready for the vectorized contract math
+    x, y, _ = state[0]
+    dx = int_amm.quote_exact_output_single(x, y, np.full(len(x), 10**20), True)
+    assert list(dx) == [
+        int_amm._get_dy_exact(int(a), int(b), -(10**20)) for a, b in zip(x, y)
+    ]
+
+
+def test_one_call_per_batch():
+    _, pools = deploy_market([get_reserves(10**9, 0.5)] * 2, 30)
+    contract = ReserveReader.deploy()
+    calls = []
+
+    def call(batches):
+        calls.append(len(batches))
+        return [contract.get_reserves(batch) for batch in batches]
+
+    reader = reserve_reader.ReserveReader(call, batch_size=256)
+    x, _, _ = reader.read([pool.address for pool in pools] * 300)
+
+    assert calls == [3]
+    assert len(x) == 600
+    assert x.dtype == np.int64
@@ -0,0 +1,211 @@
+import math
+import operator
+import random
+import sys
+from pathlib import Path
+
+import boa
+import pytest
+
+from script.deploy_market import deploy_market
+
+sys.path.append(str(Path(__file__).parents[1] / "misc"))
+import route_in_gm
+
+MAX_UINT256 = 2**256 - 1
+
+
+def get_L(x, y):
+    return (math.isqrt(y * y + ((x * y) << 2)) + y) >> 1
+
+
+# Python mirror of the Router quoting, rounding included
+
+
+def quote_single(is_buy, amount, x, y, fee_rate):
+    if amount == 0:
+        return 0
+    L = get_L(x, y) + 1  # _get_L(x, y, False)
+    if is_buy:
+        if amount >= x:
+            return MAX_UINT256
+        new_y = L**2 // (x - amount + L) + 1
+        return (new_y - y) * 10000 // (10000 - fee_rate) + 1
+    new_y = L**2 // (x + amount + L) + 1
+    if new_y >= y:
+        return 0
+    return (y - new_y) * (10000 - fee_rate) // 10000
+
+
+def quote_multi(is_buy, amount, path1, fee_rate, i, reserves):
+    path2 = amount - path1
+    quote_in = quote_out = 0
+    if is_buy:
+        quote_in = quote_single(True, path1, *reserves[i], fee_rate)
+        if quote_in == MAX_UINT256:
+            return MAX_UINT256
+        quote_in += path2
+    else:
+        quote_out = quote_single(False, path1, *reserves[i], fee_rate) + path2
+
+    if path2 > 0:
+        for j, (x, y) in enumerate(reserves):
+            if j == i:
+                continue
+            if is_buy:
+                quote_out += quote_single(False, path2, x, y, fee_rate)
+            else:
+                quote_j = quote_single(True, path2, x, y, fee_rate)
+                if quote_j == MAX_UINT256:
+                    return 0
+                quote_in += quote_j
+
+    if is_buy:
+        return quote_in - min(quote_in, quote_out)
+    return quote_out - min(quote_in, quote_out)
+
+
+def get_quote(reserves, fee_rate, is_buy, amount, i):
+    """
+    golden section search over path1 in the ranges of Router._get_optimal_split
+    """
+    if is_buy:
+        left, right = 0, min(amount, reserves[i][0] - 1)
+        better = operator.lt  # least GM paid
+    else:
+        min_x = min(x for j, (x, _) in enumerate(reserves) if j != i)
+        left, right = amount - min(amount, min_x - 1), amount
+        better = operator.gt  # most GM received
+
+    def f(path1):
+        return quote_multi(is_buy, amount, path1, fee_rate, i, reserves)
+
+    a = right - (right - left) * 10000 // 16180
+    b = left + (right - left) * 10000 // 16180
+    f_a, f_b = f(a), f(b)
+    for _ in range(16):
+        if a >= b:
+            break
+        if better(f_a, f_b):
+            right, b, f_b = b, a, f_a
+            a = right - (right - left) * 10000 // 16180
+            f_a = f(a)
+        else:
+            left, a, f_a = a, b, f_b
+            b = left + (right - left) * 10000 // 16180
+            f_b = f(b)
+    return f((left + right) // 2)
+
+
+@pytest.mark.parametrize("max_bit", [64, 96, 126])
+def test_get_L(router_contract, max_bit):
+    for _ in range(32):
+        x = random.randint(1, (1 << max_bit) - 2)
+        y = random.randint(1, (1 << max_bit) - 2)
+        L = router_contract.internal._get_L(x, y, True)
+
+        assert L**2 <= (x + L) * y
+        assert (L + 1) ** 2 > (x + (L + 1)) * y
+        assert L == get_L(x, y)
+        assert router_contract.internal._get_L(x, y, False) == L + 1
+
+
+def test_get_L_exhaustive(router_contract):
+    for x in range(1, 17):
+        for y in range(1, 17):
+            assert router_contract.internal._get_L(x, y, True) == get_L(x, y)
+
+
+@pytest.mark.parametrize("n", [2, 5, 9])
+def test_get_quote_buy_matches_optimal_flashloan(n):
+    amms = route_in_gm.generate_amms(n)
+    router, _ = deploy_market([(amm.x, amm.y) for amm in amms], 0)
+
+    for i in range(n):
+        amount_in = 10**6 * random.randint(10, 1_000)
+        _, amount_out = route_in_gm.find_optimal_flashloan(amms, i, amount_in)
+
+        # GM required for the O_i bought with amount_in GM through the optimal flashloan
+        quote = router.get_quote(0, True, amount_out, i)
+        assert abs(quote - amount_in) <= amount_in // 10_000
+
+
+@pytest.mark.parametrize("fee_rate", [0, 30, 100])
+def test_get_quote_single_matches_reference(router_contract, fee_rate):
+    for amm in route_in_gm.generate_amms(16):
+        for _ in range(4):
+            amount = random.randint(1, amm.x - 1)
+            for is_buy in [True, False]:
+                quote = router_contract.internal._get_quote_amount_single(
+                    is_buy, amount, amm.x, amm.y, fee_rate
+                )
+                assert quote == quote_single(is_buy, amount, amm.x, amm.y, fee_rate)
+
+            # fee-free route_in_gm quotes, scaled by the fee and off by rounding only
+            buy = route_in_gm.quote_exact_output_single(amm, amount, True)
+            sell = route_in_gm.quote_exact_input_single(amm, amount, False)
+            buy_fee = quote_single(True, amount, amm.x, amm.y, fee_rate)
+            sell_fee = quote_single(False, amount, amm.x, amm.y, fee_rate)
+            assert abs(buy_fee - buy * 10000 / (10000 - fee_rate)) <= 3
+            assert abs(sell_fee - sell * (10000 - fee_rate) / 10000) <= 3
+
+    assert quote_single(True, 10**6, 10**6, 10**6, 30) == MAX_UINT256
+    assert (
+        router_contract.internal._get_quote_amount_single(True, 10**6, 10**6, 10**6, 30)
+        == MAX_UINT256
+    )
+
+
+@pytest.mark.parametrize("fee_rate", [0, 30, 100])
+@pytest.mark.parametrize("n", [2, 5, 9])
+def test_get_quote_matches_mirror(n, fee_rate):
+    amms = route_in_gm.generate_amms(n)
+    reserves = [(amm.x, amm.y) for amm in amms]
+    router, _ = deploy_market(reserves, fee_rate)
+
+    for i in range(n):
+        amount = 10**6 * random.randint(10, 1_000)
+        for is_buy in [True, False]:
+            assert router.get_quote(0, is_buy, amount, i) == get_quote(
+                reserves, fee_rate, is_buy, amount, i
+            )
+
+
+@pytest.mark.parametrize("n", [2, 5, 9])
+def test_get_quote_buy_with_fee_above_fee_free(n):
+    amms = route_in_gm.generate_amms(n)
+    reserves = [(amm.x, amm.y) for amm in amms]
+    router, _ = deploy_market(reserves, 0)
+    router_fee, _ = deploy_market(reserves, 30)
+
+    for i in range(n):
+        amount_in = 10**6 * random.randint(10, 1_000)
+        _, amount_out = route_in_gm.find_optimal_flashloan(amms, i, amount_in)
+        quote = router.get_quote(0, True, amount_out, i)
+        quote_fee = router_fee.get_quote(0, True, amount_out, i)
+
+        # the fee is paid on top of buys and taken from the proceeds of sells
+        assert quote < quote_fee
+        assert router_fee.get_quote(0, False, amount_out, i) < router.get_quote(
+            0, False, amount_out, i
+        )
+
+
+@pytest.mark.parametrize("n", [2, 5, 9])
+def test_get_quote_sell_below_buy(n):
+    amms = route_in_gm.generate_amms(n)
+    router, _ = deploy_market([(amm.x, amm.y) for amm in amms], 30)
+
+    for i in range(n):
+        amount = 10**6 * random.randint(10, 1_000)
+        quote_sell = router.get_quote(0, False, amount, i)
+        quote_buy = router.get_quote(0, True, amount, i)
+
+        assert 0 < quote_sell < quote_buy
+
+
+def test_get_quote_invalid_option():
+    router, _ = deploy_market([(10**9, 10**9), (10**9, 10**9)], 30)
+
+    with boa.reverts("Router: invalid option"):
+        router.get_quote(0, True, 10**6, 2)
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from research_synstation import vote_escrow
+from research_synstation.vote_escrow import MAXTIME, WEEK
+
+
+def simulate(num_weeks=120, locks_per_week=500, seed=0, max_weeks=None):
+    rng = np.random.default_rng(seed)
+    ve = vote_escrow.VoteEscrow(num_weeks * locks_per_week, max_weeks=max_weeks)
+    snapshots = []
+    for week in range(num_weeks):
+        t = week * WEEK + int(rng.integers(0, WEEK))
+        ids = np.arange(week * locks_per_week, (week + 1) * locks_per_week)
+        ve.create_lock(
+            ids,
+            rng.uniform(1, 1000, len(ids)),
+            t + rng.integers(WEEK, MAXTIME, len(ids)),
+            t,
+        )
+
+        active = np.flatnonzero((ve.end > t) & (ve.end < t + MAXTIME - 2 * WEEK))
+        chosen = rng.choice(active, 100, replace=False)
+        ve.increase_unlock_time(chosen, ve.end[chosen] + 2 * WEEK, t)
+        chosen = rng.choice(active, 100, replace=False)
+        ve.increase_amount(chosen, rng.uniform(1, 100, 100), t)
+
+        expired = np.flatnonzero((ve.end <= t) & (ve.amount > 0))
+        assert np.all(ve.withdraw(expired, t) > 0)
+
+        snapshots.append((t, ve.balance_of(np.arange(len(ve.amount)), t).sum()))
+    return ve, snapshots
+
+
+def test_total_supply_matches_sum_of_balances():
+    ve, snapshots = simulate()
+    for t, expected in snapshots:
+        # every snapshot is in the past now
+        assert ve.total_supply(t) == pytest.approx(expected, rel=1e-12)
+
+    t = snapshots[-1][0]
+    for future in [t + 1, t + 3 * WEEK + 5, t + MAXTIME // 2, t + MAXTIME]:
+        expected = ve.balance_of(np.arange(len(ve.amount)), future).sum()
+        assert ve.total_supply(future) == pytest.approx(expected, rel=1e-12, abs=1e-9)
+
+
+def test_lock_rules():
+    ve = vote_escrow.VoteEscrow(2)
+    ve.create_lock([0], [100.0], 10 * WEEK, 0)
+
+    with pytest.raises(AssertionError, match="Withdraw old tokens first"):
+        ve.create_lock([0], [1.0], 20 * WEEK, 1)
+    with pytest.raises(AssertionError, match="4 years max"):
+        ve.create_lock([1], [1.0], MAXTIME + 2 * WEEK, 1)
+    with pytest.raises(AssertionError, match="didn't expire"):
+        ve.withdraw([0], 9 * WEEK)
+
+    assert ve.balance_of([0], 5 * WEEK)[0] == pytest.approx(100 / MAXTIME * 5 * WEEK)
+    assert list(ve.withdraw([0], 10 * WEEK)) == [100.0]
+    assert ve.total_supply(10 * WEEK) == 0
+
+
+def test_slope_changes_grow_past_horizon():
+    ve, snapshots = simulate(num_weeks=30, max_weeks=1)
+    _, expected = simulate(num_weeks=30)
+    assert snapshots == expected
+    for t, supply in snapshots:
+        assert ve.total_supply(t) == pytest.approx(supply, rel=1e-12)
+
+    # years after the default horizon of MAXTIME plus ten years
+    t = snapshots[-1][0] + 20 * 365 * 86400
+    ids = np.arange(len(ve.amount))
+    ve.withdraw(ids[(ve.amount > 0) & (ve.end <= t)], t)
+    ve.create_lock(ids[:1], [100.0], t + MAXTIME, t)
+    future = t + MAXTIME // 2
+    assert ve.total_supply(future) == pytest.approx(
+        ve.balance_of(ids, future).sum(), abs=1e-6
+    )